@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# Attitude estimator fusing gyro and accelerometer: a complementary filter
+# or, with mode=MAHONY, a Mahony style quaternion filter with PI feedback
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from math import atan2, asin, sin, cos, sqrt, degrees, radians
+from utime import ticks_diff
+
+COMPLEMENTARY = 0
+MAHONY = 1
+
+_ROLL = 0       # slots in _att
+_PITCH = 1
+_YAW_RATE = 2
+
+class attitude():
+    # acc_vals may be in any unit, only their direction is used. gyro_vals
+    # times gyro_scale must be degrees/s, e.g. gyro_scale=0.01 for the
+    # centi-degrees/s of MPU6050.decode_fixed().
+    def __init__(self, mode=COMPLEMENTARY, alpha=0.98, kp=2.0, ki=0.05, gyro_scale=1.0):
+        self.mode = mode
+        self._alpha = alpha     # complementary: weight of the integrated gyro
+        self._kp = kp           # mahony: proportional and integral gains
+        self._ki = ki
+        self._gyro_scale = gyro_scale
+        self._att = array('f', [0, 0, 0])           # roll, pitch (degrees), yaw rate (degrees/s)
+        self._q = array('f', [1, 0, 0, 0])          # mahony: attitude quaternion
+        self._i = array('f', [0, 0, 0])             # mahony: integral feedback (rad/s)
+        self._ticks = 0
+        self._started = False
+
+    def reset(self):
+        self._q[0] = 1
+        for i in range(3):
+            self._att[i] = 0
+            self._q[i+1] = 0
+            self._i[i] = 0
+        self._started = False
+
+    @property
+    def roll(self):
+        return self._att[_ROLL]
+
+    @property
+    def pitch(self):
+        return self._att[_PITCH]
+
+    @property
+    def yaw_rate(self):
+        return self._att[_YAW_RATE]
+
+    @property
+    def values(self):
+        # roll, pitch, yaw rate without copying
+        return self._att
+
+    def update(self, acc_vals, gyro_vals, ticks):
+        # ticks: ticks_us() when the sample was taken, e.g. MPU6050.frame_ticks
+        if not self._started:
+            self._started = True
+            self._ticks = ticks
+            self._level(acc_vals[0], acc_vals[1], acc_vals[2])
+            return
+        dt = ticks_diff(ticks, self._ticks) / 1000000
+        self._ticks = ticks
+        if dt <= 0:
+            return
+        s = self._gyro_scale
+        self.step(acc_vals[0], acc_vals[1], acc_vals[2],
+                  gyro_vals[0]*s, gyro_vals[1]*s, gyro_vals[2]*s, dt)
+
+    def update_samples(self, samples, n, dt):
+        # n consecutive samples as MPU6050.fifo_samples holds them,
+        # ax, ay, az (g), gx, gy, gz (degrees/s), dt seconds apart
+        i = 0
+        if not self._started:
+            self._started = True
+            self._level(samples[0], samples[1], samples[2])
+            i = 6
+        while i < n*6:
+            self.step(samples[i], samples[i+1], samples[i+2],
+                      samples[i+3], samples[i+4], samples[i+5], dt)
+            i += 6
+
+    def _level(self, ax, ay, az):
+        # initial attitude from the accelerometer alone
+        roll = atan2(ay, az)
+        pitch = atan2(-ax, sqrt(ay*ay + az*az))
+        self._att[_ROLL] = degrees(roll)
+        self._att[_PITCH] = degrees(pitch)
+        # quaternion of roll, then pitch, zero yaw
+        cr = cos(roll/2)
+        sr = sin(roll/2)
+        cp = cos(pitch/2)
+        sp = sin(pitch/2)
+        self._q[0] = cr*cp
+        self._q[1] = sr*cp
+        self._q[2] = cr*sp
+        self._q[3] = -sr*sp
+
+    def step(self, ax, ay, az, gx, gy, gz, dt):
+        # one sample: gyro in degrees/s, dt in seconds
+        self._att[_YAW_RATE] = gz
+        if self.mode == MAHONY:
+            self._mahony(ax, ay, az, radians(gx), radians(gy), radians(gz), dt)
+        else:
+            self._complementary(ax, ay, az, gx, gy, dt)
+
+    def _complementary(self, ax, ay, az, gx, gy, dt):
+        alpha = self._alpha
+        roll = atan2(ay, az)
+        pitch = atan2(-ax, sqrt(ay*ay + az*az))
+        self._att[_ROLL] = alpha*(self._att[_ROLL] + gx*dt) + (1-alpha)*degrees(roll)
+        self._att[_PITCH] = alpha*(self._att[_PITCH] + gy*dt) + (1-alpha)*degrees(pitch)
+
+    def _mahony(self, ax, ay, az, gx, gy, gz, dt):
+        q = self._q
+        q0 = q[0]
+        q1 = q[1]
+        q2 = q[2]
+        q3 = q[3]
+        norm = sqrt(ax*ax + ay*ay + az*az)
+        if norm > 0:
+            ax /= norm
+            ay /= norm
+            az /= norm
+            # gravity direction predicted by the quaternion
+            vx = 2*(q1*q3 - q0*q2)
+            vy = 2*(q0*q1 + q2*q3)
+            vz = q0*q0 - q1*q1 - q2*q2 + q3*q3
+            # error is the cross product of measured and predicted gravity
+            ex = ay*vz - az*vy
+            ey = az*vx - ax*vz
+            ez = ax*vy - ay*vx
+            if self._ki > 0:
+                self._i[0] += self._ki*ex*dt
+                self._i[1] += self._ki*ey*dt
+                self._i[2] += self._ki*ez*dt
+            gx += self._kp*ex + self._i[0]
+            gy += self._kp*ey + self._i[1]
+            gz += self._kp*ez + self._i[2]
+        h = 0.5*dt
+        q[0] = q0 + (-q1*gx - q2*gy - q3*gz)*h
+        q[1] = q1 + (q0*gx + q2*gz - q3*gy)*h
+        q[2] = q2 + (q0*gy - q1*gz + q3*gx)*h
+        q[3] = q3 + (q0*gz + q1*gy - q2*gx)*h
+        norm = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + q[3]*q[3])
+        for i in range(4):
+            q[i] /= norm
+        q0 = q[0]
+        q1 = q[1]
+        q2 = q[2]
+        q3 = q[3]
+        self._att[_ROLL] = degrees(atan2(2*(q0*q1 + q2*q3), 1 - 2*(q1*q1 + q2*q2)))
+        sinp = 2*(q0*q2 - q3*q1)
+        if sinp > 1:
+            sinp = 1
+        elif sinp < -1:
+            sinp = -1
+        self._att[_PITCH] = degrees(asin(sinp))
+
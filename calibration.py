@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# Persisted IMU bias calibration, so that a boot only has to confirm the
+# stored values with a short stillness check instead of sampling for seconds
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import json
+import time
+
+CAL_FILE = 'calibration.json'
+
+ACC_TOL = 5         # centi-g per axis, drone must sit as it did at capture
+ACC_SUM_TOL = 0.03  # of based_acc_sum
+GYRO_TOL = 2.0      # degrees/s per axis and sample, after offsets
+TEM_TOL = 5.0       # degree C, gyro bias drifts with temperature
+
+
+class calibration_store():
+    def __init__(self, path=CAL_FILE):
+        self.path = path
+        self.acc_base = [0, 0, 0]           # centi-g at rest, vehicle relative
+        self.gyro_offset = [0.0, 0.0, 0.0]  # degrees/s at rest, vehicle relative
+        self.based_acc_sum = 0
+        self.temperature = 0.0              # degree C at capture
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.acc_base = [int(v) for v in data['acc_base']]
+            self.gyro_offset = [float(v) for v in data['gyro_offset']]
+            self.based_acc_sum = int(data['based_acc_sum'])
+            self.temperature = float(data['temperature'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return len(self.acc_base)==3 and len(self.gyro_offset)==3 and self.based_acc_sum>0
+
+    def save(self):
+        data = {'acc_base': self.acc_base,
+                'gyro_offset': self.gyro_offset,
+                'based_acc_sum': self.based_acc_sum,
+                'temperature': self.temperature,}
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+
+    def apply(self, imu):
+        # Vector3d.cal is in sensor axes, the offsets are vehicle relative
+        gyro = imu.gyro
+        cal = [0.0, 0.0, 0.0]
+        for i in range(3):
+            cal[gyro.transpose[i]] = self.gyro_offset[i] / gyro.scale[i]
+        gyro.cal = tuple(cal)
+
+    def check(self, imu, bb, count=10, interval=0.02):
+        # short stillness check against the stored values, offsets applied
+        acc_vals = [0.0, 0.0, 0.0]
+        gyro_vals = [0.0, 0.0, 0.0]
+        acc_sum = [0, 0, 0]
+        tem = 0.0
+        for i in range(count):
+            tem += imu.snapshot(acc_vals, gyro_vals)
+            for j in range(3):
+                acc_sum[j] += int(acc_vals[j]*100)
+                if abs(gyro_vals[j]) > GYRO_TOL:
+                    bb.write('    calibration check: not still, gyro '+str(j)+': '+str(gyro_vals[j]))
+                    return False
+            time.sleep(interval)
+        tem = tem/count
+        if abs(tem - self.temperature) > TEM_TOL:
+            bb.write('    calibration check: temperature '+str(tem)+' vs '+str(self.temperature))
+            return False
+        acc_base = [int(acc_sum[j]/count) for j in range(3)]
+        for j in range(3):
+            if abs(acc_base[j] - self.acc_base[j]) > ACC_TOL:
+                bb.write('    calibration check: acc '+str(acc_base)+' vs '+str(self.acc_base))
+                return False
+        based_acc_sum = acc_base[0]**2 + acc_base[1]**2 + acc_base[2]**2
+        if abs(based_acc_sum - self.based_acc_sum) > ACC_SUM_TOL*self.based_acc_sum:
+            bb.write('    calibration check: acc sum '+str(based_acc_sum)+' vs '+str(self.based_acc_sum))
+            return False
+        bb.write('    calibration check passed, Base G: '+str(self.based_acc_sum))
+        return True
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# debug event log: fixed-size events recorded in constant time, formatted later
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from record_ring import record_ring
+
+# event ids, and the labels they are formatted with
+EV_JOYSTICK_2 = 0
+EV_FALL_PROTECT = 1
+EV_ROLL = 2
+EV_PITCH = 3
+EV_RATE = 4         # motor: 1 roll, 2 pitch, 3 yaw demand
+EV_THROTTLE = 5     # compiled pwm delta of a motor
+EV_MIX = 6          # output of a motor
+
+_LABELS = ('joystick_2:    ', 'fall_protect:  ', 'roll:          ', 'pitch:         ',
+           'rate_control:  ', 'throttle:      ', 'mix:           ')
+
+_EVENT = 0          # fields of a record
+_MOTOR = 1
+_VALUE = 2
+_DELTA = 3
+
+class event_log():
+    # size events of (event id, motor id, value, delta) in a record_ring.
+    # record() is a handful of array writes and never formats or blocks, so
+    # the control loop takes the same time with debug on; the lines are
+    # formatted by drain(), from a slow task or the other core.
+    def __init__(self, name, size=256):
+        self.name = name
+        self._ring = record_ring(size, 4, 'f')
+
+    @property
+    def pending(self):
+        # events recorded and not drained yet
+        return len(self._ring)
+
+    @property
+    def dropped(self):
+        # events recorded while the log was full
+        return self._ring.dropped
+
+    def record(self, event, motor, value, delta=0):
+        # motor: -1 when the event is not about one motor
+        ring = self._ring
+        i = ring.write_slot()
+        if i < 0:
+            return
+        buf = ring.buf
+        buf[i] = event
+        buf[i+1] = motor
+        buf[i+2] = value
+        buf[i+3] = delta
+        ring.publish()
+
+    def format(self, event, motor, value, delta):
+        msg = '    '+self.name
+        if motor >= 0:
+            msg += str(motor)
+        msg += '.'+_LABELS[event]+str(value)
+        if event <= EV_FALL_PROTECT:
+            if delta > 0:
+                msg += ', +'+str(delta)
+            else:
+                msg += ', '+str(delta)
+        return msg
+
+    def drain(self, write=print, max_lines=0):
+        # formats and writes the oldest events, at most max_lines of them
+        # when given; returns the number written
+        ring = self._ring
+        buf = ring.buf
+        n = 0
+        i = ring.read_slot()
+        while i >= 0:
+            event = int(buf[i])
+            motor = int(buf[i+1])
+            value = buf[i+2]
+            delta = buf[i+3]
+            ring.release()
+            if event < EV_THROTTLE:
+                value = round(value, 2)
+                delta = round(delta, 2)
+            else:
+                value = int(value)
+            write(self.format(event, motor, value, delta))
+            n += 1
+            if n == max_lines:
+                break
+            i = ring.read_slot()
+        return n
@@ -29,51 +29,110 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
 SOFTWARE.
 '''
-from moving_average import moving_average
+from array import array
+from utime import ticks_diff
+from sensor_frame import SensorFrame
+from rc_input import RCInput
+from mixer import Mixer
+from event_log import EV_JOYSTICK_2, EV_FALL_PROTECT, EV_ROLL, EV_PITCH, EV_RATE, EV_THROTTLE, EV_MIX
+
+_SHIFT = 14 # fraction bits of the compiled coefficients, see flight_ctr.compile()
 
 class flight_ctr():
-    def __init__(self, name, st_range, m_range, debug=None, m_val_cr=1.0):
+    # m_ranges: min, max, init, limit per motor, in the order of the layout rows
+    # layout: a key of MIXER_LAYOUTS or the mixing rows, see mixer.py
+    # pids: roll, pitch and yaw rate PIDs (yaw may be None) fed by the gyro,
+    # None keeps the proportional nudge on the accelerometer tilt
+    # angle_kp: degrees/s of rate setpoint per degree of roll or pitch
+    # debug: an event_log the control steps are recorded in, see drain()
+    # log_every: the rate and mix events of every log_every-th tick are
+    # recorded, see _control_tasks()
+    def __init__(self, name, st_range, m_ranges, debug=None, m_val_cr=1.0, layout='quad_x',
+                 pids=None, angle_kp=4.0):
         self.name = name
-        self.bb = debug
+        self.log = debug
+        self.log_every = 1
+        self._log_n = 0
+        self._log_tick = False # the rate and mix events of this tick are recorded
         self.m_val_cr = m_val_cr
 
         self._BASED_ACC_SUM = 0
         self._ES_ACC_SUM = 0
-        self._acc_vals = [0, 0, 0]
-        self._gyro_vals = [0, 0, 0]
+        self._frame = SensorFrame() # replaced by the loop's shared frame, see frame
+
+        self._rc = RCInput(None, st_range) # replaced by the loop's shared stage, see rc
+
+        self._mixer = Mixer(layout, m_ranges, m_val_cr)
+        self._demands = array('f', [0, 0, 0, 0]) # throttle, roll, pitch, yaw, in motor units
 
-        self._ST_RANGE = st_range # stick parameters
-        st_q_size = 10
-        st0_q = moving_average(st_q_size+1)
-        st1_q = moving_average(st_q_size+1)
-        st2_q = moving_average(st_q_size+1)
-        self._st_q = [st0_q, st1_q, st2_q]
+        self._pids = pids
+        self._ANGLE_KP = angle_kp
+        self._ticks = 0 # frame.ticks of the last rate_control()
+        self._started = False
 
-        self._M_RANGE = m_range # simonk pwm parameters
-        self._1_PERMILLE = int((self._M_RANGE[1]-self._M_RANGE[0])/1000*self.m_val_cr)
-        self._M_UNIT = 5 * self._1_PERMILLE
-        self._10_M_UNIT = self._M_UNIT * 10
-        self._100_M_UNIT = self._M_UNIT * 100
-        self._pwm_value = m_range[0]
+        # compile(): integer coefficients per motor, (x*k) >> _SHIFT
+        n = self._mixer.motors
+        self._compiled = False
+        self._c_mid = 0                         # throttle stick mid point
+        self._c_stick_hi = array('i', [0]*n)    # pwm per stick step above the mid point
+        self._c_stick_lo = array('i', [0]*n)    # and below it
+        self._c_based = array('i', [0]*n)       # pwm per acc sum below based_acc_sum
+        self._c_es = array('i', [0]*n)          # pwm per acc sum above es_acc_sum
+        self._c_roll = array('i', [0]*n)        # pwm per centi-g of ay
+        self._c_pitch = array('i', [0]*n)       # pwm per centi-g of ax
+        self._c_delta = array('i', [0]*n)       # pwm deltas of the tick
+
+
+    # the sensor frame is shared by reference: the loop converts each sample
+    # once and every controller reads the same SensorFrame
+    @property
+    def frame(self):
+        return self._frame
 
+    @frame.setter
+    def frame(self, frame):
+        self._frame = frame
 
+    # the setters below write into the frame, which may be shared
     @property
     def acc_vals(self):
-        return self._acc_vals
+        return self._frame.acc
 
     @acc_vals.setter
     def acc_vals(self, acc_vals):
-        for i in range(3):
-            self._acc_vals[i] = int(acc_vals[i]*100)
+        self._frame.set_acc(acc_vals)
 
     @property
     def gyro_vals(self):
-        return self._gyro_vals
+        return self._frame.gyro
 
     @gyro_vals.setter
     def gyro_vals(self, gyro_vals):
-        for i in range(3):
-            self._gyro_vals[i] = int(gyro_vals[i])
+        self._frame.set_gyro(gyro_vals)
+
+    @property
+    def acc_cvals(self):
+        return self._frame.acc
+
+    @acc_cvals.setter
+    def acc_cvals(self, acc_cvals):
+        self._frame.set_acc_c(acc_cvals)
+
+    @property
+    def gyro_cvals(self):
+        return self._frame.gyro
+
+    @gyro_cvals.setter
+    def gyro_cvals(self, gyro_cvals):
+        self._frame.set_gyro_c(gyro_cvals)
+
+    @property
+    def att_vals(self):
+        return self._frame.att
+
+    @att_vals.setter
+    def att_vals(self, att_vals):
+        self._frame.set_att(att_vals)
 
     @property
     def based_acc_sum(self):
@@ -82,6 +141,7 @@ class flight_ctr():
     @based_acc_sum.setter
     def based_acc_sum(self, based_acc_sum):
         self._BASED_ACC_SUM = based_acc_sum
+        self._compiled = False
 
     @property
     def es_acc_sum(self):
@@ -90,196 +150,336 @@ class flight_ctr():
     @es_acc_sum.setter
     def es_acc_sum(self, es_acc_sum):
         self._ES_ACC_SUM = es_acc_sum
+        self._compiled = False
+
+    # the RC input stage is shared by reference like the sensor frame
+    @property
+    def rc(self):
+        return self._rc
+
+    @rc.setter
+    def rc(self, rc):
+        self._rc = rc
 
+    # filtered stick values; setting pushes one sample into the (shared) stage
     @property
     def st_vals(self):
-        st_vals[0, 0, 0]
-        for i in range(3):
-            st_vals = self._st_q[i].average
-        return st_vals
+        return self._rc.vals
 
     @st_vals.setter
     def st_vals(self, st_vals):
-        for i in range(3):
-            self._st_q[i].update_val(st_vals[i])
+        self._rc.set(st_vals)
 
     @property
-    def one_permille(self):
-        return self._1_PERMILLE
-    
+    def mixer(self):
+        return self._mixer
 
-    def joystick_2(self):
-        st_2_val = self._st_q[2].average
-        if st_2_val>self._ST_RANGE[2][1]:
-            delta = int(self._100_M_UNIT*((st_2_val-self._ST_RANGE[2][1])/(self._ST_RANGE[2][2]-self._ST_RANGE[2][1])))
-            self._pwm_value += delta
-            if self.bb:
-                if delta>0:
-                    sign = '+'
-                else:
-                    sign = ''
-                self.bb.write('    '+self.name+'.'+'joystick_2:    '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        else:
-            delta = int(-1*self._100_M_UNIT*((self._ST_RANGE[2][1]-st_2_val)/(self._ST_RANGE[2][1]-self._ST_RANGE[2][0])))
-            self._pwm_value += delta
-            if self.bb:
-                if delta>0:
-                    sign = '+'
-                else:
-                    sign = ''
-                self.bb.write('    '+self.name+'.'+'joystick_2:    '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
+    @property
+    def m_ranges(self):
+        return self._mixer.m_ranges
 
-    def fall_protect(self):
-        ax = self._acc_vals[0]
-        ay = self._acc_vals[1]
-        az = self._acc_vals[2]
-        acc_sum = ax**2 + ay**2 + az**2
-        if self._BASED_ACC_SUM!=0 and acc_sum < self._BASED_ACC_SUM:
-            ### 下墜時加速
-            delta = int(self._10_M_UNIT * (1.0 - acc_sum/self._BASED_ACC_SUM))
-            self._pwm_value += delta
-            if self.bb:
-                if delta>0:
-                    sign = '+'
-                else:
-                    sign = ''
-                self.bb.write('    '+self.name+'.'+'fall_protect:  '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        if self._ES_ACC_SUM!=0 and acc_sum > self._ES_ACC_SUM:
-            ### 沒加油門時，爆升時減速
-            st_2_val = self._st_q[2].average
-            if st_2_val<=self._ST_RANGE[2][1]:
-                delta = int(self._10_M_UNIT * (1.0 - acc_sum/self._ES_ACC_SUM))
-                self._pwm_value += delta
-                if self.bb:
-                    if delta>0:
-                        sign = '+'
-                    else:
-                        sign = ''
-                    self.bb.write('    '+self.name+'.'+'fall_protect:  '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
-
-    def left(self):
-        ay = self._acc_vals[1]
-        delta = int(-1*self._M_UNIT*ay)
-        self._pwm_value += delta
-        if self.bb:
-            if delta>0:
-                sign = '+'
-            else:
-                sign = ''
-            self.bb.write('    '+self.name+'.'+'left:          '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
-
-    def right(self):
-        ay = self._acc_vals[1]
-        delta = int(self._M_UNIT*ay)
-        self._pwm_value += delta
-        if self.bb:
-            if delta>0:
-                sign = '+'
-            else:
-                sign = ''
-            self.bb.write('    '+self.name+'.'+'right:         '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
-
-    def front(self):
-        ax = self._acc_vals[0]
-        delta = int(-1*self._M_UNIT*ax)
-        self._pwm_value += delta
-        if self.bb:
-            if delta>0:
-                sign = '+'
-            else:
-                sign = ''
-            self.bb.write('    '+self.name+'.'+'front:         '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
-
-    def back(self):
-        ax = self._acc_vals[0]
-        delta = int(self._M_UNIT*ax)
-        self._pwm_value += delta
-        if self.bb:
-            if delta>0:
-                sign = '+'
-            else:
-                sign = ''
-            self.bb.write('    '+self.name+'.'+'back:          '+str(self._pwm_value)+', '+str(sign)+str(delta))
-        return self._pwm_value
-
-    def range_protect(self):
-        pwm_value = self._pwm_value
-        if pwm_value>self._M_RANGE[1]:
-            pwm_value = self._M_RANGE[1]
-            if self.bb:
-                self.bb.write('    '+self.name+'.'+'range_protect: '+str(pwm_value))
-        if pwm_value<self._M_RANGE[0]:
-            pwm_value = self._M_RANGE[0]
-            if self.bb:
-                self.bb.write('    '+self.name+'.'+'range_protect: '+str(pwm_value))
-        self._pwm_value = pwm_value
-        return self._pwm_value
-
-
-class flight_ctr_fr(flight_ctr):
-    def motor_pwn_value(self):
-        self.joystick_2()
-        self.right()
-        self.front()
-        self.fall_protect()
-        self.range_protect()
-        return self._pwm_value
+    # the pwm value of every motor, see Mixer.outputs
+    @property
+    def outputs(self):
+        return self._mixer.outputs
 
+    @property
+    def demands(self):
+        return self._demands
 
-class flight_ctr_fl(flight_ctr):
-    def motor_pwn_value(self):
-        self.joystick_2()
-        self.left()
-        self.front()
-        self.fall_protect()
-        self.range_protect()
-        return self._pwm_value
+    @property
+    def pids(self):
+        return self._pids
+
+    @property
+    def angle_kp(self):
+        return self._ANGLE_KP
 
+    @property
+    def compiled(self):
+        return self._compiled
 
-class flight_ctr_bl(flight_ctr):
-    def motor_pwn_value(self):
-        self.joystick_2()
-        self.left()
-        self.back()
-        self.fall_protect()
-        self.range_protect()
-        return self._pwm_value
+    # the throttle of every motor is down to its min, the rate offsets aside
+    @property
+    def idle(self):
+        if self._pids:
+            out = self._mixer.base
+        else:
+            out = self._mixer.outputs
+        m_ranges = self._mixer.m_ranges
+        for i in range(len(out)):
+            if out[i] > m_ranges[i][0]:
+                return False
+        return True
+
+    def reset(self, outputs=True):
+        # no demands, the PIDs restarted and with outputs every motor back
+        # to min; without, the motors go on from where they are
+        if outputs:
+            self._mixer.reset()
+        for i in range(4):
+            self._demands[i] = 0
+        for i in range(len(self._c_delta)):
+            self._c_delta[i] = 0
+        if self._pids:
+            for pid in self._pids:
+                if pid:
+                    pid.reset()
+        self._started = False
+
+    def compile(self):
+        # once calibrated: the stick range, the motor units and m_val_cr
+        # (both in the mixer rows) and the acc sum thresholds become integer
+        # coefficients, so joystick_2, fall_protect and the tilt law are
+        # integer multiplies, shifts and adds per tick. Setting
+        # based_acc_sum or es_acc_sum goes back to the float path.
+        # This keeps float results, each a heap allocation on MicroPython,
+        # off the tick; it is not quicker under CPython (host/bench.py),
+        # and its cost on the RP2040 is yet to be measured.
+        one = 1 << _SHIFT
+        st_min, st_mid, st_max = self._rc.st_range[2]
+        m = self._mixer.matrix
+        for i in range(self._mixer.motors):
+            thr = m[i*4]
+            self._c_stick_hi[i] = round(100*thr*one/(st_max-st_mid))
+            self._c_stick_lo[i] = round(100*thr*one/(st_mid-st_min))
+            self._c_based[i] = 0
+            if self._BASED_ACC_SUM:
+                self._c_based[i] = round(10*thr*one/self._BASED_ACC_SUM)
+            self._c_es[i] = 0
+            if self._ES_ACC_SUM:
+                self._c_es[i] = round(10*thr*one/self._ES_ACC_SUM)
+            self._c_roll[i] = round(m[i*4+1]*one)
+            self._c_pitch[i] = round(m[i*4+2]*one)
+        self._c_mid = st_mid
+        self._compiled = True
 
 
-class flight_ctr_br(flight_ctr):
-    def motor_pwn_value(self):
+    def joystick_2(self):
+        delta = 100*self._rc.norm[2]
+        self._demands[0] += delta
+        if self.log:
+            self.log.record(EV_JOYSTICK_2, -1, self._demands[0], delta)
+        return self._demands[0]
+
+    def fall_protect(self):
+        acc_sum = self._frame.acc_sum
+        if self._BASED_ACC_SUM!=0 and acc_sum < self._BASED_ACC_SUM:
+            ### 下墜時加速
+            delta = 10 * (1.0 - acc_sum/self._BASED_ACC_SUM)
+            self._demands[0] += delta
+            if self.log:
+                self.log.record(EV_FALL_PROTECT, -1, self._demands[0], delta)
+        if self._ES_ACC_SUM!=0 and acc_sum > self._ES_ACC_SUM:
+            ### 沒加油門時，爆升時減速
+            if self._rc.norm[2]<=0:
+                delta = 10 * (1.0 - acc_sum/self._ES_ACC_SUM)
+                self._demands[0] += delta
+                if self.log:
+                    self.log.record(EV_FALL_PROTECT, -1, self._demands[0], delta)
+        return self._demands[0]
+
+    # the mixing rows turn +ay into right side up and +ax into back up,
+    # what right()/left() and back()/front() did per motor
+    def roll(self):
+        self._demands[1] = self._frame.acc[1]
+        if self.log:
+            self.log.record(EV_ROLL, -1, self._demands[1])
+        return self._demands[1]
+
+    def pitch(self):
+        self._demands[2] = self._frame.acc[0]
+        if self.log:
+            self.log.record(EV_PITCH, -1, self._demands[2])
+        return self._demands[2]
+
+    def rate_control(self, dt=None):
+        # dt: seconds since the last call, measured by the loop timer; None
+        # takes it from the frame ticks
+        # outer loop: roll and pitch (centi-degrees, frame.att) to a rate
+        # setpoint that levels the frame; inner loop: the rate PIDs on the
+        # gyro (centi-degrees/s). A positive roll demand lifts the right side
+        # and turns the roll rate negative; pitch and yaw demands turn their
+        # rates positive.
+        frame = self._frame
+        ticks = frame.ticks
+        if not self._started:
+            self._started = True
+            self._ticks = ticks
+            return
+        if dt is None:
+            dt = ticks_diff(ticks, self._ticks) / 1000000
+        self._ticks = ticks
+        if dt <= 0:
+            return
+        att = frame.att
+        gyro = frame.gyro
+        pid_roll, pid_pitch, pid_yaw = self._pids
+        kp = self._ANGLE_KP
+        self._demands[1] = -pid_roll.update(-kp*att[0]/100, gyro[0]/100, dt)
+        self._demands[2] = pid_pitch.update(-kp*att[1]/100, gyro[1]/100, dt)
+        if pid_yaw:
+            self._demands[3] = pid_yaw.update(0.0, gyro[2]/100, dt)
+        if self._log_tick:
+            for i in range(1, 4):
+                self.log.record(EV_RATE, i, self._demands[i])
+
+    def throttle(self):
+        # the stick and fall protection steps, added up until the next
+        # motor_pwn_values(throttle=False)
+        if self._compiled:
+            self._throttle_c()
+            return self._demands[0]
         self.joystick_2()
-        self.right()
-        self.back()
         self.fall_protect()
-        self.range_protect()
-        return self._pwm_value
-
-# format debug message
-def dump_flight_data(debug, flight_data):
-    for item in flight_data:
-        msg = '{'
-        for key in sorted(item.keys()):
-            msg += " '"+key+"':"+str(item[key])+","
-        msg += '}'
-        debug.write('    '+msg)
+        return self._demands[0]
+
+    def _throttle_c(self, tilt=False):
+        # joystick_2 and fall_protect on the compiled coefficients, and with
+        # tilt the proportional tilt law, added to the pwm deltas per motor;
+        # each motor's sum is truncated towards zero like int() in mix()
+        st = self._rc.ivals[2] - self._c_mid
+        if st > 0:
+            k_st = self._c_stick_hi
+        else:
+            k_st = self._c_stick_lo
+        acc = self._frame.acc
+        acc_sum = self._frame.acc_sum
+        fall = 0
+        if self._BASED_ACC_SUM and acc_sum < self._BASED_ACC_SUM:
+            fall = self._BASED_ACC_SUM - acc_sum
+        if self._ES_ACC_SUM and acc_sum > self._ES_ACC_SUM and self._rc.norm[2] <= 0:
+            fall = self._ES_ACC_SUM - acc_sum
+            k_fall = self._c_es
+        else:
+            k_fall = self._c_based
+        ax = 0
+        ay = 0
+        if tilt:
+            ax = acc[0]
+            ay = acc[1]
+        k_roll = self._c_roll
+        k_pitch = self._c_pitch
+        d = self._c_delta
+        for i in range(len(d)):
+            v = st*k_st[i] + fall*k_fall[i] + ay*k_roll[i] + ax*k_pitch[i]
+            if v < 0:
+                d[i] -= -v >> _SHIFT
+            else:
+                d[i] += v >> _SHIFT
+        if self.log:
+            for i in range(len(d)):
+                self.log.record(EV_THROTTLE, i, d[i])
+
+    def motor_pwn_values(self, throttle=True, dt=None):
+        # one set of demands, mixed into every motor output in one pass
+        # throttle: False when throttle() runs in its own, slower rate group
+        # dt: seconds since the last call, see rate_control()
+        self._log_tick = False
+        if self.log:
+            self._log_n += 1
+            if self._log_n >= self.log_every:
+                self._log_n = 0
+                self._log_tick = True
+        if self._compiled:
+            return self._motor_pwn_values_c(throttle, dt)
+        d = self._demands
+        if throttle:
+            d[0] = 0
+            self.joystick_2()
+            self.fall_protect()
+        if self._pids:
+            self.rate_control(dt)
+            out = self._mixer.mix_offset(d[0], d[1], d[2], d[3])
+        else:
+            self.roll()
+            self.pitch()
+            out = self._mixer.mix(d[0], d[1], d[2], d[3])
+        d[0] = 0
+        if self._log_tick:
+            for i in range(len(out)):
+                self.log.record(EV_MIX, i, out[i])
+        return out
+
+    def _motor_pwn_values_c(self, throttle, dt):
+        # motor_pwn_values() on the compiled coefficients; the rate PIDs
+        # stay in float
+        d = self._c_delta
+        if self._pids:
+            if throttle:
+                self._throttle_c()
+            self.rate_control(dt)
+            dm = self._demands
+            out = self._mixer.add_offset(d, dm[1], dm[2], dm[3])
+        else:
+            if throttle:
+                self._throttle_c(tilt=True)
+            else:
+                # the tilt law only, throttle() added the rest
+                ax = self._frame.acc[0]
+                ay = self._frame.acc[1]
+                k_roll = self._c_roll
+                k_pitch = self._c_pitch
+                for i in range(len(d)):
+                    v = ay*k_roll[i] + ax*k_pitch[i]
+                    if v < 0:
+                        d[i] -= -v >> _SHIFT
+                    else:
+                        d[i] += v >> _SHIFT
+            out = self._mixer.add(d)
+        if self._log_tick:
+            for i in range(len(out)):
+                self.log.record(EV_MIX, i, out[i])
+        return out
+
+
+# the samples of acc_sum_escape_g(): i, ax, ay, az,
+# delta-az, acc_sum, delta-acc_sum and the output of every motor
+def _samples(n_motors, size, largest):
+    from sample_buffer import sample_buffer
+    fields = ['i', 'ax', 'ay', 'az', 'delta-az', 'acc_sum', 'delta-acc_sum']
+    fields += ['m'+str(j) for j in range(n_motors)]
+    return sample_buffer(fields, size, 'delta-acc_sum', k=5, largest=largest)
+
+
+def _sample(samples, i, frame, prev_az, prev_acc_sum, outputs):
+    # one row, written into the preallocated columns
+    j = samples.slot()
+    if j < 0:
+        samples.commit() # counted as dropped
+        return
+    c = samples.columns
+    c[0][j] = i
+    c[1][j] = frame.acc[0]
+    c[2][j] = frame.acc[1]
+    c[3][j] = frame.acc[2]
+    c[4][j] = frame.acc[2]-prev_az
+    c[5][j] = frame.acc_sum
+    c[6][j] = frame.acc_sum-prev_acc_sum
+    for m in range(len(outputs)):
+        c[7+m][j] = outputs[m]
+    samples.commit()
 
 
 ### figuring out the baseline of acc sum
-def acc_sum_base(imu, bb):
+# if cal (a calibration_store) is given, the per-axis values are stored in it
+def acc_sum_base(imu, bb, cal=None):
     import time
     bb.write('    figuring out the baseline of acc sum..')
     ACC_BASE_SAMPLING_COUNT = 30
     acc_sum = [0, 0, 0]
+    gyro_sum = [0.0, 0.0, 0.0]
+    tem_sum = 0.0
+    acc_vals = [0.0, 0.0, 0.0]
+    gyro_vals = [0.0, 0.0, 0.0]
     for i in range(ACC_BASE_SAMPLING_COUNT):
-        acc_sum[0] += int(imu.accel.x * 100)
-        acc_sum[1] += int(imu.accel.y * 100)
-        acc_sum[2] += int(imu.accel.z * 100)
+        tem_sum += imu.snapshot(acc_vals, gyro_vals)
+        acc_sum[0] += int(acc_vals[0] * 100)
+        acc_sum[1] += int(acc_vals[1] * 100)
+        acc_sum[2] += int(acc_vals[2] * 100)
+        gyro_sum[0] += gyro_vals[0]
+        gyro_sum[1] += gyro_vals[1]
+        gyro_sum[2] += gyro_vals[2]
         if i%10==0:
             bb.write('    countdown: '+str(int((ACC_BASE_SAMPLING_COUNT-i)/10))+' sec.', end='\r')
         time.sleep(0.1)
@@ -290,236 +490,370 @@ def acc_sum_base(imu, bb):
     acc_base[2] = int(acc_sum[2]/ACC_BASE_SAMPLING_COUNT)
     acc_sum_base = acc_base[0]**2 + acc_base[1]**2 + acc_base[2]**2
     bb.write('    Base G: '+str(acc_sum_base))
+    if cal:
+        cal.acc_base = acc_base
+        cal.gyro_offset = [v/ACC_BASE_SAMPLING_COUNT for v in gyro_sum]
+        cal.based_acc_sum = acc_sum_base
+        cal.temperature = tem_sum/ACC_BASE_SAMPLING_COUNT
     return acc_sum_base
 
 
 ### figuring out the acc sum at the boundary of escape gravity
-def acc_sum_escape_g(imu, 
-                     flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-                     motor_0, motor_1, motor_2, motor_3,
-                     bb):
-    import time
-    acc_vals = [0.0, 0.0, 0.0]
-    gyro_vals = [0.0, 0.0, 0.0]
+# motors: one ZMR per row of the controller's mixing layout
+# the samples go into preallocated columns and the top 5 delta-acc_sum are
+# ranked as they come, so nothing piles up while the motors spin
+def acc_sum_escape_g(imu, flight_ctr, motors, bb):
+    import gc, time
+    frame = SensorFrame()
+    flight_ctr.frame = frame
+    rc = flight_ctr.rc
     st_vals = [0, 0, 0]
     bb.write('    figuring out the acc sum at the boundary of escape gravity..')
-    # i, az, delta-az, acc_sum, delta-acc_sum
     G_TEST_COUNT = 10 # 10 - 35
-    data = []
+    samples = _samples(len(motors), G_TEST_COUNT, largest=True)
+    # the integer throttle path while the motors spin, es_acc_sum is still
+    # 0; main.py compiles again once it is set
+    flight_ctr.compile()
+    gc.collect()
     for i in range(G_TEST_COUNT):
-        prev_ax = int(acc_vals[0]*100)
-        prev_ay = int(acc_vals[1]*100)
-        prev_az = int(acc_vals[2]*100)
-        prev_acc_sum = prev_ax**2 + prev_ay**2 + prev_az**2
-
-        acc_vals[0], acc_vals[1], acc_vals[2] = imu.accel.x, imu.accel.y, imu.accel.z
-        ax = int(acc_vals[0]*100)
-        ay = int(acc_vals[1]*100)
-        az = int(acc_vals[2]*100)
-        acc_sum = ax**2 + ay**2 + az**2
-
-        flight_ctr_0.acc_vals = acc_vals
-        flight_ctr_1.acc_vals = acc_vals
-        flight_ctr_2.acc_vals = acc_vals
-        flight_ctr_3.acc_vals = acc_vals
-
-        flight_ctr_0.gyro_vals = gyro_vals
-        flight_ctr_1.gyro_vals = gyro_vals
-        flight_ctr_2.gyro_vals = gyro_vals
-        flight_ctr_3.gyro_vals = gyro_vals
+        prev_az = frame.acc[2]
+        prev_acc_sum = frame.acc_sum
+
+        frame.read(imu) # shared with the controller
 
         st_vals[0] = 5000
         st_vals[1] = 5000
         st_vals[2] = 7500
-        flight_ctr_0.st_vals = st_vals
-        flight_ctr_1.st_vals = st_vals
-        flight_ctr_2.st_vals = st_vals
-        flight_ctr_3.st_vals = st_vals
-
-        m0 = flight_ctr_0.motor_pwn_value()
-        m1 = flight_ctr_1.motor_pwn_value()
-        m2 = flight_ctr_2.motor_pwn_value()
-        m3 = flight_ctr_3.motor_pwn_value()
-
-        motor_0.duty(m0)
-        motor_1.duty(m1)
-        motor_2.duty(m2)
-        motor_3.duty(m3)
-
-        item = {'i': i,
-                'ax': ax,
-                'ay': ay,
-                'az': az,
-                'delta-az': az-prev_az,
-                'acc_sum': acc_sum,
-                'delta-acc_sum': acc_sum-prev_acc_sum,
-                'm0': m0,
-                'm1': m1,
-                'm2': m2,
-                'm3': m3,}
+        rc.set(st_vals)
+
+        outputs = flight_ctr.motor_pwn_values()
+        for j in range(len(motors)):
+            motors[j].duty(outputs[j])
+
         if i>0: # skip the first run, becasue the value of delta-az and delta-acc_sum are meaningless.
-            data.append(item)
+            _sample(samples, i, frame, prev_az, prev_acc_sum, outputs)
 
         if i%10==0:
             bb.write('    countdown: '+str(int((G_TEST_COUNT-i)/10))+' sec.', end='\r')
         time.sleep(0.1)
     bb.write('    countdown: 0 sec.')
-    nlarge_delta_acc_sum = sorted(data, key = lambda x: x['delta-acc_sum'], reverse = True)[:5]
-    bb.write('    Escape G: '+str(nlarge_delta_acc_sum[0]['acc_sum']))
+    if flight_ctr.log: # the events of every step fit in the log
+        flight_ctr.log.drain(bb.write)
+    nlarge_delta_acc_sum = samples.top()
+    es_acc_sum = samples.get('acc_sum', nlarge_delta_acc_sum[0])
+    bb.write('    Escape G: '+str(es_acc_sum))
 
-    dump_flight_data(bb, nlarge_delta_acc_sum)
+    samples.dump(bb.write, nlarge_delta_acc_sum)
     bb.write('')
-    dump_flight_data(bb, data)
-    return nlarge_delta_acc_sum[0]['acc_sum']
-
-
-def shutdown(imu, 
-             flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-             motor_0, motor_1, motor_2, motor_3,
-             m_range_0, m_range_1, m_range_2, m_range_3,
-             bb):
-    import sys, time
-    acc_vals = [0.0, 0.0, 0.0]
-    gyro_vals = [0.0, 0.0, 0.0]
-    st_vals = [0, 0, 0]
-    bb.write('shuttdowning PicoDrone..')
-    # i, az, delta-az, acc_sum, delta-acc_sum
-    SHUTDOWN_COUNT = 500
-    data = []
-    for i in range(SHUTDOWN_COUNT):
-        prev_ax = int(acc_vals[0]*100)
-        prev_ay = int(acc_vals[1]*100)
-        prev_az = int(acc_vals[2]*100)
-        prev_acc_sum = prev_ax**2 + prev_ay**2 + prev_az**2
-
-        acc_vals[0], acc_vals[1], acc_vals[2] = imu.accel.x, imu.accel.y, imu.accel.z
-        ax = int(acc_vals[0]*100)
-        ay = int(acc_vals[1]*100)
-        az = int(acc_vals[2]*100)
-        acc_sum = ax**2 + ay**2 + az**2
-
-        flight_ctr_0.acc_vals = acc_vals
-        flight_ctr_1.acc_vals = acc_vals
-        flight_ctr_2.acc_vals = acc_vals
-        flight_ctr_3.acc_vals = acc_vals
-
-        flight_ctr_0.gyro_vals = gyro_vals
-        flight_ctr_1.gyro_vals = gyro_vals
-        flight_ctr_2.gyro_vals = gyro_vals
-        flight_ctr_3.gyro_vals = gyro_vals
-
-        st_vals[0] = 5000
-        st_vals[1] = 5000
-        st_vals[2] = 2500
-        flight_ctr_0.st_vals = st_vals
-        flight_ctr_1.st_vals = st_vals
-        flight_ctr_2.st_vals = st_vals
-        flight_ctr_3.st_vals = st_vals
-
-        m0 = flight_ctr_0.motor_pwn_value()
-        m1 = flight_ctr_1.motor_pwn_value()
-        m2 = flight_ctr_2.motor_pwn_value()
-        m3 = flight_ctr_3.motor_pwn_value()
-
-        motor_0.duty(m0)
-        motor_1.duty(m1)
-        motor_2.duty(m2)
-        motor_3.duty(m3)
-
-        item = {'i': i,
-                'ax': ax,
-                'ay': ay,
-                'az': az,
-                'delta-az': az-prev_az,
-                'acc_sum': acc_sum,
-                'delta-acc_sum': acc_sum-prev_acc_sum,
-                'm0': m0,
-                'm1': m1,
-                'm2': m2,
-                'm3': m3,}
-        if i>0: # skip the first run, becasue the value of delta-az and delta-acc_sum are meaningless.
-            data.append(item)
-        
-        if m0<=m_range_0[0] and m1<=m_range_1[0] and m2<=m_range_2[0] and m3<=m_range_3[0]:
-            bb.write('    shutdown completed, i='+str(i))
-            break
-
-        if i%10==0:
-            bb.write('    '+str(int(i/10))+' sec.', end='\r')
-        time.sleep(0.1)    
-    motor_0.duty(m_range_0[2])
-    motor_1.duty(m_range_1[2])
-    motor_2.duty(m_range_2[2])
-    motor_3.duty(m_range_3[2])
-
-    nsmall_delta_acc_sum = sorted(data, key = lambda x: x['delta-acc_sum'])[:5]
-
-    dump_flight_data(bb, nsmall_delta_acc_sum)
-    bb.write('')
-    dump_flight_data(bb, data)
-
-    if len(nsmall_delta_acc_sum)>0:
-        bb.write('    Shutting down G: '+str(nsmall_delta_acc_sum[0]['acc_sum']))
-    sys.exit()
+    samples.dump(bb.write)
+    return es_acc_sum
+
+
+LOOP_FREQ = 500         # IMU, rate PIDs and motors
+ATT_FREQ = 250
+RC_FREQ = 50
+THROTTLE_FREQ = 10      # the stick and fall protection steps are tuned to 10Hz
+TELEMETRY_FREQ = 10
+RECORD_FREQ = 100       # dual core: telemetry records sent to core 0
+REPORT_SECONDS = 5      # dual core: loop timing of core 1 on the console
+LOG_LINES = 32          # dual core: controller events formatted per stick run on core 0
+LOG_SLACK_US = 1000     # single core: events are formatted while this much of the period is left
+
+
+# the rate groups from the IMU read to the motor update, on the scheduler
+# sched paced by timer; rc_update is added in between when the same core
+# samples the sticks. prof: a profiler the stages are timed by, or None
+# mode: a flight_mode stepped every tick, the controller and the motors run
+# while it is active
+def _control_tasks(sched, timer, imu, flight_ctr, motors, frame,
+                   fixed_point, att, update_latency, rc_update=None, prof=None, mode=None):
+    from utime import ticks_us, ticks_diff
+    outputs = flight_ctr.outputs
+    drdy_seq = 0
+    if prof is None:
+        from profiler import profiler
+        prof = profiler(enabled=False)
+
+    def read_imu():
+        nonlocal drdy_seq
+        if imu.drdy: # run on the frame latched by the data ready interrupt
+            drdy_seq = imu.wait_frame(drdy_seq)
+        else: # one burst read per tick
+            imu.read_frame()
+        frame.decode(imu, fixed_point)
+
+    def update_att():
+        att.update(frame.acc, frame.gyro, frame.ticks)
+        frame.set_att(att.values)
+
+    def pwm_values():
+        flight_ctr.motor_pwn_values(throttle=False, dt=timer.dt)
+
+    def pwm_values_p():
+        # the proportional tilt law accumulates every call, keep it at 10Hz
+        flight_ctr.motor_pwn_values()
+
+    def duty():
+        for j in range(len(motors)):
+            motors[j].duty(outputs[j])
+
+    if flight_ctr.pids:
+        # the rate and mix events at the throttle rate, every tick is more
+        # than the console and the log file can take
+        flight_ctr.log_every = LOOP_FREQ // THROTTLE_FREQ
+        pwm_values = prof.wrap('control', pwm_values)
+    else:
+        pwm_values = prof.wrap('control', pwm_values_p)
+    duty = prof.wrap('duty', duty)
+
+    def control():
+        if mode and not mode.active:
+            return
+        pwm_values()
+        duty()
+        update_latency(ticks_diff(ticks_us(), frame.ticks)) # sample to motor update
+
+    throttle = flight_ctr.throttle
+    if mode:
+        def throttle():
+            if mode.active:
+                flight_ctr.throttle()
+
+    sched.add('imu', prof.wrap('imu', read_imu), LOOP_FREQ)
+    if att:
+        sched.add('attitude', prof.wrap('attitude', update_att), ATT_FREQ)
+    if rc_update:
+        sched.add('rc', prof.wrap('rc', rc_update), RC_FREQ, phase=1)
+    if mode: # a transition takes effect on the same tick
+        sched.add('mode', prof.wrap('mode', mode.step), LOOP_FREQ)
+    if flight_ctr.pids:
+        sched.add('throttle', prof.wrap('throttle', throttle), THROTTLE_FREQ, phase=2)
+        sched.add('control', control, LOOP_FREQ)
+    else:
+        sched.add('control', control, THROTTLE_FREQ, phase=2)
 
 
 ### entering the main loop
-def main_loop(imu, st0, st1, st2, 
-              flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-              motor_0, motor_1, motor_2, motor_3,
-              bb):
-    import time
-
-    ST_PROB_FREQ = 10
-    MOTOR_ADJ_FREQ = 10
-    tickcount = 0
-
-    acc_vals = [0.0, 0.0, 0.0]
-    gyro_vals = [0.0, 0.0, 0.0]
-    st_vals = [0, 0, 0]
-    while True:
-        if tickcount%(ST_PROB_FREQ/MOTOR_ADJ_FREQ)==0:
-            acc_vals[0] = imu.accel.x
-            acc_vals[1] = imu.accel.y
-            acc_vals[2] = imu.accel.z
-            gyro_vals[0] = imu.gyro.x
-            gyro_vals[1] = imu.gyro.y
-            gyro_vals[2] = imu.gyro.z
-            imu_tem = imu.temperature
-
-            flight_ctr_0.acc_vals = acc_vals
-            flight_ctr_1.acc_vals = acc_vals
-            flight_ctr_2.acc_vals = acc_vals
-            flight_ctr_3.acc_vals = acc_vals
-
-            flight_ctr_0.gyro_vals = gyro_vals
-            flight_ctr_1.gyro_vals = gyro_vals
-            flight_ctr_2.gyro_vals = gyro_vals
-            flight_ctr_3.gyro_vals = gyro_vals
-
-        st_vals[0] = st0.abs_scale()
-        st_vals[1] = st1.abs_scale()
-        st_vals[2] = st2.abs_scale()
-        
-        flight_ctr_0.st_vals = st_vals
-        flight_ctr_1.st_vals = st_vals
-        flight_ctr_2.st_vals = st_vals
-        flight_ctr_3.st_vals = st_vals
-
-        if tickcount%(ST_PROB_FREQ/MOTOR_ADJ_FREQ)==0:
-            m0 = flight_ctr_0.motor_pwn_value()
-            m1 = flight_ctr_1.motor_pwn_value()
-            m2 = flight_ctr_2.motor_pwn_value()
-            m3 = flight_ctr_3.motor_pwn_value()
-
-        if tickcount%(ST_PROB_FREQ/MOTOR_ADJ_FREQ)==0:
-            motor_0.duty(m0)
-            motor_1.duty(m1)
-            motor_2.duty(m2)
-            motor_3.duty(m3)
-
-        bb.update(acc_vals, gyro_vals, imu_tem, m0, m1, m2, m3)
-        bb.show_status(acc_vals, gyro_vals, imu_tem, m0, m1, m2, m3)
-
-        time.sleep(1.0/ST_PROB_FREQ)
-        tickcount += 1
+# ticks: stop after that many loop ticks and return the scheduler and the loop
+# timer, 0 runs until the flight mode is disarmed
+def main_loop(imu, rc, flight_ctr, motors, bb, fixed_point=False, att=None, ticks=0, prof=None,
+              rec=None, mode=None, failsafe=None, timer=None):
+    # fixed_point: the IMU delivers centi-g and centi-degrees/s integers and
+    # no float conversion happens between the IMU and the controllers
+    # att: an attitude estimator fed with every frame, gyro_scale=0.01
+    # prof: a profiler timing every stage of the loop, reported on exit
+    # rec: a flight_recorder given every tick with the dt the controller
+    # had and the mode, flushed with the telemetry
+    # mode: the flight_mode, armed before the first tick; flying from the
+    # first tick if not given
+    # failsafe: an rc_failsafe checked after every rc update
+    # timer: the loop_timer pacing the loop at LOOP_FREQ, a new one if not
+    # given; host/replay.py gives one serving the recorded dt
+    from scheduler import scheduler
+    from loop_timer import loop_timer
+    from flight_mode import flight_mode
+
+    # converted once per tick, read by reference by the controller and bb
+    frame = SensorFrame()
+    flight_ctr.frame = frame
+    # rc: the RCInput stage, sampled and filtered in its own rate group
+    flight_ctr.rc = rc
+    outputs = flight_ctr.outputs
+    if mode is None:
+        mode = flight_mode(flight_ctr, motors, LOOP_FREQ, arm_seconds=0, write=bb.write)
+
+    rc_update = rc.update
+    if failsafe:
+        def rc_update():
+            rc.update()
+            failsafe.check()
+
+    def status():
+        bb.update(frame, outputs)
+        bb.show_status(frame, outputs)
+
+    def events():
+        # the events of the control tasks, formatted one line at a time in
+        # the slack left by the tick; the rest waits for the next ticks
+        log = flight_ctr.log
+        while log.pending and timer.slack_us > LOG_SLACK_US:
+            log.drain(bb.write, 1)
+
+    if prof:
+        status = prof.wrap('status', status)
+        events = prof.wrap('events', events)
+
+    def telemetry():
+        status()
+        if rec:
+            rec.flush()
+
+    sched = scheduler(LOOP_FREQ)
+    # absolute deadlines: the period stays fixed however long the tasks take
+    if timer is None:
+        timer = loop_timer(sched.period_us)
+    _control_tasks(sched, timer, imu, flight_ctr, motors, frame,
+                   fixed_point, att, bb.update_latency, rc_update, prof, mode)
+    if rec: # after the motor update of the tick
+        def record():
+            rec.record(timer.dt_us, mode.state)
+        sched.add('record', record, LOOP_FREQ)
+    sched.add('telemetry', telemetry, TELEMETRY_FREQ, phase=3)
+    if flight_ctr.log: # last, in what is left of the tick
+        sched.add('events', events, LOOP_FREQ)
+
+    mode.arm()
+    timer.start()
+    try:
+        while not mode.disarmed and (ticks==0 or sched.ticks<ticks):
+            sched.tick()
+            if imu.drdy: # paced by the sample rate
+                timer.lap()
+            else:
+                timer.wait()
+    finally: # also on ctrl-c
+        bb.write('')
+        bb.write('    mode: '+mode.name)
+        sched.report(bb.write)
+        timer.report(bb.write)
+        rc.report(bb.write)
+        if failsafe:
+            failsafe.report(bb.write)
+        if flight_ctr.log:
+            flight_ctr.log.drain(bb.write)
+            bb.write('    events dropped: '+str(flight_ctr.log.dropped))
+        if prof:
+            prof.report(bb.write)
+        if rec:
+            rec.flush()
+            bb.write('    records: '+str(rec.records)+', dropped: '+str(rec.dropped))
+    return sched, timer
+
+
+### entering the main loop, on both cores
+# core 1 runs the IMU read, the controller and the motor update on a fixed
+# period; core 0 samples the sticks and owns the console and the log file,
+# fed through a record_ring so a slow flash write never delays the motors.
+# ticks: stop after that many control ticks and return the scheduler, the
+# loop timer and the ring of core 1, 0 runs until the flight mode is disarmed
+# prof: a profiler timing the stages of core 1, reported with its loop timing
+# mode: the flight_mode, stepped on core 1; land() and disarm() may be called
+# from core 0 or an interrupt
+# failsafe: an rc_failsafe checked on core 0 after every rc update
+def dual_core_loop(imu, rc, flight_ctr, motors, bb, fixed_point=False, att=None, ticks=0, prof=None,
+                   mode=None, failsafe=None):
+    import _thread
+    from array import array
+    from scheduler import scheduler
+    from loop_timer import loop_timer
+    from record_ring import record_ring
+    from flight_mode import flight_mode
+
+    frame = SensorFrame()   # core 1
+    flight_ctr.frame = frame
+    # rc.norm is written by core 0 and read by the controller on core 1,
+    # one word at a time
+    flight_ctr.rc = rc
+    # the controller's event log is recorded on core 1 and drained on core 0
+    outputs = flight_ctr.outputs
+    n = len(motors)
+    W = SensorFrame.RECORD_SIZE
+    ring = record_ring(32, W + 2 + n) # frame, dt, latency, outputs
+    state = array('i', [1, 0, 0]) # run, core 1 done, latency (us)
+    errors = []
+    if mode is None: # no console on core 1, the mode is reported on exit
+        mode = flight_mode(flight_ctr, motors, LOOP_FREQ, arm_seconds=0)
+
+    def update_latency(us):
+        state[2] = us
+
+    def record():
+        i = ring.write_slot()
+        if i < 0: # core 0 is behind, the record is counted as dropped
+            return
+        buf = ring.buf
+        frame.pack(buf, i)
+        buf[i+W] = timer.dt_us
+        buf[i+W+1] = state[2]
+        for j in range(n):
+            buf[i+W+2+j] = outputs[j]
+        ring.publish()
+
+    sched = scheduler(LOOP_FREQ)
+    timer = loop_timer(sched.period_us)
+    _control_tasks(sched, timer, imu, flight_ctr, motors, frame,
+                   fixed_point, att, update_latency, prof=prof, mode=mode)
+    sched.add('record', record, RECORD_FREQ)
+
+    def core1():
+        try:
+            mode.arm()
+            timer.start()
+            while state[0] and not mode.disarmed and (ticks==0 or sched.ticks<ticks):
+                sched.tick()
+                if imu.drdy:
+                    timer.lap()
+                else:
+                    timer.wait()
+        except Exception as e:
+            # stop the motors, core 0 raises it again
+            for j in range(n):
+                motors[j].duty(flight_ctr.m_ranges[j][2])
+            errors.append(e)
+        state[1] = 1
+
+    # core 0: the sticks at RC_FREQ, every record into bb, the status line
+    # at TELEMETRY_FREQ
+    view = SensorFrame()
+    view_outputs = array('i', [0]*n)
+    rc_timer = loop_timer(1000000//RC_FREQ)
+    status_div = RC_FREQ//TELEMETRY_FREQ
+    count = 0
+    _thread.start_new_thread(core1, ())
+    rc_timer.start()
+    try:
+        while not state[1]:
+            rc.update()
+            if failsafe:
+                failsafe.check()
+            i = ring.read_slot()
+            while i >= 0:
+                buf = ring.buf
+                view.unpack(buf, i)
+                bb.update_latency(buf[i+W+1])
+                for j in range(n):
+                    view_outputs[j] = buf[i+W+2+j]
+                ring.release()
+                bb.update(view, view_outputs)
+                i = ring.read_slot()
+            if count%status_div == 0:
+                bb.show_status(view, view_outputs)
+            if flight_ctr.log:
+                flight_ctr.log.drain(bb.write, LOG_LINES)
+            if count and count%(RC_FREQ*REPORT_SECONDS) == 0:
+                bb.write('')
+                timer.report(bb.write)
+                if prof:
+                    prof.report(bb.write)
+            count += 1
+            rc_timer.wait()
+    finally:
+        state[0] = 0
+        while not state[1]:
+            rc_timer.wait()
+    bb.write('')
+    bb.write('    mode: '+mode.name)
+    sched.report(bb.write)
+    timer.report(bb.write)
+    rc.report(bb.write)
+    if failsafe:
+        failsafe.report(bb.write)
+    bb.write('    records dropped: '+str(ring.dropped))
+    if flight_ctr.log:
+        flight_ctr.log.drain(bb.write)
+        bb.write('    events dropped: '+str(flight_ctr.log.dropped))
+    if prof:
+        prof.report(bb.write)
+    if errors:
+        raise errors[0]
+    return sched, timer, ring
@@ -30,6 +30,7 @@ SOFTWARE.
 class flight_data():
     def __init__(self, b_debug=False):
         self._acc_sum_prop = [0, 15000, 0] # now, min, max
+        self._latency_prop = [0, 0] # now, max, in us from IMU sample to motor update
         self._b_debug = b_debug
         if b_debug:
             self._fd = open('data.txt', 'w')
@@ -41,16 +42,22 @@ class flight_data():
                 self._fd.write(msg+'\n')
                 self._fd.flush()
 
-    def update(self, acc_vals, gyro_vals, tem, m0, m1, m2, m3):
-        acc_sum = int(acc_vals[0]*100)**2+int(acc_vals[1]*100)**2+int(acc_vals[2]*100)**2
+    # frame: the loop's SensorFrame, centi-g, centi-degrees/s and centi-C
+    # outputs: the pwm value of every motor
+    def update(self, frame, outputs):
+        acc_sum = frame.acc_sum
         self._acc_sum_prop[0] = acc_sum
         if self._acc_sum_prop[1] > acc_sum:
             self._acc_sum_prop[1] = acc_sum
         if self._acc_sum_prop[2] < acc_sum:
             self._acc_sum_prop[2] = acc_sum
 
+    def update_latency(self, latency_us):
+        self._latency_prop[0] = latency_us
+        if self._latency_prop[1] < latency_us:
+            self._latency_prop[1] = latency_us
 
-    def show_status(self, acc_vals, gyro_vals, tem, m0, m1, m2, m3, indent=4):
+    def show_status(self, frame, outputs, indent=4):
         if not self._b_debug:
             return
         msg = ''
@@ -59,27 +66,22 @@ class flight_data():
         acc_keys = ['ax:',' ay:',' az:']
         for i in range(3):
             msg += acc_keys[i]
-            val = int(acc_vals[i]*100)
+            val = frame.acc[i]
             if val>=0:
                 msg += ' '
             msg += str(val)
         gyro_keys = [' gx:',' gy:',' gz:']
         for i in range(3):
             msg += gyro_keys[i]
-            val = int(gyro_vals[i])
+            val = frame.gyro[i]//100
             if val>=0:
                 msg += ' '
             msg += str(val)
         msg += ' tem:'
-        msg += str(int(tem))
-        msg += ' m0:'
-        msg += str(m0)
-        msg += ' m1:'
-        msg += str(m1)
-        msg += ' m2:'
-        msg += str(m2)
-        msg += ' m3:'
-        msg += str(m3)
+        msg += str(frame.tem//100)
+        for i in range(len(outputs)):
+            msg += ' m'+str(i)+':'
+            msg += str(outputs[i])
 
         acc_sum_keys = [' acc sum:',' min:',' max:']
         for i in range(3):
@@ -89,5 +91,10 @@ class flight_data():
                 msg += ' '
             msg += str(val)
 
+        msg += ' lat:'
+        msg += str(self._latency_prop[0])
+        msg += ' max:'
+        msg += str(self._latency_prop[1])
+
         msg += '        '
         self.write(msg, end='\r')
\ No newline at end of file
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# flight modes stepped by the main loop one tick at a time:
+# arming -> flying -> landing -> disarmed
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_us
+from rc_input import RCInput
+
+ARMING = 0
+FLYING = 1
+LANDING = 2
+DISARMED = 3
+MODE_NAMES = ('arming', 'flying', 'landing', 'disarmed')
+
+_LAND = 0           # requests
+_DISARM = 1
+_RESUME = 2
+
+class flight_mode():
+    # flight_ctr, motors: as the main loop runs them
+    # hz: the rate step() is called at, LOOP_FREQ
+    # arm_seconds: before the controller takes over, the motors wind down
+    # from where they were left (e.g. by acc_sum_escape_g) to min over the
+    # first half and are held at min for the rest; 0 starts flying at once
+    # land_seconds: the longest descent before the motors are stopped anyway
+    # land_throttle: the throttle stick while landing, -1.0 at min, 0 at mid;
+    # joystick_2 steps the throttle by 100*land_throttle at 10Hz and
+    # fall_protect steps it back up while falling
+    # write: where transitions are reported, e.g. bb.write
+    def __init__(self, flight_ctr, motors, hz, arm_seconds=2, land_seconds=50,
+                 land_throttle=-0.02, write=None):
+        self._fc = flight_ctr
+        self._motors = motors
+        self.arm_seconds = arm_seconds # as given, see flight_recorder
+        self.land_seconds = land_seconds
+        self.land_throttle = land_throttle
+        self._arm_ticks = int(arm_seconds*hz)
+        self._land_ticks = int(land_seconds*hz)
+        self._ramp_ticks = self._arm_ticks//2
+        self._debounce = hz//2
+        self._write = write
+        # state, ticks in the state, a disarm held for the end of the
+        # debounce, a landing started by land()
+        self._s = array('i', [DISARMED, 0, 0, 0])
+        # requests posted by a switch interrupt or the other core and taken
+        # by step(): each side only writes its own counter, so a request
+        # posted while step() reads is taken on the next tick instead of
+        # being lost, and different requests do not overwrite each other
+        self._posted = array('i', [0, 0, 0])
+        self._taken = array('i', [0, 0, 0])
+        self._t = array('i', [0]*4) # ticks_us() entering each mode
+        self._from = array('i', [0]*len(motors)) # outputs when arming started
+        self._rc = None # the loop's stage, swapped back on disarming
+        # filled once, switched in by reference when the landing starts:
+        # roll and pitch centred, the throttle a little below mid
+        st_range = flight_ctr.rc.st_range
+        sticks = [st_range[i][1] for i in range(len(st_range))]
+        st_min, st_mid, st_max = st_range[2]
+        sticks[2] = st_mid + land_throttle*(st_mid-st_min)
+        self._land_rc = RCInput(None, st_range)
+        for i in range(11): # the whole moving average, q_size+1
+            self._land_rc.set(sticks)
+
+    @property
+    def state(self):
+        return self._s[0]
+
+    @property
+    def name(self):
+        return MODE_NAMES[self._s[0]]
+
+    # the controller and the motors are driven by the loop
+    @property
+    def active(self):
+        s = self._s[0]
+        return s == FLYING or s == LANDING
+
+    @property
+    def disarmed(self):
+        return self._s[0] == DISARMED
+
+    def entered(self, state):
+        # ticks_us() when state was last entered
+        return self._t[state]
+
+    def arm(self):
+        # by the loop, before its first tick; the mode starts disarmed and
+        # the motors keep their duty until then. Without an arming time the
+        # controller goes on from the outputs it has, the PIDs restarted.
+        if self._s[0] != DISARMED:
+            return
+        for i in range(len(self._taken)): # nothing posted before counts
+            self._taken[i] = self._posted[i]
+        if self._arm_ticks:
+            self._enter(ARMING)
+        else:
+            self._fc.reset(outputs=False)
+            self._enter(FLYING)
+
+    def land(self):
+        # start a controlled descent, e.g. on a failsafe; taken up by the
+        # next step()
+        self._posted[_LAND] += 1
+
+    def resume(self):
+        # back to flying from a landing started by land(), e.g. when the
+        # signal is back; a landing the disarm switch started goes on
+        self._posted[_RESUME] += 1
+
+    def disarm(self):
+        # the disarm switch: lands when flying, stops the motors when
+        # arming or, pressed again, landing; a press within the first half
+        # second of the landing is held until the half second is up
+        self._posted[_DISARM] += 1
+
+    def step(self):
+        s = self._s
+        state = s[0]
+        s[1] += 1
+        # the disarm switch first: a press and a failsafe landing in the
+        # same tick land without a held disarm
+        if self._take(_DISARM):
+            if s[0] == FLYING:
+                self._enter(LANDING)
+            elif s[0] == ARMING:
+                self._enter(DISARMED)
+            elif s[0] == LANDING:
+                s[2] = 1
+        if self._take(_LAND):
+            if s[0] == FLYING:
+                self._enter(LANDING)
+                s[3] = 1
+            elif s[0] == ARMING:
+                self._enter(DISARMED)
+        if self._take(_RESUME):
+            if s[0] == LANDING and s[3] and not s[2]:
+                self._enter(FLYING)
+        if s[0] != state:
+            return
+        if state == ARMING:
+            if s[1] > self._arm_ticks:
+                self._enter(FLYING)
+            elif s[1] <= self._ramp_ticks:
+                self._ramp(self._ramp_ticks - s[1])
+        elif state == LANDING:
+            if ((s[2] and s[1] > self._debounce) or
+                    self._fc.idle or s[1] > self._land_ticks):
+                self._enter(DISARMED)
+
+    def _take(self, i):
+        # whether request i was posted since it was last taken; only
+        # step() and arm() write _taken
+        n = self._posted[i]
+        if n == self._taken[i]:
+            return False
+        self._taken[i] = n
+        return True
+
+    def _enter(self, state):
+        fc = self._fc
+        if state == ARMING:
+            out = fc.outputs
+            for j in range(len(self._from)):
+                self._from[j] = out[j]
+            fc.reset()
+            if not self._ramp_ticks:
+                self._duty(0)
+        elif state == LANDING:
+            self._rc = fc.rc
+            fc.rc = self._land_rc
+        else: # the loop's stage back
+            if self._rc:
+                fc.rc = self._rc
+                self._rc = None
+        if state == DISARMED:
+            fc.reset()
+            self._duty(2)
+        s = self._s
+        s[0] = state
+        s[1] = 0
+        s[2] = 0
+        s[3] = 0
+        self._t[state] = ticks_us()
+        if self._write:
+            self._write('    mode: '+MODE_NAMES[state])
+
+    def _ramp(self, k):
+        # k ramp ticks left: from the outputs arming started with to min
+        m_ranges = self._fc.m_ranges
+        f = self._from
+        n = self._ramp_ticks
+        for j in range(len(self._motors)):
+            lo = m_ranges[j][0]
+            self._motors[j].duty(lo + (f[j]-lo)*k//n)
+
+    def _duty(self, k):
+        # every motor to its min (0) or init (2) duty
+        m_ranges = self._fc.m_ranges
+        for j in range(len(self._motors)):
+            self._motors[j].duty(m_ranges[j][k])
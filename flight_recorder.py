@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# binary flight recording: the raw IMU burst, the stick samples and the motor
+# outputs of every loop tick, replayed on the host by host/replay.py
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from struct import pack, pack_into, unpack_from, calcsize
+from utime import ticks_ms, ticks_diff
+
+MAGIC = b'PDRC'
+VERSION = 3
+# magic, version, sticks, motors, flags, loop Hz, record size,
+# based_acc_sum, es_acc_sum, accel and gyro calibration (sensor axes);
+# followed by min, mid, max per stick and min, max, init, limit per motor
+HEADER = '<4sBBBBHHii6f'
+# the control law: m_val_cr, angle_kp and a bit for each of the roll,
+# pitch and yaw rate PIDs; followed by the layout row per motor and the
+# PID_GAINS of every PID there is
+CONTROL = '<2dB'
+PID_GAINS = ('kp', 'ki', 'kd', 'kff', 'out_min', 'out_max', 'i_limit', 'd_cutoff')
+# the state the loop starts from: the flight_mode's arm_seconds,
+# land_seconds and land_throttle, the rc_failsafe's hold_ms, disarm_ms and
+# recover_ms; followed by the ms since the last sample per stick and the
+# mixer outputs and base per motor
+START = '<3d3I'
+HAS_MODE = 1                # flags
+HAS_FAILSAFE = 2
+COMPILED = 4                # flight_ctr.compile() had run
+TICKS_MASK = 0x3fffffff     # ticks_us() wraps at 2**30
+
+
+def record_size(n_sticks, n_motors):
+    # ticks, the 14 byte MPU-6050 burst, the raw sticks, the channels
+    # sampled by the last rc update, the flight mode, the loop dt (us) the
+    # controller had, the motor outputs
+    return 4 + 14 + 4*n_sticks + 1 + 1 + 4 + 2*n_motors
+
+
+class flight_recorder():
+    # f: a file opened 'wb', the header is written at once
+    # loop_hz: the rate record() is called at, LOOP_FREQ
+    # block: records kept in RAM until flush(), which main_loop calls from
+    # the telemetry task; records beyond it are counted as dropped
+    # mode, failsafe: as given to main_loop; made right before it, the
+    # header holds the state the loop starts from
+    def __init__(self, f, imu, rc, flight_ctr, loop_hz, block=64, mode=None, failsafe=None):
+        self._f = f
+        self._imu = imu
+        self._rc = rc
+        self._raw = rc.raw
+        self._outputs = flight_ctr.outputs
+        n_sticks = len(rc.st_range)
+        n = len(self._outputs)
+        self._size = record_size(n_sticks, n)
+        self._block = bytearray(self._size*block)
+        self._mv = memoryview(self._block)
+        self._capacity = block
+        # the frame bytes of every record in the block, sliced once
+        self._frames = [self._mv[i*self._size+4:i*self._size+18] for i in range(block)]
+        self._count = 0     # records in the block
+        self._records = 0   # records written to f
+        self._dropped = 0
+        cal = tuple(imu.accel.cal) + tuple(imu.gyro.cal)
+        flags = 0
+        if mode:
+            flags |= HAS_MODE
+        if failsafe:
+            flags |= HAS_FAILSAFE
+        if flight_ctr.compiled:
+            flags |= COMPILED
+        f.write(pack(HEADER, MAGIC, VERSION, n_sticks, n, flags, loop_hz, self._size,
+                     flight_ctr.based_acc_sum, flight_ctr.es_acc_sum, *cal))
+        for st in rc.st_range:
+            f.write(pack('<3H', *st))
+        for m in flight_ctr.m_ranges:
+            f.write(pack('<4H', *m))
+        pids = flight_ctr.pids or ()
+        has = 0
+        for j in range(len(pids)):
+            if pids[j]:
+                has |= 1 << j
+        mixer = flight_ctr.mixer
+        f.write(pack(CONTROL, mixer.m_val_cr, flight_ctr.angle_kp, has))
+        for row in mixer.layout:
+            f.write(pack('<4d', *row))
+        for pid in pids:
+            if pid:
+                f.write(pack('<8d', *[getattr(pid, g) for g in PID_GAINS]))
+        m = (mode.arm_seconds, mode.land_seconds, mode.land_throttle) if mode else (0, 0, 0)
+        fs = (failsafe.hold_ms, failsafe.disarm_ms, failsafe.recover_ms) if failsafe else (0, 0, 0)
+        f.write(pack(START, *(m + fs)))
+        now = ticks_ms()
+        for t in rc.ticks:
+            f.write(pack('<I', ticks_diff(now, t)))
+        base = flight_ctr.mixer.base
+        for j in range(n):
+            f.write(pack('<2H', self._outputs[j], base[j]))
+
+    @property
+    def records(self):
+        return self._records + self._count
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def record(self, dt_us, mode):
+        # one tick, after the motor update, into the block allocated up
+        # front; on MicroPython the float sticks read from rc.raw are the
+        # only values boxed
+        # dt_us: the loop dt the controller had, mode: the flight mode
+        i = self._count
+        if i >= self._capacity:
+            self._dropped += 1
+            return
+        buf = self._block
+        o = i*self._size
+        pack_into('<I', buf, o, self._imu.frame_ticks & TICKS_MASK)
+        self._frames[i][:] = self._imu.buf14
+        o += 18
+        raw = self._raw
+        for j in range(len(raw)):
+            pack_into('<f', buf, o, raw[j])
+            o += 4
+        buf[o] = self._rc.fresh
+        buf[o+1] = mode
+        pack_into('<I', buf, o+2, dt_us)
+        o += 6
+        outputs = self._outputs
+        for j in range(len(outputs)):
+            pack_into('<H', buf, o, outputs[j])
+            o += 2
+        self._count = i+1
+
+    def flush(self):
+        n = self._count
+        if n:
+            self._f.write(self._mv[:n*self._size])
+            self._records += n
+            self._count = 0
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+
+def read_recording(f):
+    # the header as a dict and a list of (ticks, frame, sticks, outputs,
+    # fresh, mode, dt_us) per tick; a record cut short by a power loss is
+    # left out
+    data = f.read()
+    h = unpack_from(HEADER, data, 0)
+    if h[0] != MAGIC or h[1] != VERSION:
+        raise ValueError('not a PicoDrone recording')
+    n_sticks, n, flags, loop_hz, size = h[2], h[3], h[4], h[5], h[6]
+    o = calcsize(HEADER)
+    st_range = []
+    for i in range(n_sticks):
+        st_range.append(list(unpack_from('<3H', data, o)))
+        o += 6
+    m_ranges = []
+    for i in range(n):
+        m_ranges.append(list(unpack_from('<4H', data, o)))
+        o += 8
+    m_val_cr, angle_kp, has = unpack_from(CONTROL, data, o)
+    o += calcsize(CONTROL)
+    layout = []
+    for i in range(n):
+        layout.append(unpack_from('<4d', data, o))
+        o += 32
+    pids = None
+    if has:
+        pids = []
+        for j in range(3):
+            pid = None
+            if has & (1 << j):
+                pid = dict(zip(PID_GAINS, unpack_from('<8d', data, o)))
+                o += 64
+            pids.append(pid)
+    s = unpack_from(START, data, o)
+    o += calcsize(START)
+    lost = list(unpack_from('<'+str(n_sticks)+'I', data, o))
+    o += 4*n_sticks
+    start = unpack_from('<'+str(2*n)+'H', data, o)
+    o += 4*n
+    header = {'sticks': n_sticks, 'motors': n, 'loop_hz': loop_hz,
+              'based_acc_sum': h[7], 'es_acc_sum': h[8],
+              'accel_cal': h[9:12], 'gyro_cal': h[12:15],
+              'st_range': st_range, 'm_ranges': m_ranges,
+              'control': {'layout': layout, 'm_val_cr': m_val_cr, 'angle_kp': angle_kp,
+                          'pids': pids, 'compiled': bool(flags & COMPILED)},
+              'mode': None, 'failsafe': None, 'lost_ms': lost,
+              'outputs': list(start[0::2]), 'base': list(start[1::2])}
+    if flags & HAS_MODE:
+        header['mode'] = {'arm_seconds': s[0], 'land_seconds': s[1], 'land_throttle': s[2]}
+    if flags & HAS_FAILSAFE:
+        header['failsafe'] = {'hold_ms': s[3], 'disarm_ms': s[4], 'recover_ms': s[5]}
+    fmt = '<I14s' + str(n_sticks) + 'fBBI' + str(n) + 'H'
+    records = []
+    while o + size <= len(data):
+        r = unpack_from(fmt, data, o)
+        k = 2+n_sticks
+        records.append((r[0], r[1], r[2:k], r[k+3:], r[k], r[k+1], r[k+2]))
+        o += size
+    return header, records
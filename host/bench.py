@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# micro-benchmarks of the flight path hot spots, under CPython or the
+# MicroPython unix port, with JSON results and a baseline comparison
+#
+#     python3 bench.py [-o results.json] [-b baseline.json] [-t 0.1] [-n calls] [name ...]
+#     python3 bench.py --self-check [name ...]
+#     micropython bench.py ...
+#
+# -o writes the results, -b compares them with a stored result file and
+# exits with 1 when a benchmark's median is slower by more than -t (10%)
+# or, on a noisy host, by more than the spread of its runs;
+# --self-check runs twice on the same tree and exits with 1 when that
+# reports a regression
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import sys
+import json
+from math import sqrt
+from array import array
+from utime import ticks_us, ticks_diff
+from fake_i2c import validate_result
+
+RUN_US = 20000  # calls per run are sized to take about that long
+REPEAT = 31     # runs per benchmark, the median counts
+THRESHOLD = 0.1
+NOISE = 4       # standard errors of a median allowed for, see compare()
+SHIFT_MIN = 5   # benchmarks needed to tell a slower host, see compare()
+
+ST_RANGE = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+M_RANGES = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+            [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+
+
+def size_run(func, run_us=RUN_US):
+    # calls of func taking about run_us
+    n = 10
+    while True:
+        t0 = ticks_us()
+        for _ in range(n):
+            func()
+        us = ticks_diff(ticks_us(), t0)
+        if us >= run_us//10:
+            return max(1, int(n*run_us/us))
+        n *= 10
+
+
+def timeit(func, n):
+    # us per call over n calls
+    t0 = ticks_us()
+    for _ in range(n):
+        func()
+    return ticks_diff(ticks_us(), t0)/n
+
+
+def _imu():
+    from fake_i2c import FakeI2C
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(8192, -4096, 16384, -340, 262, 131, -655)
+    return imu
+
+
+def bench_bytes_toint():
+    from imu import bytes_toint
+    return lambda: bytes_toint(0xf3, 0x21)
+
+
+def bench_accel_callback():
+    return _imu()._accel_callback
+
+
+def bench_vector3d_xyz():
+    acc = _imu().accel
+    return lambda: acc.xyz
+
+
+def bench_frame_decode():
+    from sensor_frame import SensorFrame
+    imu = _imu()
+    imu.read_frame()
+    frame = SensorFrame()
+    return lambda: frame.decode(imu)
+
+
+def bench_update_val():
+    from moving_average import moving_average
+    avg = moving_average(11)
+    return lambda: avg.update_val(5000)
+
+
+def bench_abs_scale():
+    from state_machine import R8EF_channel, mark
+    return R8EF_channel(0, mark).abs_scale
+
+
+def bench_poll():
+    from state_machine import R8EF_channel, mark
+    return R8EF_channel(0, mark).poll
+
+
+def bench_rc_update():
+    # the rc task: a word in every FIFO, filtered and stamped
+    from state_machine import R8EF_channel, mark
+    from rc_input import RCInput
+    rc = RCInput([R8EF_channel(i, mark) for i in range(3)], ST_RANGE)
+    return rc.update
+
+
+def _flight_ctr(pids, compiled):
+    from flight_controller import flight_ctr
+    from sensor_frame import SensorFrame
+    from pid import PID
+    if pids:
+        pids = (PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+                PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+                PID(0.2, 0.0, 0.0, out_min=-25, out_max=25))
+    fc = flight_ctr('fc', ST_RANGE, M_RANGES, pids=pids)
+    fc.based_acc_sum = 10000
+    fc.es_acc_sum = 10300
+    if compiled:
+        fc.compile()
+    # level, sticks and acc sum at rest: every call does the same work, the
+    # outputs do not run into their limits
+    frame = SensorFrame()
+    frame.set_acc_c([0, 0, 100])
+    frame.set_gyro_c([120, -80, 15])
+    frame.set_att([1.5, -0.8, 0.2])
+    fc.frame = frame
+    fc.rc.set([st[1] for st in ST_RANGE])
+    return fc
+
+
+def bench_motor_pwn_values():
+    fc = _flight_ctr(False, False)
+    return fc.motor_pwn_values
+
+
+def bench_motor_pwn_values_c():
+    fc = _flight_ctr(False, True)
+    return fc.motor_pwn_values
+
+
+def bench_motor_pwn_values_pid():
+    fc = _flight_ctr(True, False)
+    return lambda: fc.motor_pwn_values(throttle=False, dt=0.002)
+
+
+def bench_motor_pwn_values_pid_c():
+    fc = _flight_ctr(True, True)
+    return lambda: fc.motor_pwn_values(throttle=False, dt=0.002)
+
+
+def bench_pid_update():
+    from pid import PID
+    pid = PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20)
+    return lambda: pid.update(-6.0, 1.2, 0.002)
+
+
+def bench_attitude_update():
+    from attitude import attitude
+    att = attitude(gyro_scale=0.01)
+    acc = array('i', [3, -4, 99])
+    gyro = array('i', [120, -80, 15])
+    t = [0]
+    def update():
+        t[0] += 2000
+        att.update(acc, gyro, t[0])
+    return update
+
+
+def bench_show_status():
+    # the status line is formatted, not printed
+    from flight_data import flight_data
+    from sensor_frame import SensorFrame
+    bb = flight_data()
+    bb._b_debug = True
+    bb.write = lambda msg, end='\n': None
+    frame = SensorFrame()
+    frame.set_acc_c([3, -4, 99])
+    frame.set_gyro_c([120, -80, 15])
+    outputs = array('i', [1200, 1300, 1400, 4200])
+    bb.update(frame, outputs)
+    return lambda: bb.show_status(frame, outputs)
+
+
+# name, setup returning the function timed
+BENCHMARKS = (
+    ('imu.bytes_toint', bench_bytes_toint),
+    ('MPU6050._accel_callback', bench_accel_callback),
+    ('Vector3d.xyz', bench_vector3d_xyz),
+    ('SensorFrame.decode', bench_frame_decode),
+    ('moving_average.update_val', bench_update_val),
+    ('R8EF_channel.abs_scale', bench_abs_scale),
+    ('R8EF_channel.poll', bench_poll),
+    ('RCInput.update', bench_rc_update),
+    ('flight_ctr.motor_pwn_values', bench_motor_pwn_values),
+    ('flight_ctr.motor_pwn_values compiled', bench_motor_pwn_values_c),
+    ('flight_ctr.motor_pwn_values pids', bench_motor_pwn_values_pid),
+    ('flight_ctr.motor_pwn_values pids compiled', bench_motor_pwn_values_pid_c),
+    ('PID.update', bench_pid_update),
+    ('attitude.update', bench_attitude_update),
+    ('flight_data.show_status', bench_show_status),
+)
+
+
+def run(names=None, n=0, repeat=REPEAT):
+    # names: run the benchmarks whose name contains one of them, None all
+    # n: calls per run, 0 sizes the runs, see size_run()
+    # the runs go round all benchmarks repeat times, so a slow spell of the
+    # host costs every benchmark a run or two and the median stays put
+    funcs = []
+    for name, setup in BENCHMARKS:
+        if names and not any(s in name for s in names):
+            continue
+        func = setup()
+        funcs.append((name, func, n or size_run(func)))
+    runs = {}
+    for name, func, calls in funcs:
+        runs[name] = []
+    for r in range(repeat):
+        for name, func, calls in funcs:
+            runs[name].append(timeit(func, calls))
+    results = {}
+    print('    {:<44} {:>10} {:>10} {:>10} {:>7}'.format('us/call', 'best', 'median', 'worst', 'noise'))
+    for name, func, calls in funcs:
+        us = sorted(runs[name])
+        k = len(us)
+        median = us[k//2]
+        # the interquartile range relative to the median
+        noise = (us[(3*k)//4] - us[k//4])/median if median else 0.0
+        results[name] = {'us': round(us[0], 3), 'median_us': round(median, 3),
+                         'worst_us': round(us[-1], 3), 'noise': round(noise, 4), 'calls': calls}
+        print('    {:<44} {:>10.2f} {:>10.2f} {:>10.2f} {:>6.0f}%'.format(
+              name, us[0], median, us[-1], noise*100))
+    return {'implementation': sys.implementation.name,
+            'version': '.'.join(str(v) for v in sys.implementation.version[:3]),
+            'platform': sys.platform,
+            'repeat': repeat,
+            'results': results}
+
+
+def _median(r):
+    # result files from before the median was kept have the best run only
+    return r.get('median_us', r['us'])
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    # the names whose median is slower than baseline by more than threshold
+    # and by more than NOISE times the error of the noisier median, about
+    # its interquartile range over sqrt(repeat), so the spread of a busy
+    # host is not taken for a regression. With SHIFT_MIN benchmarks or
+    # more, the medians are first scaled by the median ratio of all of
+    # them: a host slower as a whole in one run shifts every benchmark,
+    # a regression only its own. A change slowing every path alike goes
+    # unnoticed that way. Both should come from the same host.
+    if baseline.get('implementation') != current.get('implementation'):
+        print('    baseline ran on '+str(baseline.get('implementation'))+', now on '+str(current.get('implementation')))
+    base = baseline['results']
+    now = current['results']
+    rb = sqrt(baseline.get('repeat', REPEAT))
+    rn = sqrt(current.get('repeat', REPEAT))
+    ratios = sorted(_median(now[name])/_median(base[name])
+                    for name in now if name in base and _median(base[name]))
+    scale = 1.0
+    if len(ratios) >= SHIFT_MIN:
+        scale = ratios[len(ratios)//2]
+        print('    host {:+.0f}% against the baseline, the medians are scaled by it'.format((scale-1)*100))
+    regressions = []
+    print('    {:<44} {:>10} {:>10} {:>8} {:>7}'.format('us/call (median)', 'baseline', 'now', 'change', 'limit'))
+    for name, r in now.items():
+        if name not in base:
+            print('    {:<44} {:>10} {:>10.2f}'.format(name, '-', _median(r)))
+            continue
+        b = _median(base[name])
+        change = (_median(r)/scale - b)/b if b else 0.0
+        limit = max(threshold, NOISE*max(base[name].get('noise', 0.0)/rb, r.get('noise', 0.0)/rn))
+        flag = ''
+        if change > limit:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -limit:
+            flag = '  faster'
+        print('    {:<44} {:>10.2f} {:>10.2f} {:>+7.0f}% {:>6.0f}%{}'.format(
+              name, b, _median(r), change*100, limit*100, flag))
+    return regressions
+
+
+def self_check(names=None, n=0, threshold=THRESHOLD):
+    # the same tree twice: whatever compare() reports is noise
+    first = run(names, n)
+    second = run(names, n)
+    regressions = compare(first, second, threshold)
+    print('    self check: '+str(len(regressions))+' regression(s) on the same tree')
+    return regressions
+
+
+def test_compare():
+    base = {'implementation': 'cpython', 'results': {'a': {'us': 10.0}, 'b': {'us': 10.0}, 'c': {'us': 10.0}}}
+    now = {'implementation': 'cpython', 'results': {'a': {'us': 10.5}, 'b': {'us': 12.0}, 'c': {'us': 5.0}, 'd': {'us': 1.0}}}
+    validate_result(['b'], compare(base, now))
+    validate_result([], compare(base, now, threshold=0.5))
+    # medians are compared when there are; a spread of 50% over 25 runs
+    # allows 40%
+    base['repeat'] = now['repeat'] = 25
+    base['results']['b'] = {'us': 10.0, 'median_us': 10.0, 'noise': 0.5}
+    now['results']['b'] = {'us': 9.0, 'median_us': 13.5, 'noise': 0.3}
+    validate_result([], compare(base, now))
+    now['results']['b']['median_us'] = 14.5
+    validate_result(['b'], compare(base, now))
+    # on a host half as fast, only b was slowed by more than that
+    for name in 'efgh':
+        base['results'][name] = {'us': 1.0}
+        now['results'][name] = {'us': 2.0}
+    now['results']['a']['us'] = 21.0
+    now['results']['b']['median_us'] = 29.0
+    validate_result(['b'], compare(base, now))
+
+
+def main(argv):
+    out = base = None
+    check = False
+    threshold = THRESHOLD
+    n = 0
+    names = []
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in ('-o', '-b', '-t', '-n'):
+            i += 1
+            if a == '-o':
+                out = argv[i]
+            elif a == '-b':
+                base = argv[i]
+            elif a == '-t':
+                threshold = float(argv[i])
+            else:
+                n = int(argv[i])
+        elif a == '--test':
+            test_compare()
+            return 0
+        elif a == '--self-check':
+            check = True
+        else:
+            names.append(a)
+        i += 1
+    if check:
+        return 1 if self_check(names, n, threshold) else 0
+    current = run(names, n)
+    if out:
+        with open(out, 'w') as f:
+            json.dump(current, f)
+    if base:
+        with open(base) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, threshold)
+        if regressions:
+            print('    '+str(len(regressions))+' regression(s) past their limit')
+            return 1
+    return 0
+
+
+if __name__=='__main__':
+    import os
+    if hasattr(os, 'path'):
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    else: # MicroPython unix port, run from host/
+        sys.path.append('..')
+    sys.exit(main(sys.argv[1:]))
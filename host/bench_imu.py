@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# Micro-benchmark of IMU frame decoding: bytes_toint + Vector3d.xyz
+# against decode_frame(). Runs on the fake I2C bus.
+#
+#     cd host && python3 bench_imu.py
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_us, ticks_diff
+
+N = 10000
+
+
+def timeit(name, func, n=N):
+    t0 = ticks_us()
+    for _ in range(n):
+        func()
+    us = ticks_diff(ticks_us(), t0)
+    print('    {:<40} {:>8.2f} us/call'.format(name, us/n))
+    return us/n
+
+
+def bench_decode():
+    from fake_i2c import FakeI2C
+    from imu import MPU6050, bytes_toint, decode_frame
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(8192, -4096, 16384, -340, 262, 131, -655)
+    imu.read_all()
+    buf = imu.buf14
+    acc = imu.accel
+    gyro = imu.gyro
+    out = array('f', [0]*7)
+    coef = imu._coefficients()
+    index = imu._frame_index
+
+    def old_decode():
+        acc._ivector[0] = bytes_toint(buf[0], buf[1])
+        acc._ivector[1] = bytes_toint(buf[2], buf[3])
+        acc._ivector[2] = bytes_toint(buf[4], buf[5])
+        bytes_toint(buf[6], buf[7])/340 + 35
+        gyro._ivector[0] = bytes_toint(buf[8], buf[9])
+        gyro._ivector[1] = bytes_toint(buf[10], buf[11])
+        gyro._ivector[2] = bytes_toint(buf[12], buf[13])
+        for i in range(3):
+            acc._vector[i] = acc._ivector[i]/16384
+            gyro._vector[i] = gyro._ivector[i]/131
+        acc.last_xyz
+        gyro.last_xyz
+
+    def new_decode():
+        decode_frame(buf, out, coef, index)
+
+    def old_path():
+        acc.xyz
+        gyro.xyz
+        imu.temperature
+
+    def new_path():
+        imu.read_into(out)
+
+    print('decode only:')
+    a = timeit('bytes_toint + Vector3d.last_xyz', old_decode)
+    b = timeit('decode_frame', new_decode)
+    print('    speedup: {:.1f}x'.format(a/b))
+    print('read + decode, fake bus:')
+    a = timeit('accel.xyz + gyro.xyz + temperature', old_path)
+    b = timeit('read_into', new_path)
+    print('    speedup: {:.1f}x'.format(a/b))
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    bench_decode()
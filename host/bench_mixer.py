@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# benchmark: one pass matrix mixer vs. the four per-motor controllers
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import subprocess
+from bench import size_run, timeit, REPEAT
+
+# the per-tick controller cost asked of the mixer: a quarter of the
+# per-motor controllers it replaced
+SPEEDUP = 4.0
+# the tree the per-motor controllers are taken from
+BASELINE = '581552b'
+
+
+def best(named):
+    # the fastest of REPEAT runs of each (name, func), taken in turns so a
+    # slow spell of the host costs each of them a run
+    runs = [(name, func, size_run(func)) for name, func in named]
+    us = [None]*len(runs)
+    for r in range(REPEAT):
+        for i in range(len(runs)):
+            t = timeit(runs[i][1], runs[i][2])
+            if us[i] is None or t < us[i]:
+                us[i] = t
+    for i in range(len(runs)):
+        print('    {:<44} {:>8.2f} us/call'.format(runs[i][0], us[i]))
+    return us
+
+
+def baseline_module(rev=BASELINE):
+    # flight_controller.py of rev, as it was: flight_ctr_fr/fl/bl/br each
+    # with its own stick queues and call chain; its imports come from the
+    # tree
+    import os
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    src = subprocess.run(['git', 'show', rev+':flight_controller.py'], cwd=root,
+                         capture_output=True, check=True).stdout
+    ns = {'__name__': 'flight_controller_'+rev}
+    exec(compile(src, rev+':flight_controller.py', 'exec'), ns)
+    return ns
+
+
+def bench_mixer():
+    from sensor_frame import SensorFrame
+    from rc_input import RCInput
+    from flight_controller import flight_ctr
+    from fake_i2c import validate_result
+    base = baseline_module()
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    acc = [0.01, -0.02, 0.99]
+    sticks = [5000, 5000, 7500]
+
+    frame = SensorFrame()
+    frame.set_acc(acc)
+    rc = RCInput(None, st_range)
+    for i in range(11):
+        rc.set(sticks)
+    ctrs = []
+    for compiled in (False, True):
+        fc = flight_ctr('fc', st_range, m_ranges)
+        fc.frame = frame
+        fc.rc = rc
+        fc.based_acc_sum = 10000
+        fc.es_acc_sum = 12000
+        if compiled:
+            fc.compile()
+        ctrs.append(fc)
+    fc, fc_c = ctrs
+    # the quad_x rows are fr, fl, bl, br
+    old = []
+    for i, cls in enumerate(('flight_ctr_fr', 'flight_ctr_fl', 'flight_ctr_bl', 'flight_ctr_br')):
+        c = base[cls]('m'+str(i), st_range, m_ranges[i])
+        c.based_acc_sum = 10000
+        c.es_acc_sum = 12000
+        c.acc_vals = acc
+        for j in range(11):
+            c.st_vals = sticks
+        old.append(c)
+
+    outputs = list(fc.motor_pwn_values())
+    expected = [c.motor_pwn_value() for c in old]
+    # the per-motor controllers truncated every term on its own, the mixer
+    # truncates the sum: one count per term at most, four terms a motor
+    diff = max([abs(expected[i]-outputs[i]) for i in range(4)])
+    if validate_result(True, diff<=4):
+        print('quad_x matches the '+BASELINE+' controllers: '+str(outputs)+', '+str(expected))
+
+    c0, c1, c2, c3 = old
+
+    def old_tick():
+        # as the baseline main_loop: the sample and the sticks handed to
+        # each controller, then its output
+        c0.acc_vals = acc
+        c1.acc_vals = acc
+        c2.acc_vals = acc
+        c3.acc_vals = acc
+        c0.st_vals = sticks
+        c1.st_vals = sticks
+        c2.st_vals = sticks
+        c3.st_vals = sticks
+        c0.motor_pwn_value()
+        c1.motor_pwn_value()
+        c2.motor_pwn_value()
+        c3.motor_pwn_value()
+
+    def new_tick():
+        frame.set_acc(acc)
+        rc.set(sticks)
+        fc.motor_pwn_values()
+
+    def new_tick_c():
+        frame.set_acc(acc)
+        rc.set(sticks)
+        fc_c.motor_pwn_values()
+
+    def old_outputs():
+        c0.motor_pwn_value()
+        c1.motor_pwn_value()
+        c2.motor_pwn_value()
+        c3.motor_pwn_value()
+
+    print('controller tick, 4 motors:')
+    a, b, c, d, e = best((('tick, '+BASELINE+' flight_ctr_xx', old_tick),
+                          ('tick, flight_ctr', new_tick),
+                          ('tick, flight_ctr compiled', new_tick_c),
+                          ('4x motor_pwn_value, '+BASELINE, old_outputs),
+                          ('motor_pwn_values', fc.motor_pwn_values)))
+    for name, old_us, new_us in (('tick', a, b), ('tick, compiled', a, c), ('outputs only', d, e)):
+        x = old_us/new_us
+        print('    {:<20} {:.1f}x, target {:.1f}x: {}'.format(
+              name, x, SPEEDUP, 'met' if x >= SPEEDUP else 'missed'))
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    bench_mixer()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# equivalence of the compiled controller with the float path
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import random
+from fake_i2c import validate_result
+
+ST_RANGE = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+M_RANGES = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+            [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+
+
+def pair(layout='quad_x', pids=False, m_val_cr=1.0):
+    # a float and a compiled controller reading the same frame and sticks
+    from flight_controller import flight_ctr
+    from sensor_frame import SensorFrame
+    from rc_input import RCInput
+    from pid import PID
+    frame = SensorFrame()
+    rc = RCInput(None, ST_RANGE)
+    ranges = M_RANGES
+    if layout == 'hex_x':
+        ranges = M_RANGES + M_RANGES[:2]
+    ctrs = []
+    for i in range(2):
+        p = None
+        if pids:
+            p = (PID(0.2, 0.4, 0.002), PID(0.2, 0.4, 0.002), PID(0.2))
+        fc = flight_ctr('fc'+str(i), ST_RANGE, ranges, m_val_cr=m_val_cr, layout=layout, pids=p)
+        fc.frame = frame
+        fc.rc = rc
+        fc.based_acc_sum = 10000
+        fc.es_acc_sum = 11500
+        ctrs.append(fc)
+    ctrs[1].compile()
+    return frame, rc, ctrs[0], ctrs[1]
+
+
+def margin(fc, i):
+    # motor i's pwm delta on the float path before int(), and how far the
+    # compiled sum can be from it: every coefficient is rounded to within
+    # half a step of 2**-14, times the value it multiplies
+    rc = fc.rc
+    frame = fc.frame
+    acc = frame.acc
+    acc_sum = frame.acc_sum
+    st_min, st_mid, st_max = rc.st_range[2]
+    st = rc.ivals[2] - st_mid
+    thr = 100*rc.norm[2]
+    fall = 0
+    if acc_sum < fc.based_acc_sum:
+        thr += 10*(1.0 - acc_sum/fc.based_acc_sum)
+        fall = fc.based_acc_sum - acc_sum
+    if acc_sum > fc.es_acc_sum and rc.norm[2] <= 0:
+        thr += 10*(1.0 - acc_sum/fc.es_acc_sum)
+        fall = fc.es_acc_sum - acc_sum
+    m = fc.mixer.matrix
+    val = m[i*4]*thr
+    err = abs(st) + abs(fall)
+    if not fc.pids:
+        val += m[i*4+1]*acc[1] + m[i*4+2]*acc[0]
+        err += abs(acc[0]) + abs(acc[1])
+    return val, err/(1 << 15) + 1e-4     # and the float32 demands
+
+
+def compare(layout='quad_x', pids=False, m_val_cr=1.0, ticks=2000):
+    # ticks where one of the pwm deltas differs, from the same outputs: a
+    # difference is 1 count at most, and only when an integer is within
+    # the compiled coefficients' rounding of the float path's sum
+    frame, rc, fc_f, fc_c = pair(layout, pids, m_val_cr)
+    validate_result(True, fc_c.compiled)
+    differ = 0
+    for t in range(ticks):
+        # stick sums that are multiples of the queue size keep the filtered
+        # value whole, so the float and integer stick sides agree at the mid
+        # point
+        rc.set([5000, 5000, random.randint(0, 992)*10])
+        frame.set_acc_c([random.randint(-60, 60), random.randint(-60, 60), random.randint(70, 130)])
+        frame.set_gyro_c([random.randint(-3000, 3000) for i in range(3)])
+        frame.set_att([random.uniform(-20, 20), random.uniform(-20, 20), 0])
+        frame.ticks = t*2000
+        # both mixers start the tick from the same outputs
+        start = [random.randint(r[0], r[1]) for r in fc_f.mixer.m_ranges]
+        for mixer in (fc_f.mixer, fc_c.mixer):
+            for i in range(mixer.motors):
+                mixer.outputs[i] = mixer._base[i] = start[i]
+        bounds = [margin(fc_f, i) for i in range(fc_f.mixer.motors)]
+        a = list(fc_f.motor_pwn_values())
+        b = list(fc_c.motor_pwn_values())
+        if a == b:
+            continue
+        differ += 1
+        for i in range(len(a)):
+            val, err = bounds[i]
+            if int(val-err) == int(val+err):
+                validate_result(a[i], b[i])
+            else:
+                validate_result(True, abs(a[i]-b[i]) <= 1)
+    return differ
+
+
+def test_equivalence():
+    # both paths truncate each motor's sum towards zero: the same pwm
+    # values, but for sums within the coefficient rounding of an integer
+    random.seed(3)
+    for layout, pids, m_val_cr in (('quad_x', False, 1.0), ('quad_x', True, 1.0),
+                                   ('quad_plus', False, 1.0), ('hex_x', False, 1.0),
+                                   ('quad_x', False, 1.5)):
+        differ = compare(layout, pids, m_val_cr)
+        print('    {:<10} pids: {:<5} m_val_cr: {} ticks off by a count at a rounding boundary: {} of 2000'.format(
+              layout, str(pids), m_val_cr, differ))
+
+
+def test_invalidate():
+    frame, rc, fc_f, fc_c = pair()
+    fc_c.es_acc_sum = 12000
+    validate_result(False, fc_c.compiled)
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_equivalence()
+    test_invalidate()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# A fake I2C bus holding the register file of one MPU-6050.
+# Counts bus transactions so the cost of an IMU update can be measured on Linux.
+#
+#     cd host && python3 fake_i2c.py
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import struct
+
+MPU6050_ADDR = 0x68
+FIFO_SIZE = 1024
+
+
+class FakeI2C():
+    def __init__(self, id=0, sda=None, scl=None, freq=400000, addr=MPU6050_ADDR):
+        self.addr = addr
+        self.regs = bytearray(128)
+        self.regs[0x6B] = 0x40      # PWR_MGMT_1 reset value: asleep
+        self.regs[0x75] = addr      # WHO_AM_I
+        self.fifo = bytearray()     # device FIFO, oldest byte first
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def transactions(self):
+        return self.reads + self.writes
+
+    def _check(self, addr):
+        if addr != self.addr:
+            raise OSError(19)       # ENODEV, as a real bus without ACK
+
+    def scan(self):
+        return [self.addr]
+
+    def readfrom(self, addr, nbytes):
+        self._check(addr)
+        self.reads += 1
+        return bytes(nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        self._check(addr)
+        self.reads += 1
+        if memaddr == 0x74:         # FIFO_R_W does not auto increment
+            for i in range(len(buf)):
+                buf[i] = self.fifo.pop(0) if self.fifo else 0
+            return
+        for i in range(len(buf)):
+            buf[i] = self._reg((memaddr+i) % len(self.regs))
+
+    def writeto_mem(self, addr, memaddr, buf):
+        self._check(addr)
+        self.writes += 1
+        for i in range(len(buf)):
+            self.regs[(memaddr+i) % len(self.regs)] = buf[i]
+        if self.regs[0x6A] & 0x04:  # FIFO_RESET clears itself
+            self.fifo = bytearray()
+            self.regs[0x6A] &= ~0x04
+
+    def _reg(self, memaddr):
+        if memaddr == 0x3A:         # INT_STATUS clears on read
+            val = self.regs[0x3A]
+            self.regs[0x3A] = 0
+            return val
+        if memaddr == 0x72:
+            return len(self.fifo) >> 8
+        if memaddr == 0x73:
+            return len(self.fifo) & 0xff
+        return self.regs[memaddr]
+
+    def set_frame(self, ax, ay, az, tem, gx, gy, gz):
+        # raw signed counts as the device stores them at 0x3B-0x48
+        struct.pack_into('>7h', self.regs, 0x3B, ax, ay, az, tem, gx, gy, gz)
+
+    def push_fifo(self, ax, ay, az, gx, gy, gz, nbytes=12):
+        # one accel + gyro sample, its first nbytes when the device is caught
+        # writing it. Like the device, a full FIFO wraps around, overwrites
+        # the oldest bytes and raises FIFO_OFLOW_INT if enabled.
+        if not (self.regs[0x6A] & 0x40 and self.regs[0x23] == 0x78):
+            return
+        self.fifo += struct.pack('>6h', ax, ay, az, gx, gy, gz)[:nbytes]
+        if len(self.fifo) > FIFO_SIZE:
+            self.fifo = self.fifo[len(self.fifo)-FIFO_SIZE:]
+            if self.regs[0x38] & 0x10:
+                self.regs[0x3A] |= 0x10
+
+    def push_fifo_rest(self, ax, ay, az, gx, gy, gz, nbytes):
+        # the rest of a sample push_fifo() wrote the first nbytes of
+        self.fifo += struct.pack('>6h', ax, ay, az, gx, gy, gz)[nbytes:]
+
+
+def validate_result(expected, result):
+    if expected!=result:
+        print('!!! Expected result is '+str(expected)+', got '+str(result))
+        return False
+    return True
+
+
+def test_shadow_registers():
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(8192, 0, 16384, 340, 131, -262, 0)
+
+    # range lookups come from the shadow registers, not the bus
+    n = imu.transactions
+    validate_result(0, imu.accel_range)
+    validate_result(0, imu.gyro_range)
+    validate_result(n, imu.transactions)
+
+    n = imu.transactions
+    imu.accel.xyz
+    print('accel.xyz:  '+str(imu.transactions-n)+' transaction(s)')
+    validate_result(1, imu.transactions-n)
+
+    n = imu.transactions
+    imu.read_all()
+    print('read_all(): '+str(imu.transactions-n)+' transaction(s)')
+    validate_result(1, imu.transactions-n)
+    validate_result(bus.transactions, imu.transactions)
+    validate_result((0.5, 0.0, 1.0), imu.accel.last_xyz)
+
+    # setters update the cached copy and the reciprocal scale
+    imu.accel_range = 1
+    validate_result(1, imu.accel_range)
+    validate_result(0x08, bus.regs[0x1C])
+    imu.read_all()
+    validate_result((1.0, 0.0, 2.0), imu.accel.last_xyz)
+
+    # a change behind the driver's back is only seen after refresh()
+    bus.regs[0x1B] = 0x18
+    validate_result(0, imu.gyro_range)
+    imu.refresh()
+    validate_result(3, imu.gyro_range)
+
+
+def test_fifo():
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    imu.fifo_enable(max_samples=16)
+    validate_result(0, imu.fifo_read())
+
+    for i in range(10):
+        bus.push_fifo(i*1638, -i*1638, 16384, i*131, 0, -131)
+    n = imu.transactions
+    validate_result(10, imu.fifo_read())
+    validate_result(3, imu.transactions-n)      # INT_STATUS, FIFO_COUNT + one block read
+    s = imu.fifo_samples
+    validate_result(True, abs(s[9*6+0]-0.9) < 0.001 and abs(s[9*6+1]+0.9) < 0.001)
+    validate_result((1.0, 9.0, 0.0, -1.0), (s[9*6+2], s[9*6+3], s[9*6+4], s[9*6+5]))
+    validate_result(0, len(bus.fifo))
+
+    # more samples than the buffer holds: drained over two calls, in order
+    for i in range(20):
+        bus.push_fifo(i, 0, 0, 0, 0, 0)
+    validate_result(16, imu.fifo_read())
+    validate_result(15/16384, s[15*6])
+    validate_result(4, imu.fifo_read())
+    validate_result(19/16384, s[3*6])
+
+    # a packet caught half written stays queued, nothing is lost
+    bus.push_fifo(1, 0, 0, 0, 0, 0)
+    bus.push_fifo(2, 0, 0, 0, 0, 0, nbytes=5)
+    validate_result(1, imu.fifo_read())
+    validate_result(1/16384, s[0])
+    validate_result(0, imu.fifo_overflows)
+    bus.push_fifo_rest(2, 0, 0, 0, 0, 0, nbytes=5)
+    validate_result(1, imu.fifo_read())
+    validate_result(2/16384, s[0])
+
+    # device FIFO wraps around: detected, reset and recovered
+    for i in range(100):
+        bus.push_fifo(i, 0, 0, 0, 0, 0)
+    validate_result(0, imu.fifo_read())
+    validate_result(1, imu.fifo_overflows)
+    validate_result(0, len(bus.fifo))
+    bus.push_fifo(-16384, 0, 0, 0, 0, 0)
+    validate_result(1, imu.fifo_read())
+    validate_result(-1.0, s[0])
+
+
+def test_decode_frame():
+    from array import array
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus, transposition=(1, 0, 2), scaling=(1, -1, 1))
+    imu.accel.cal = (0.25, 0.0, 0.0)
+    bus.set_frame(8192, -4096, 16384, -340, 262, 131, -655)
+    out = array('f', [0]*7)
+    imu.read_into(out)
+    xyz = imu.accel.xyz
+    validate_result(True, all(abs(out[i]-xyz[i]) < 1e-6 for i in range(3)))
+    xyz = imu.gyro.xyz
+    validate_result(True, all(abs(out[i+4]-xyz[i]) < 1e-6 for i in range(3)))
+    validate_result(34.0, out[3])
+    # changed calibration is picked up without touching the driver
+    imu.accel.cal = (0.0, 0.0, 0.0)
+    imu.read_into(out)
+    validate_result((-0.25, -0.5, 1.0), (out[0], out[1], out[2]))
+
+
+def test_fixed_point():
+    import random
+    from array import array
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus, transposition=(2, 0, 1), scaling=(1, -1, 1))
+    imu.gyro.cal = (1.3, -0.7, 0.2)
+    out = array('f', [0]*7)
+    cout = array('i', [0]*7)
+    worst = 0
+    random.seed(1)
+    for accel_range in range(4):
+        imu.accel_range = accel_range
+        imu.gyro_range = 3 - accel_range
+        for _ in range(500):
+            raw = [random.randint(-32768, 32767) for _ in range(7)]
+            bus.set_frame(*raw)
+            imu.read_into(out)
+            imu.read_fixed_into(cout)
+            for i in range(7):
+                worst = max(worst, abs(int(out[i]*100) - cout[i]))
+    print('fixed point vs float: '+str(worst)+' LSB max')
+    validate_result(True, worst <= 1)
+
+
+class FakePin():
+    IRQ_RISING = 1
+
+    def __init__(self):
+        self.handler = None
+
+    def irq(self, handler=None, trigger=IRQ_RISING):
+        self.handler = handler
+
+    def pulse(self):
+        if self.handler:
+            self.handler(self)
+
+
+def test_data_ready():
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    pin = FakePin()
+    imu.drdy_enable(pin)
+    validate_result(True, imu.drdy)
+    validate_result(0x01, bus.regs[0x38])
+    acc_vals = [0.0, 0.0, 0.0]
+    gyro_vals = [0.0, 0.0, 0.0]
+
+    bus.set_frame(16384, 0, 0, 0, 131, 0, 0)
+    pin.pulse()
+    seq = imu.wait_frame(0)
+    imu.decode(acc_vals, gyro_vals)
+    validate_result(1, seq)
+    validate_result([1.0, 0.0, 0.0], acc_vals)
+    validate_result([1.0, 0.0, 0.0], gyro_vals)
+
+    # two interrupts before the consumer runs: the newest frame wins
+    bus.set_frame(0, 16384, 0, 0, 0, 131, 0)
+    pin.pulse()
+    bus.set_frame(0, 0, 16384, 0, 0, 0, 131)
+    pin.pulse()
+    seq = imu.wait_frame(seq)
+    imu.decode(acc_vals, gyro_vals)
+    validate_result(3, seq)
+    validate_result([0.0, 0.0, 1.0], acc_vals)
+    validate_result([0.0, 0.0, 1.0], gyro_vals)
+
+    imu.drdy_disable()
+    validate_result(False, imu.drdy)
+    validate_result(None, pin.handler)
+
+
+def test_vector_cache():
+    # magnitude and inclination are cached per frame: a new cal or a new
+    # frame read through read_into() must be seen by the next read
+    from math import sqrt
+    from imu import MPU6050
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(0, 0, 16384, 0, 0, 0, 0)
+    acc = imu.accel
+    validate_result(1.0, acc.magnitude)
+    validate_result(0.0, acc.inclination)
+
+    seq = acc._cal_seq
+    acc.cal = (0, 0, 0.5)
+    validate_result(seq+1, acc._cal_seq)
+    validate_result(0.5, acc.magnitude)
+    acc.cal = (0.5, 0, 0)
+    validate_result(True, abs(acc.magnitude - sqrt(1.25)) < 1e-6)
+    validate_result(True, abs(acc.inclination - 26.565) < 0.001)
+    # the decode coefficients follow cal too
+    vals = [0.0, 0.0, 0.0]
+    imu.snapshot(vals, [0.0, 0.0, 0.0])
+    validate_result([-0.5, 0.0, 1.0], vals)
+    cvals = [0, 0, 0]
+    imu.snapshot_fixed(cvals, [0, 0, 0])
+    validate_result([-50, 0, 100], cvals)
+
+    acc.cal = (0, 0, 0)
+    bus.set_frame(0, 16384, 0, 0, 0, 0, 0)
+    out = [0.0, 0.0, 0.0]
+    acc.read_into(out)
+    validate_result([0.0, 1.0, 0.0], out)
+    validate_result(1.0, acc.magnitude)
+    validate_result(90.0, acc.inclination)
+
+
+class _lines(list):
+    # bb.write stand-in
+    def write(self, msg, end='\n'):
+        self.append(msg)
+
+
+def test_calibration():
+    import os, tempfile
+    from imu import MPU6050
+    from calibration import calibration_store
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        path = os.path.join(tmp.name, 'calibration.json')
+        cal = calibration_store(path)
+        validate_result(False, cal.load())      # nothing saved yet
+        cal.acc_base = [0, 0, 100]
+        cal.gyro_offset = [1.0, -0.5, 0.0]
+        cal.based_acc_sum = 10000
+        cal.temperature = 35.0
+        cal.save()
+        loaded = calibration_store(path)
+        validate_result(True, loaded.load())
+        validate_result(([0, 0, 100], [1.0, -0.5, 0.0], 10000, 35.0),
+                        (loaded.acc_base, loaded.gyro_offset, loaded.based_acc_sum, loaded.temperature))
+        with open(path, 'w') as f:
+            f.write('{"acc_base": [0, 0]')
+        validate_result(False, loaded.load())   # truncated file
+
+        # apply(): the gyro offsets land in Vector3d.cal, sensor relative
+        bus = FakeI2C()
+        imu = MPU6050(bus)
+        bus.set_frame(0, 0, 16384, 0, 131, -65, 0)  # 1 and -0.5 degrees/s at rest
+        cal.apply(imu)
+        validate_result((1.0, -0.5, 0.0), imu.gyro.cal)
+        gyro = [0.0, 0.0, 0.0]
+        imu.snapshot([0.0, 0.0, 0.0], gyro)
+        validate_result(True, all(abs(v) < 0.01 for v in gyro))
+
+        # check(): still and as captured passes, a turning or tilted drone
+        # does not
+        bb = _lines()
+        validate_result(True, cal.check(imu, bb, interval=0))
+        bus.set_frame(0, 0, 16384, 0, 131*11, -65, 0)
+        bb = _lines()
+        validate_result(False, cal.check(imu, bb, interval=0))
+        validate_result(True, 'not still' in bb[-1])
+        bus.set_frame(1638, 0, 16384, 0, 131, -65, 0)
+        bb = _lines()
+        validate_result(False, cal.check(imu, bb, interval=0))
+        validate_result(True, 'acc' in bb[-1])
+    finally:
+        tmp.cleanup()
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_shadow_registers()
+    test_fifo()
+    test_decode_frame()
+    test_fixed_point()
+    test_data_ready()
+    test_vector_cache()
+    test_calibration()
@@ -0,0 +1,583 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# checks of the main loop timing: rate groups, deadlines, the dual core loop
+# the debug event log and the profiler
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import time
+from fake_i2c import validate_result
+
+
+class fake_motor():
+    def __init__(self):
+        self.value = 0
+
+    def duty(self, value):
+        self.value = value
+
+
+def test_rate_groups():
+    from scheduler import scheduler
+    sched = scheduler(500)
+    calls = []
+    for name, hz in (('imu', 500), ('attitude', 250), ('rc', 50), ('telemetry', 10)):
+        sched.add(name, lambda name=name: calls.append(name), hz)
+    for i in range(500):
+        sched.tick()
+    validate_result([500, 250, 50, 10], list(sched.runs))
+    validate_result([0, 0, 0, 0], list(sched.missed))
+    # every task is due on the first tick, in the order added
+    validate_result(['imu', 'attitude', 'rc', 'telemetry'], calls[:4])
+    try:
+        sched.add('too fast', None, 1000)
+        validate_result('ValueError', None)
+    except ValueError:
+        pass
+    sched.report()
+
+
+def test_phase():
+    from scheduler import scheduler
+    sched = scheduler(100)
+    ticks = [[], []]
+    sched.add('a', lambda: ticks[0].append(sched.ticks), 10)
+    sched.add('b', lambda: ticks[1].append(sched.ticks), 10, phase=5)
+    for i in range(30):
+        sched.tick()
+    validate_result([0, 10, 20], ticks[0])
+    validate_result([5, 15, 25], ticks[1])
+
+
+def test_missed_deadline():
+    # a slow task well within its own period still makes the fast task
+    # behind it miss its deadline; a slow task behind it does not
+    from scheduler import scheduler
+    sched = scheduler(1000)
+    sched.add('slow', lambda: time.sleep(0.002), 10)
+    sched.add('fast', lambda: None, 1000)
+    sched.add('tel', lambda: None, 10)
+    for i in range(200):
+        sched.tick()
+    validate_result([2, 200, 2], list(sched.runs))
+    validate_result([0, 2, 0], list(sched.missed))
+
+
+def run_main_loop(ticks, motors=None, prof=None, mode=None, rc_update=None, log=None, bb=None):
+    # the fake bus, the rate PIDs and the attitude estimator
+    # mode: builds the flight_mode from the controller and the motors
+    # rc_update: called by the rc task after the sticks are set
+    # log: the controller's event_log, bb: the flight_data written to
+    from fake_i2c import FakeI2C
+    from imu import MPU6050
+    from flight_controller import flight_ctr, main_loop
+    from flight_data import flight_data
+    from rc_input import RCInput
+    from attitude import attitude
+    from pid import PID
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(0, 0, 16384, 0, 0, 0, 0)
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    fc = flight_ctr('fc', st_range, m_ranges, debug=log,
+                    pids=(PID(0.2, 0.4), PID(0.2, 0.4), PID(0.2)))
+    rc = RCInput(None, st_range)
+    def update():
+        rc.set([5000, 5000, 5000])
+        if rc_update:
+            rc_update()
+    rc.update = update
+    if motors is None:
+        motors = [fake_motor() for i in range(4)]
+    if mode:
+        mode = mode(fc, motors)
+    if bb is None:
+        bb = flight_data()
+    return main_loop(imu, rc, fc, motors, bb,
+                     fixed_point=True, att=attitude(gyro_scale=0.01), ticks=ticks, prof=prof,
+                     mode=mode)
+
+
+def test_main_loop():
+    sched, timer = run_main_loop(500)
+    validate_result([500, 250, 50, 500, 10, 500, 10], list(sched.runs))
+    sched.report()
+    timer.report()
+
+
+def test_flight_mode():
+    # on the fake clock: 1s arming with the motors at min, the disarm
+    # switch at 1.2s lands from the next tick, the throttle is down soon
+    # after and the motors are stopped at their init duty
+    import utime
+    from flight_mode import flight_mode, ARMING, FLYING, LANDING, DISARMED
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    modes = []
+    motors = [fake_motor() for i in range(4)]
+    pressed = []
+    armed = []
+    def make_mode(fc, motors):
+        modes.append(flight_mode(fc, motors, 500, arm_seconds=1))
+        return modes[0]
+    def rc_update():
+        mode = modes[0]
+        if mode.state == ARMING:
+            armed[:] = [m.value for m in motors]
+        if utime.ticks_diff(utime.ticks_us(), mode.entered(ARMING)) >= 1200000 and not pressed:
+            pressed.append(utime.ticks_us())
+            mode.disarm()
+    utime.use_fake_clock()
+    try:
+        sched, timer = run_main_loop(2000, motors, mode=make_mode, rc_update=rc_update)
+        mode = modes[0]
+        validate_result('disarmed', mode.name)
+        validate_result([m[0] for m in m_ranges], armed)
+        validate_result(1000000, utime.ticks_diff(mode.entered(FLYING), mode.entered(ARMING)))
+        validate_result(True, utime.ticks_diff(mode.entered(LANDING), pressed[0]) <= 2000)
+        validate_result(True, utime.ticks_diff(mode.entered(DISARMED), mode.entered(LANDING)) < 1000000)
+        validate_result(True, sched.ticks < 2000)
+        validate_result([m[2] for m in m_ranges], [m.value for m in motors])
+        validate_result(False, mode.active)
+    finally:
+        utime.use_fake_clock(False)
+
+
+def _spinning(hz, arm_seconds):
+    # a flight_mode over a controller left 1000 above min, as by escape G
+    from flight_controller import flight_ctr
+    from flight_mode import flight_mode
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    fc = flight_ctr('fc', st_range, m_ranges)
+    motors = [fake_motor() for i in range(4)]
+    out = fc.outputs
+    for j in range(4):
+        out[j] = m_ranges[j][0] + 1000
+        motors[j].duty(out[j])
+    return fc, motors, flight_mode(fc, motors, hz, arm_seconds=arm_seconds), m_ranges
+
+
+def test_arming_ramp():
+    # disarmed until the loop arms it, then the motors wind down to min over
+    # the first half of the arming time instead of dropping at once
+    fc, motors, mode, m_ranges = _spinning(100, 1)
+    validate_result('disarmed', mode.name)
+    validate_result([m[0]+1000 for m in m_ranges], [m.value for m in motors])
+    mode.arm()
+    validate_result('arming', mode.name)
+    validate_result([m[0] for m in m_ranges], list(fc.outputs))
+    validate_result([m[0]+1000 for m in m_ranges], [m.value for m in motors])
+    for i in range(25):
+        mode.step()
+    validate_result([m[0]+500 for m in m_ranges], [m.value for m in motors])
+    for i in range(25):
+        mode.step()
+    validate_result([m[0] for m in m_ranges], [m.value for m in motors])
+    for i in range(50):
+        mode.step()
+    validate_result('arming', mode.name)
+    mode.step()
+    validate_result('flying', mode.name)
+
+
+def test_disarm_latch():
+    # a second press early in the landing is held until the debounce is up,
+    # the failsafe keeps asking until the motors are stopped
+    from rc_failsafe import rc_failsafe
+    fc, motors, mode, m_ranges = _spinning(100, 0)
+    mode.arm()
+    validate_result('flying', mode.name)
+    mode.disarm()
+    mode.step()
+    validate_result('landing', mode.name)
+    mode.disarm()
+    for i in range(50):
+        mode.step()
+    validate_result('landing', mode.name)
+    mode.step()
+    validate_result('disarmed', mode.name)
+    validate_result([m[2] for m in m_ranges], [m.value for m in motors])
+
+    class lost_rc():
+        lost_ms = 0
+    rc = lost_rc()
+    fc, motors, mode, m_ranges = _spinning(100, 0)
+    failsafe = rc_failsafe(rc, mode, hold_ms=500, disarm_ms=1000)
+    mode.arm()
+    rc.lost_ms = 2000 # straight past the disarm time, e.g. after a stall
+    ticks = 0
+    while not mode.disarmed and ticks < 100:
+        failsafe.check()
+        mode.step()
+        ticks += 1
+    validate_result('disarmed', mode.name)
+    validate_result(52, ticks)
+    validate_result(1, failsafe.triggers)
+
+
+def test_mode_requests():
+    # requests in the same tick are all taken, and the failsafe keeps
+    # asking to land while the mode flies
+    from rc_failsafe import rc_failsafe
+    fc, motors, mode, m_ranges = _spinning(100, 0)
+    mode.arm()
+    mode.land()
+    mode.step()
+    validate_result('landing', mode.name)
+    mode.disarm()       # a press and the signal back in one tick
+    mode.resume()
+    mode.step()
+    validate_result('landing', mode.name)
+    for i in range(50):
+        mode.step()
+    validate_result('disarmed', mode.name)
+
+    class lost_rc():
+        lost_ms = 2000
+    rc = lost_rc()
+    fc, motors, mode, m_ranges = _spinning(100, 0)
+    failsafe = rc_failsafe(rc, mode, hold_ms=500, disarm_ms=0)
+    failsafe.check()    # lost before the loop armed the mode
+    mode.arm()
+    mode.step()
+    validate_result('flying', mode.name)
+    failsafe.check()
+    mode.step()
+    validate_result('landing', mode.name)
+    validate_result(1, failsafe.triggers)
+
+
+class slow_motor(fake_motor):
+    # every duty() takes 0 to 400us on the fake clock
+    def duty(self, value):
+        import random
+        import utime
+        utime.advance_us(random.randint(0, 400))
+        self.value = value
+
+
+def test_main_loop_fake_clock():
+    # up to 1.6ms of motor updates a 2ms tick, the period does not move
+    import random
+    import utime
+    random.seed(2)
+    utime.use_fake_clock()
+    try:
+        sched, timer = run_main_loop(500, [slow_motor() for i in range(4)])
+        validate_result(2000, timer.min_dt_us)
+        validate_result(2000, timer.max_dt_us)
+        validate_result(0, timer.overruns)
+        validate_result(500, timer.loops)
+        timer.report()
+    finally:
+        utime.use_fake_clock(False)
+
+
+def test_deadline():
+    # on the fake clock the work varies from 0 to 90% of the period and
+    # every loop still starts exactly one period after the last
+    import random
+    import utime
+    from loop_timer import loop_timer
+    utime.use_fake_clock()
+    random.seed(1)
+    try:
+        timer = loop_timer(2000)
+        timer.start()
+        starts = []
+        for i in range(1000):
+            starts.append(utime.ticks_us())
+            utime.advance_us(random.randint(0, 1800))
+            timer.wait()
+        periods = set([starts[i+1]-starts[i] for i in range(len(starts)-1)])
+        validate_result({2000}, periods)
+        validate_result(0, timer.overruns)
+        validate_result(2000*1000, utime.ticks_us())    # no drift
+        timer.report()
+    finally:
+        utime.use_fake_clock(False)
+
+
+def test_overrun():
+    # a late loop is counted and the next ones catch up on the same grid;
+    # one more than a period late starts a new grid instead of a burst
+    import utime
+    from loop_timer import loop_timer
+    utime.use_fake_clock()
+    try:
+        timer = loop_timer(1000)
+        timer.start()
+        for work in (500, 1500, 200, 200):
+            utime.advance_us(work)
+            timer.wait()
+        validate_result(1, timer.overruns)
+        validate_result(500, timer.max_overrun_us)
+        validate_result(4000, utime.ticks_us())
+        utime.advance_us(2500)
+        timer.wait()
+        utime.advance_us(100)
+        timer.wait()
+        validate_result(2, timer.overruns)
+        validate_result(7500, utime.ticks_us())
+        validate_result(1000, timer.dt_us)
+    finally:
+        utime.use_fake_clock(False)
+
+
+def test_record_ring():
+    from record_ring import record_ring
+    ring = record_ring(4, 2)
+    validate_result(-1, ring.read_slot())
+    for v in range(3):
+        i = ring.write_slot()
+        ring.buf[i] = v
+        ring.buf[i+1] = -v
+        ring.publish()
+    validate_result(-1, ring.write_slot()) # one slot stays empty
+    validate_result(1, ring.dropped)
+    validate_result(3, len(ring))
+    got = []
+    for k in range(2):
+        i = ring.read_slot()
+        got.append((ring.buf[i], ring.buf[i+1]))
+        ring.release()
+    for v in (3, 4):
+        i = ring.write_slot()
+        ring.buf[i] = v
+        ring.buf[i+1] = -v
+        ring.publish()
+    i = ring.read_slot()
+    while i >= 0:
+        got.append((ring.buf[i], ring.buf[i+1]))
+        ring.release()
+        i = ring.read_slot()
+    validate_result([(0, 0), (1, -1), (2, -2), (3, -3), (4, -4)], got)
+    validate_result(0, len(ring))
+
+
+class record_counter():
+    # flight_data without the console, keeping what core 0 receives
+    def __init__(self):
+        self.seqs = []
+        self.status = 0
+
+    def write(self, msg, end='\n'):
+        pass
+
+    def update(self, frame, outputs):
+        self.seqs.append(frame.seq)
+
+    def update_latency(self, us):
+        pass
+
+    def show_status(self, frame, outputs):
+        self.status += 1
+
+
+def test_dual_core():
+    # one second on two threads: the records arrive in order, none dropped
+    from fake_i2c import FakeI2C
+    from imu import MPU6050
+    from flight_controller import flight_ctr, dual_core_loop
+    from rc_input import RCInput
+    from attitude import attitude
+    from pid import PID
+    bus = FakeI2C()
+    imu = MPU6050(bus)
+    bus.set_frame(0, 0, 16384, 0, 0, 0, 0)
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    fc = flight_ctr('fc', st_range, m_ranges,
+                    pids=(PID(0.2, 0.4), PID(0.2, 0.4), PID(0.2)))
+    rc = RCInput(None, st_range)
+    rc.update = lambda: rc.set([5000, 5000, 5000])
+    bb = record_counter()
+    sched, timer, ring = dual_core_loop(imu, rc, fc, [fake_motor() for i in range(4)], bb,
+                                        fixed_point=True, att=attitude(gyro_scale=0.01), ticks=500)
+    validate_result([500, 250, 500, 10, 500, 100], list(sched.runs))
+    validate_result(0, ring.dropped)
+    validate_result(True, len(bb.seqs) >= 90)
+    validate_result(True, bb.seqs == sorted(bb.seqs))
+    validate_result(True, bb.status >= 9)
+    sched.report()
+    timer.report()
+
+
+def test_event_log():
+    from event_log import event_log, EV_JOYSTICK_2, EV_MIX, EV_RATE
+    log = event_log('fc', size=4)
+    log.record(EV_JOYSTICK_2, -1, 12.5, 12.5)
+    log.record(EV_MIX, 2, 545)
+    log.record(EV_RATE, 1, -3.25)
+    log.record(EV_MIX, 3, 3750)     # full: one slot stays empty
+    validate_result(1, log.dropped)
+    lines = []
+    validate_result(2, log.drain(lines.append, 2))
+    validate_result(1, log.drain(lines.append))
+    validate_result(['    fc.joystick_2:    12.5, +12.5',
+                     '    fc2.mix:           545',
+                     '    fc1.rate_control:  -3.25'], lines)
+    validate_result(0, log.pending)
+
+
+def test_main_loop_event_log():
+    # the loop with the event log on and a console that takes 300us a
+    # line: the rate and mix events at 10Hz, the lines written in the slack
+    # of the ticks and the rest after the loop. The loop period is reported
+    # with the log off and on, the lines must not stretch it.
+    from event_log import event_log
+    from flight_data import flight_data
+    class slow_console(flight_data):
+        def __init__(self):
+            super().__init__()
+            self.lines = []
+        def write(self, msg, end='\n'):
+            time.sleep(0.0003)
+            self.lines.append(msg)
+    ticks = 1000
+    for name in ('log off', 'log on'):
+        bb = slow_console()
+        log = event_log('fc') if name == 'log on' else None
+        sched, timer = run_main_loop(ticks, log=log, bb=bb)
+        print('    {}: dt min/max {}/{} us, jitter mean/max {:.0f}/{} us, overruns {}'.format(
+              name, timer.min_dt_us, timer.max_dt_us, timer.mean_jitter_us,
+              timer.max_jitter_us, timer.overruns))
+    mix = [l for l in bb.lines if '.mix:' in l]
+    rate = [l for l in bb.lines if '.rate_control:' in l]
+    validate_result(4*ticks//(500//10), len(mix))
+    validate_result(3*ticks//(500//10), len(rate))
+    validate_result(0, log.pending)
+    validate_result(0, log.dropped)
+
+
+def bench_event_log():
+    # a control tick with debug off, with the event log, and with the lines
+    # formatted in the tick as the controller used to
+    from bench_imu import timeit
+    from flight_controller import flight_ctr
+    from rc_input import RCInput
+    from event_log import event_log
+    from pid import PID
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    import os, tempfile
+    class formatting_log(event_log):
+        # flight_data.write(): to the console and a flushed file per line
+        def record(self, event, motor, value, delta=0):
+            msg = self.format(event, motor, value, delta)
+            self.console.write(msg+'\n')
+            self.fd.write(msg+'\n')
+            self.fd.flush()
+    inline = formatting_log('fc')
+    inline.console = open(os.devnull, 'w')
+    inline.fd = tempfile.TemporaryFile('w')
+    print('control tick, rate PIDs:')
+    times = []
+    for name, log in (('debug off', None), ('event log', event_log('fc', size=64)),
+                      ('formatted in the tick', inline)):
+        fc = flight_ctr('fc', st_range, m_ranges, debug=log,
+                        pids=(PID(0.2, 0.4), PID(0.2, 0.4), PID(0.2)))
+        fc.frame.set_acc_c([3, -4, 95])
+        def tick():
+            fc.frame.ticks += 2000
+            fc.motor_pwn_values()
+        times.append(timeit(name, tick))
+    inline.fd.close()
+    inline.console.close()
+    print('    event log: {:.1f}x debug off, formatted: {:.1f}x'.format(times[1]/times[0], times[2]/times[0]))
+
+
+def test_profiler():
+    import utime
+    from profiler import profiler, BUCKETS
+    utime.use_fake_clock()
+    try:
+        prof = profiler()
+        work = [100]
+        def stage():
+            utime.advance_us(work[0])
+            return work[0]
+        timed = prof.wrap('stage', stage)
+        validate_result(100, timed())
+        for us in (10, 3000, 40000000):
+            work[0] = us
+            timed()
+        validate_result(4, prof.count('stage'))
+        validate_result(int((100+10+3000+40000000)/4), int(prof.mean('stage')))
+        hist = [0]*BUCKETS
+        hist[0] = 1         # 10us
+        hist[3] = 1         # 100us, below 128
+        hist[8] = 1         # 3000us, below 4096
+        hist[BUCKETS-1] = 1 # 40s
+        validate_result(hist, list(prof.histogram('stage')))
+        prof.report()
+    finally:
+        utime.use_fake_clock(False)
+    off = profiler(enabled=False)
+    validate_result(True, off.wrap('stage', stage) is stage)
+
+
+def test_main_loop_profiled():
+    from profiler import profiler
+    from flight_controller import main_loop
+    prof = profiler()
+    sched, timer = run_main_loop(100, prof=prof)
+    validate_result(100, prof.count('imu'))
+    validate_result(100, prof.count('control'))
+    validate_result(100, prof.count('duty'))
+    validate_result(2, prof.count('status'))
+    prof.report()
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_rate_groups()
+    test_phase()
+    test_missed_deadline()
+    test_main_loop()
+    test_flight_mode()
+    test_arming_ramp()
+    test_disarm_latch()
+    test_mode_requests()
+    test_main_loop_fake_clock()
+    test_deadline()
+    test_overrun()
+    test_record_ring()
+    test_dual_core()
+    test_event_log()
+    test_main_loop_event_log()
+    bench_event_log()
+    test_profiler()
+    test_main_loop_profiled()
@@ -0,0 +1,559 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# host simulation backend: a quadcopter rigid body behind the machine and rp2
+# stand-ins, so main.py runs end to end on the fake clock
+#
+#     python3 quad_sim.py [seconds]   soak main.py for that many simulated seconds
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import random
+from math import sqrt, acos, degrees, radians
+import utime
+import machine
+from fake_i2c import FakeI2C, validate_result
+
+GRAVITY = 9.81
+STEP_US = 1000          # physics step
+RC_PERIOD_US = 20000    # one R8EF frame, a pulse per channel
+RC_FIFO = 4             # words the PIO RX FIFO holds, later pulses are lost
+RC_UNIT_MS = 24e-6      # R8EF_channel counts, see scale()
+# main.py: the motor pins and min, max of each motor's pwm range
+MOTOR_PINS = (6, 7, 8, 9)
+M_RANGES = ((110, 7800), (215, 5700), (545, 7900), (3750, 6400))
+
+
+class sim_done(Exception):
+    # the simulated time is up, raised on the next device access
+    pass
+
+
+class quad_body():
+    # rigid body quad X in the IMU axes: x forward, y left, z up. Motors fr,
+    # fl, bl, br as in MIXER_LAYOUTS['quad_x']; fl and br spin so that their
+    # drag turns the frame to positive yaw
+    # t_max: thrust of one motor at full duty (N), tau: motor time constant (s)
+    def __init__(self, mass=0.5, arm=0.12, inertia=(3e-3, 3e-3, 5e-3), t_max=2.5,
+                 k_yaw=0.016, tau=0.03, drag=0.3, ang_drag=2e-3):
+        a = arm/sqrt(2)
+        self.pos_xy = ((a, -a), (a, a), (-a, a), (-a, -a))
+        self.spin = (-1, 1, -1, 1)
+        self.mass = mass
+        self.inertia = inertia
+        self.t_max = t_max
+        self.k_yaw = k_yaw
+        self.tau = tau
+        self.drag = drag
+        self.ang_drag = ang_drag
+        self.cmd = [0.0]*4          # 0 - 1 per motor
+        self.thrust = [0.0]*4       # N
+        self.q = [1.0, 0.0, 0.0, 0.0]
+        self.w = [0.0, 0.0, 0.0]    # body rates, rad/s
+        self.pos = [0.0, 0.0, 0.0]  # m
+        self.vel = [0.0, 0.0, 0.0]
+        self.acc = [0.0, 0.0, GRAVITY] # specific force in body axes, m/s2
+        self.on_ground = True
+        self.time = 0.0
+        # flight statistics
+        self.takeoffs = 0
+        self.max_alt = 0.0
+        self.max_tilt = 0.0         # degrees
+        self.max_rate = 0.0         # degrees/s
+        self.max_impact = 0.0       # m/s at touchdown
+
+    def rotation(self):
+        # body to world
+        w, x, y, z = self.q
+        return ((1-2*(y*y+z*z), 2*(x*y-w*z), 2*(x*z+w*y)),
+                (2*(x*y+w*z), 1-2*(x*x+z*z), 2*(y*z-w*x)),
+                (2*(x*z-w*y), 2*(y*z+w*x), 1-2*(x*x+y*y)))
+
+    @property
+    def tilt(self):
+        # degrees between the body and world z axes
+        return degrees(acos(max(-1.0, min(1.0, self.rotation()[2][2]))))
+
+    def step(self, dt):
+        thrust = self.thrust
+        for i in range(4):
+            target = self.t_max*self.cmd[i]*self.cmd[i]
+            thrust[i] += (target - thrust[i])*min(1.0, dt/self.tau)
+        t = sum(thrust)
+        self.time += dt
+        r = self.rotation()
+        m = self.mass
+        if self.on_ground:
+            if t*r[2][2] <= m*GRAVITY:
+                # sitting level and still, the accelerometer reads the ground
+                self.acc[0] = self.acc[1] = 0.0
+                self.acc[2] = GRAVITY
+                return
+            self.on_ground = False
+            self.takeoffs += 1
+
+        # rotation: r x thrust of every motor, the yaw drag and damping
+        w = self.w
+        tx = ty = tz = 0.0
+        for i in range(4):
+            px, py = self.pos_xy[i]
+            tx += py*thrust[i]
+            ty -= px*thrust[i]
+            tz += self.spin[i]*self.k_yaw*thrust[i]
+        ix, iy, iz = self.inertia
+        torque = (tx - self.ang_drag*w[0] - (iz-iy)*w[1]*w[2],
+                  ty - self.ang_drag*w[1] - (ix-iz)*w[2]*w[0],
+                  tz - self.ang_drag*w[2] - (iy-ix)*w[0]*w[1])
+        w[0] += torque[0]/ix*dt
+        w[1] += torque[1]/iy*dt
+        w[2] += torque[2]/iz*dt
+        qw, qx, qy, qz = self.q
+        h = 0.5*dt
+        q = [qw - h*(qx*w[0] + qy*w[1] + qz*w[2]),
+             qx + h*(qw*w[0] + qy*w[2] - qz*w[1]),
+             qy + h*(qw*w[1] - qx*w[2] + qz*w[0]),
+             qz + h*(qw*w[2] + qx*w[1] - qy*w[0])]
+        n = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + q[3]*q[3])
+        self.q = [v/n for v in q]
+
+        # translation: thrust along body z, gravity and air drag
+        v = self.vel
+        a = [r[j][2]*t/m - self.drag*v[j]/m for j in range(3)]
+        a[2] -= GRAVITY
+        for j in range(3):
+            v[j] += a[j]*dt
+            self.pos[j] += v[j]*dt
+        # the accelerometer: thrust and drag in body axes
+        for j in range(3):
+            self.acc[j] = -self.drag*(r[0][j]*v[0] + r[1][j]*v[1] + r[2][j]*v[2])/m
+        self.acc[2] += t/m
+
+        self.max_alt = max(self.max_alt, self.pos[2])
+        self.max_tilt = max(self.max_tilt, self.tilt)
+        self.max_rate = max(self.max_rate, degrees(max(abs(w[0]), abs(w[1]), abs(w[2]))))
+        if self.pos[2] < 0:
+            # touchdown: the frame is put back level on the ground
+            self.max_impact = max(self.max_impact, -v[2])
+            self.on_ground = True
+            self.pos[2] = 0.0
+            self.vel = [0.0, 0.0, 0.0]
+            self.w = [0.0, 0.0, 0.0]
+            self.q = [1.0, 0.0, 0.0, 0.0]
+
+
+class sim_i2c(FakeI2C):
+    # the MPU-6050: every read of the data registers samples the body at
+    # the current fake clock
+    def __init__(self, sim):
+        super().__init__()
+        self.sim = sim
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        if 0x3B <= memaddr <= 0x48:
+            self.sim.sync()
+            self.set_frame(*self.sim.raw_frame(self.regs[0x1C], self.regs[0x1B]))
+        super().readfrom_mem_into(addr, memaddr, buf)
+
+
+def centred(t):
+    # the pilot: stick pulse widths (ms) per R8EF channel at t seconds,
+    # None for no pulse, the receiver out of range
+    return (1.5, 1.5, 1.5)
+
+
+def circuits(t):
+    # every 20s: climb, hold, descend and cut the throttle. The throttle
+    # stick steps the throttle, its mid point (4925 in main.py) holds it.
+    s = t % 20
+    if s < 2:
+        thr = 1.55
+    elif s < 12:
+        thr = 1.4925
+    elif s < 16:
+        thr = 1.46
+    else:
+        thr = 1.3
+    return (1.5, 1.5, thr)
+
+
+class quad_sim():
+    # the world main.py runs in: the body, its MPU-6050 on sim_i2c, the ZMR
+    # motors by pin and the R8EF channels fed by pilot. Everything is
+    # brought up to the fake clock whenever the firmware touches a device.
+    # seconds: raise sim_done once that much time has passed, 0 runs on
+    def __init__(self, pilot=centred, seconds=0, seed=1, body=None,
+                 motor_pins=MOTOR_PINS, m_ranges=M_RANGES, noise=True):
+        self.body = body or quad_body()
+        self.i2c = sim_i2c(self)
+        self.pilot = pilot
+        self._pins = {motor_pins[i]: i for i in range(len(motor_pins))}
+        self._m_ranges = m_ranges
+        self._rnd = random.Random(seed)
+        self._noise = noise
+        self.gyro_bias = [self._rnd.uniform(-2, 2) if noise else 0.0 for i in range(3)]
+        self._start_us = utime.fake_us()
+        self._us = self._start_us
+        self._end_us = self._start_us + int(seconds*1000000) if seconds else 0
+        self._rc_fifo = [[] for i in range(3)]
+        self._rc_next = [self._start_us + RC_PERIOD_US + 500*i for i in range(3)]
+        self.rc_lost = 0    # pulses lost to a full FIFO
+
+    @property
+    def seconds(self):
+        return (self._us - self._start_us)/1000000
+
+    def sync(self):
+        now = utime.fake_us()
+        if self._end_us and now >= self._end_us:
+            raise sim_done()
+        body = self.body
+        while self._us + STEP_US <= now:
+            body.step(STEP_US/1000000)
+            self._us += STEP_US
+
+    def set_duty(self, pin, duty):
+        self.sync()
+        i = self._pins.get(pin)
+        if i is not None:
+            lo, hi = self._m_ranges[i]
+            self.body.cmd[i] = max(0.0, min(1.0, (duty-lo)/(hi-lo)))
+
+    def raw_frame(self, accel_cfg=0, gyro_cfg=0):
+        # ax, ay, az, tem, gx, gy, gz counts at the configured ranges
+        acc_lsb = 16384 >> ((accel_cfg >> 3) & 3)
+        gyro_lsb = 131/(1 << ((gyro_cfg >> 3) & 3))
+        body = self.body
+        rnd = self._rnd
+        vib = 0.0
+        if self._noise: # motor vibration grows with the thrust
+            vib = 0.01 + 0.03*sum(body.thrust)/(4*body.t_max)
+        vals = []
+        for j in range(3):
+            g = body.acc[j]/GRAVITY + (rnd.gauss(0, vib) if vib else 0)
+            vals.append(int(g*acc_lsb))
+        vals.append(int((25 - 35)*340))
+        for j in range(3):
+            dps = degrees(body.w[j]) + self.gyro_bias[j] + (rnd.gauss(0, 0.2) if self._noise else 0)
+            vals.append(int(dps*gyro_lsb))
+        return [max(-32768, min(32767, v)) for v in vals]
+
+    def _rc_fill(self, ch, now):
+        fifo = self._rc_fifo[ch]
+        while self._rc_next[ch] <= now:
+            ms = self.pilot((self._rc_next[ch] - self._start_us)/1000000)[ch]
+            if ms is None:
+                pass
+            elif len(fifo) < RC_FIFO:
+                fifo.append((int(ms/RC_UNIT_MS) - 1) ^ 0xffffffff)
+            else:
+                self.rc_lost += 1
+            self._rc_next[ch] += RC_PERIOD_US
+
+    def rc_fifo(self, ch):
+        self.sync()
+        self._rc_fill(ch, utime.fake_us())
+        return len(self._rc_fifo[ch])
+
+    def rc_get(self, ch):
+        # as StateMachine.get(): blocks until the next pulse has ended
+        self.sync()
+        now = utime.fake_us()
+        self._rc_fill(ch, now)
+        if not self._rc_fifo[ch]:
+            utime.sleep_us(self._rc_next[ch] - now)
+            self.sync()
+            self._rc_fill(ch, utime.fake_us())
+        return self._rc_fifo[ch].pop(0)
+
+
+def install(sim):
+    # main.py's devices come from sim from now on; None uninstalls
+    machine._sim = sim
+
+
+def run_main(seconds, pilot=circuits, seed=1, quiet=True, workdir=None, settings=None):
+    # main.py end to end on the fake clock for seconds of simulated time:
+    # calibration, acc_sum_escape_g and the main loop. Files
+    # main.py writes (data.txt, calibration.json, flight.rec) go to
+    # workdir, a temporary directory by default. settings: values for
+    # main.py's upper case settings, e.g. {'RECORD': True}. Returns the sim.
+    import contextlib, os, re, sys, tempfile
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    main_py = os.path.join(root, 'main.py')
+    cwd = os.getcwd()
+    real_time = sys.modules['time']
+    tmp = None
+    if workdir is None:
+        tmp = tempfile.TemporaryDirectory()
+        workdir = tmp.name
+    utime.use_fake_clock()
+    sim = quad_sim(pilot, seconds, seed)
+    install(sim)
+    # on MicroPython time is utime, here too for the modules main.py runs;
+    # calibration binds time when imported
+    sys.modules['time'] = utime
+    sys.modules.pop('calibration', None)
+    out = open(os.devnull, 'w') if quiet else sys.stdout
+    ns = {'__name__': '__main__', '__file__': main_py}
+    sim.ns = ns # main.py's globals, for a pilot to reach its flight mode
+    try:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(out):
+            with open(main_py) as f:
+                src = f.read()
+            for name, value in (settings or {}).items():
+                src, n = re.subn('^'+name+' = .*$', name+' = '+repr(value), src, flags=re.M)
+                if n != 1:
+                    raise ValueError('no setting '+name+' in main.py')
+            exec(compile(src, main_py, 'exec'), ns)
+    except sim_done:
+        pass
+    finally:
+        os.chdir(cwd)
+        sys.modules['time'] = real_time
+        sys.modules.pop('calibration', None)
+        install(None)
+        utime.use_fake_clock(False)
+        if quiet:
+            out.close()
+        if tmp:
+            tmp.cleanup()
+    return sim
+
+
+def test_hover():
+    # at the hover duty the body lifts off and stays level
+    body = quad_body()
+    hover = sqrt(body.mass*GRAVITY/(4*body.t_max))
+    for i in range(4):
+        body.cmd[i] = hover*1.02
+    for i in range(2000):
+        body.step(0.001)
+    validate_result(False, body.on_ground)
+    validate_result(True, 0 < body.pos[2] < 1.0)
+    validate_result(True, body.tilt < 0.01)
+    validate_result(True, abs(body.acc[2]/GRAVITY - 1.0) < 0.05)
+
+
+def test_torques():
+    # the signs the rate PIDs of flight_ctr expect, see rate_control()
+    for cmd, axis, sign in (((0.8, 0.7, 0.7, 0.8), 0, -1),    # right side up
+                            ((0.7, 0.7, 0.8, 0.8), 1, 1),     # back up
+                            ((0.7, 0.8, 0.7, 0.8), 2, 1)):    # fl, br faster
+        body = quad_body()
+        body.cmd = list(cmd)
+        for i in range(100):
+            body.step(0.001)
+        validate_result(sign, 1 if body.w[axis] > 0 else -1)
+
+
+def test_accelerometer_tilt():
+    # rolled left side up and pitched nose down, as replay_attitude.sensors()
+    body = quad_body()
+    body.on_ground = False
+    r, p = radians(20), radians(10)
+    from math import sin, cos
+    # q for roll r about x, then pitch p about y
+    body.q = [cos(r/2)*cos(p/2), sin(r/2)*cos(p/2), cos(r/2)*sin(p/2), -sin(r/2)*sin(p/2)]
+    rot = body.rotation()
+    up = [rot[2][j] for j in range(3)]
+    expected = [-sin(p), sin(r)*cos(p), cos(r)*cos(p)]
+    validate_result(True, all(abs(up[j]-expected[j]) < 1e-9 for j in range(3)))
+
+
+def test_rc_pulses():
+    from state_machine import R8EF_channel, mark
+    utime.use_fake_clock()
+    try:
+        sim = quad_sim(pilot=lambda t: (1.25, 1.5, 1.75))
+        install(sim)
+        chs = [R8EF_channel(i, mark) for i in range(3)]
+        t0 = utime.ticks_us()
+        # nothing received yet: get() waits for the first frame
+        validate_result(0, chs[2].rx_fifo())
+        validate_result(7500, round(chs[2].abs_scale()))
+        validate_result(True, utime.ticks_diff(utime.ticks_us(), t0) >= RC_PERIOD_US)
+        validate_result(2500, round(chs[0].abs_scale()))
+        validate_result(5000, round(chs[1].abs_scale()))
+        # 10 frames later the FIFO holds 4, the rest is lost
+        utime.advance_us(10*RC_PERIOD_US)
+        validate_result(RC_FIFO, chs[0].rx_fifo())
+        validate_result(True, sim.rc_lost > 0)
+        # poll() takes the newest and empties the FIFO, then returns at once
+        validate_result(2500, round(chs[0].poll()))
+        validate_result(0, chs[0].rx_fifo())
+        t0 = utime.ticks_us()
+        validate_result(-1, chs[0].poll())
+        validate_result(0, utime.ticks_diff(utime.ticks_us(), t0))
+    finally:
+        install(None)
+        utime.use_fake_clock(False)
+
+
+def test_main(seconds=100):
+    # main.py from power on: calibration, escape G, arming and the main
+    # loop, which takes off on the first circuit
+    import time
+    t0 = time.perf_counter()
+    sim = run_main(seconds)
+    wall = time.perf_counter() - t0
+    body = sim.body
+    validate_result(True, sim.seconds >= seconds - 0.01)
+    validate_result(True, body.takeoffs >= 2)
+    fc = sim.ns['fc']
+    validate_result(True, fc.based_acc_sum > 0 and fc.es_acc_sum > 0)
+    report(sim, wall)
+
+
+def test_disarm(seconds=90):
+    # the disarm switch pressed 25s in, climbing: landing from the next
+    # control tick, the motors stopped once the throttle is down and the
+    # main loop left before the end of the run
+    from flight_mode import LANDING, DISARMED
+    pressed = []
+    def pilot(t):
+        if t >= 25 and not pressed:
+            pressed.append(utime.ticks_us())
+            machine._sim.ns['mode'].disarm()
+        return circuits(t)
+    sim = run_main(seconds, pilot)
+    mode = sim.ns['mode']
+    validate_result('disarmed', mode.name)
+    validate_result(True, utime.ticks_diff(mode.entered(LANDING), pressed[0]) <= 2000)
+    validate_result(True, utime.ticks_diff(mode.entered(DISARMED), mode.entered(LANDING)) < 50000000)
+    validate_result(True, sim.seconds < seconds)
+    validate_result(True, sim.body.on_ground)
+    validate_result([0.0]*4, sim.body.cmd)
+
+
+def test_failsafe(seconds=90):
+    # the receiver out of range 25s in, climbing: the sticks are held for
+    # RC_HOLD_MS from the last pulse, then the landing starts within an rc
+    # period or two and ends on the ground; no loop tick waits for the
+    # missing pulses
+    from flight_mode import LANDING
+    lost = []
+    def pilot(t):
+        if t < 25:
+            return circuits(t)
+        if not lost:
+            lost.append(utime.ticks_us()) # a frame after the last pulse
+        return (None, None, None)
+    sim = run_main(seconds, pilot)
+    ns = sim.ns
+    mode = ns['mode']
+    validate_result('disarmed', mode.name)
+    validate_result(1, ns['failsafe'].triggers)
+    hold_us = ns['RC_HOLD_MS']*1000
+    landing = utime.ticks_diff(mode.entered(LANDING), lost[0])
+    validate_result(True, hold_us - RC_PERIOD_US <= landing <= hold_us + 2*RC_PERIOD_US)
+    validate_result(True, sim.seconds < seconds)
+    validate_result(True, sim.body.on_ground)
+    validate_result([0.0]*4, sim.body.cmd)
+
+
+def test_failsafe_recovery(seconds=32):
+    # the receiver out of range from 25s to 27s: the landing starts, the
+    # pulses are back for RC_RECOVER_MS and the pilot has the sticks again,
+    # still in the air at the end
+    from flight_mode import LANDING, FLYING
+    times = []
+    def pilot(t):
+        if t < 25 or t >= 27:
+            if t >= 27 and len(times) == 1:
+                times.append(utime.ticks_us()) # the first pulse back
+            return circuits(t)
+        if not times:
+            times.append(utime.ticks_us())
+        return (None, None, None)
+    sim = run_main(seconds, pilot)
+    ns = sim.ns
+    mode = ns['mode']
+    failsafe = ns['failsafe']
+    validate_result('flying', mode.name)
+    validate_result(1, failsafe.triggers)
+    validate_result(1, failsafe.recoveries)
+    validate_result(True, ns['fc'].rc is ns['rc'])
+    validate_result(True, utime.ticks_diff(mode.entered(LANDING), times[0]) > 0)
+    recover_us = ns['RC_RECOVER_MS']*1000
+    resumed = utime.ticks_diff(mode.entered(FLYING), times[1])
+    validate_result(True, recover_us <= resumed <= recover_us + 2*RC_PERIOD_US)
+    validate_result(False, sim.body.on_ground)
+
+
+def test_replay(seconds=32):
+    # a flight recorded by main.py, with the arming ramp, a lost signal,
+    # the landing and the recovery, replayed by host/replay.py: the same
+    # outputs and flight mode on every tick
+    import os, tempfile
+    from flight_recorder import read_recording
+    from replay import replay, compare
+    def pilot(t):
+        if 25 <= t < 27:
+            return (None, None, None)
+        return circuits(t)
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = run_main(seconds, pilot, workdir=workdir, settings={'RECORD': True})
+        with open(os.path.join(workdir, sim.ns['REC_FILE']), 'rb') as f:
+            header, records = read_recording(f)
+    validate_result(1, sim.ns['failsafe'].recoveries)
+    validate_result(True, len(records) > (seconds-10)*header['loop_hz'])
+    validate_result(True, any(r[4] == 0 for r in records[1:])) # the signal lost
+    modes = []
+    outputs = replay(header, records, modes=modes)
+    validate_result(len(records), len(outputs))
+    validate_result((0, [0, 0, 0, 0]), compare(records, outputs))
+    validate_result([r[5] for r in records], modes)
+    validate_result([0, 1, 2], sorted(set(modes))) # arming, flying, landing
+
+
+def report(sim, wall):
+    body = sim.body
+    print('{:.0f}s simulated in {:.1f}s, {:.1f}x real time'.format(sim.seconds, wall, sim.seconds/wall))
+    print('    takeoffs: {}, max altitude: {:.2f} m, max tilt: {:.1f} deg, max rate: {:.0f} deg/s,'
+          ' max impact: {:.2f} m/s, rc pulses lost: {}'.format(
+          body.takeoffs, body.max_alt, body.max_tilt, body.max_rate, body.max_impact, sim.rc_lost))
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if len(sys.argv) > 1:
+        import time
+        t0 = time.perf_counter()
+        sim = run_main(float(sys.argv[1]))
+        report(sim, time.perf_counter() - t0)
+    else:
+        test_hover()
+        test_torques()
+        test_accelerometer_tilt()
+        test_rc_pulses()
+        test_main()
+        test_disarm()
+        test_failsafe()
+        test_failsafe_recovery()
+        test_replay()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# RCInput: normalization, channel clamping and the st_vals accessor on
+# fake R8EF channels
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from fake_i2c import validate_result
+
+ST_RANGE = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+M_RANGES = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+            [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+FILL = 11       # RCInput's moving average, q_size+1
+
+
+def fake_channel():
+    # an R8EF_channel whose RX FIFO holds the pulse widths (ms) given to
+    # pulse(), as the PIO program counts them
+    from state_machine import R8EF_channel, mark
+
+    class channel(R8EF_channel):
+        def __init__(self, id):
+            super().__init__(id, mark)
+            self.fifo = []
+
+        def pulse(self, ms):
+            self.fifo.append((int(ms/24e-6) - 1) ^ 0xffffffff)
+
+        def rx_fifo(self):
+            return len(self.fifo)
+
+        def get(self, buf=None, shift=0):
+            return self.fifo.pop(0)
+
+    return channel
+
+
+def _rc():
+    from rc_input import RCInput
+    channel = fake_channel()
+    chs = [channel(i) for i in range(3)]
+    return RCInput(chs, ST_RANGE), chs
+
+
+def _steady(rc, chs, ms):
+    # the moving average filled with one pulse width per channel
+    for k in range(FILL):
+        for i in range(3):
+            chs[i].pulse(ms[i])
+        rc.update()
+
+
+def test_normalization():
+    rc, chs = _rc()
+    # the transmitter's mid points: 1.4888, 1.5031 and 1.4925ms
+    _steady(rc, chs, [1+ST_RANGE[i][1]/10000 for i in range(3)])
+    validate_result(True, all(abs(rc.norm[i]) < 1e-3 for i in range(3)))
+    validate_result([ST_RANGE[i][1] for i in range(3)], [round(v) for v in rc.vals])
+    validate_result(list(rc.ivals), [int(v) for v in rc.vals])
+    # the end points
+    _steady(rc, chs, [1+ST_RANGE[i][2]/10000 for i in range(3)])
+    validate_result(True, all(abs(rc.norm[i]-1.0) < 1e-3 for i in range(3)))
+    _steady(rc, chs, [1.0, 1.0, 1.0])
+    validate_result([-1.0, -1.0, -1.0], list(rc.norm))
+    # half way up the throttle range
+    _steady(rc, chs, [1.0, 1.0, 1+(ST_RANGE[2][1]+ST_RANGE[2][2])/20000])
+    validate_result(True, abs(rc.norm[2]-0.5) < 1e-3)
+
+
+def test_clamping():
+    # pulses outside 1 - 2ms are clamped by the channel to 0 - 10,000
+    rc, chs = _rc()
+    _steady(rc, chs, [0.8, 2.3, 2.5])
+    validate_result([0.0, 10000.0, 10000.0], list(rc.vals))
+    validate_result([0.0, 10000.0, 10000.0], list(rc.raw))
+    validate_result(-1.0, rc.norm[0])
+    validate_result(True, abs(rc.norm[1]-(10000-5031)/(9966-5031)) < 1e-3)
+    # the filter moves one sample at a time, no jump past the clamp
+    for i in range(3):
+        chs[i].pulse(1.5)
+    rc.update()
+    validate_result(True, 0 < rc.vals[1] < 10000)
+    validate_result(7, rc.fresh)
+    # a channel without a pulse keeps its value and is not fresh
+    chs[1].pulse(1.5)
+    rc.update()
+    validate_result(2, rc.fresh)
+    validate_result([5000.0, 5000.0, 5000.0], list(rc.raw))
+    rc.update()
+    validate_result(0, rc.fresh)
+
+
+def test_st_vals():
+    # flight_ctr.st_vals reads the shared stage by reference, setting it
+    # pushes one sample
+    from flight_controller import flight_ctr
+    rc, chs = _rc()
+    fc = flight_ctr('fc', ST_RANGE, M_RANGES)
+    fc.rc = rc
+    validate_result(True, fc.st_vals is rc.vals)
+    for k in range(FILL):
+        fc.st_vals = [5000, 2500, 7500]
+    validate_result([5000.0, 2500.0, 7500.0], list(fc.st_vals))
+    _steady(rc, chs, [1.25, 1.25, 1.25])
+    validate_result([2500, 2500, 2500], [round(v) for v in fc.st_vals])
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_normalization()
+    test_clamping()
+    test_st_vals()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# replays a flight_recorder recording through main_loop under CPython, on the
+# fake clock: deterministic and faster than real time
+#
+#     python3 replay.py flight.rec [outputs.csv]
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import utime
+from fake_i2c import FakeI2C, validate_result
+from loop_timing import fake_motor
+
+
+def main_pids():
+    # the rate PIDs of main.py
+    from pid import PID
+    return (PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+            PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+            PID(0.2, 0.0, 0.0, out_min=-25, out_max=25))
+
+
+class replay_i2c(FakeI2C):
+    # from play() on, every frame read serves the next recorded burst and
+    # moves the fake clock by the recorded interval
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+        self.index = -1
+        self._playing = False
+        self._ticks = 0
+
+    def play(self):
+        self._playing = True
+        self._ticks = utime.ticks_us()
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        if self._playing and memaddr == 0x3B and len(buf) == 14:
+            from flight_recorder import TICKS_MASK
+            records = self.records
+            self.index += 1
+            i = self.index
+            if i:
+                self._ticks += (records[i][0] - records[i-1][0]) & TICKS_MASK
+            utime.set_us(self._ticks)
+            self.regs[0x3B:0x3B+14] = records[i][1]
+        super().readfrom_mem_into(addr, memaddr, buf)
+
+
+class recorded_channel():
+    # an R8EF_channel polled by RCInput.update(): the recorded sample of
+    # stick i on the rc ticks it was fresh on, none on the others
+    def __init__(self, bus, i):
+        self._bus = bus
+        self._i = i
+        self._bit = 1 << i
+
+    def poll(self):
+        r = self._bus.records[self._bus.index]
+        if r[4] & self._bit:
+            return r[2][self._i]
+        return -1
+
+
+def replay_timer(bus, period_us):
+    # a loop_timer pacing the replay on the fake clock; the controller gets
+    # the dt of the record instead of the one measured here
+    from loop_timer import loop_timer
+
+    class timer(loop_timer):
+        @property
+        def dt_us(self):
+            return bus.records[bus.index][6]
+
+        @property
+        def dt(self):
+            return self.dt_us/1000000
+
+    return timer(period_us)
+
+
+class output_log():
+    # takes the recorder's place in main_loop, keeps the motor outputs and
+    # the flight mode
+    def __init__(self, outputs):
+        self._outputs = outputs
+        self.ticks = []
+        self.modes = []
+
+    @property
+    def records(self):
+        return len(self.ticks)
+
+    @property
+    def dropped(self):
+        return 0
+
+    def record(self, dt_us, mode):
+        self.ticks.append(tuple(self._outputs))
+        self.modes.append(mode)
+
+    def flush(self):
+        pass
+
+
+def load(path):
+    from flight_recorder import read_recording
+    with open(path, 'rb') as f:
+        return read_recording(f)
+
+
+def replay(header, records, control=None, debug=None, prof=None, modes=None):
+    # the motor outputs of every record, as main_loop on the board with the
+    # recording's calibration, control law, starting state, flight mode and
+    # rc failsafe; control: in place of header['control'], e.g. to try other
+    # gains; modes: a list given the flight mode of every tick
+    from imu import MPU6050
+    from pid import PID
+    from flight_controller import flight_ctr, main_loop, LOOP_FREQ
+    from flight_data import flight_data
+    from flight_mode import flight_mode
+    from rc_failsafe import rc_failsafe
+    from rc_input import RCInput
+    from attitude import attitude
+    if header['loop_hz'] != LOOP_FREQ:
+        raise ValueError('recorded at '+str(header['loop_hz'])+'Hz, the loop runs at '+str(LOOP_FREQ)+'Hz')
+    utime.use_fake_clock()
+    try:
+        bus = replay_i2c(records)
+        imu = MPU6050(bus)
+        imu.accel.cal = header['accel_cal']
+        imu.gyro.cal = header['gyro_cal']
+        st_range = header['st_range']
+        c = control or header['control']
+        pids = None
+        if c['pids']:
+            pids = tuple(PID(**g) if g else None for g in c['pids'])
+        fc = flight_ctr('replay', st_range, header['m_ranges'], debug=debug, m_val_cr=c['m_val_cr'],
+                        layout=c['layout'], pids=pids, angle_kp=c['angle_kp'])
+        fc.based_acc_sum = header['based_acc_sum']
+        fc.es_acc_sum = header['es_acc_sum']
+        if c['compiled']:
+            fc.compile()
+        # the mixer as the loop found it, e.g. after acc_sum_escape_g
+        base = fc.mixer.base
+        for j in range(header['motors']):
+            fc.outputs[j] = header['outputs'][j]
+            base[j] = header['base'][j]
+        rc = RCInput([recorded_channel(bus, i) for i in range(len(st_range))], st_range)
+        out = output_log(fc.outputs)
+        motors = [fake_motor() for i in range(header['motors'])]
+        mode = None
+        failsafe = None
+        if header['mode'] or header['failsafe']:
+            mode = flight_mode(fc, motors, LOOP_FREQ, **(header['mode'] or {'arm_seconds': 0}))
+        if header['failsafe']:
+            failsafe = rc_failsafe(rc, mode, **header['failsafe'])
+        bus.play()
+        now = utime.ticks_ms()
+        for i in range(len(st_range)):
+            rc.ticks[i] = utime.ticks_add(now, -header['lost_ms'][i])
+        timer = replay_timer(bus, 1000000//LOOP_FREQ)
+        main_loop(imu, rc, fc, motors, flight_data(), fixed_point=True,
+                  att=attitude(gyro_scale=0.01), ticks=len(records), prof=prof, rec=out,
+                  mode=mode, failsafe=failsafe, timer=timer)
+    finally:
+        utime.use_fake_clock(False)
+    if modes is not None:
+        modes[:] = out.modes
+    return out.ticks
+
+
+def compare(records, outputs):
+    # ticks whose outputs differ from the recording and the largest
+    # difference per motor
+    n = len(records[0][3]) if records else 0
+    diff = [0]*n
+    ticks = 0
+    for r, o in zip(records, outputs):
+        if tuple(r[3]) != tuple(o):
+            ticks += 1
+            for j in range(n):
+                d = abs(r[3][j] - o[j])
+                if d > diff[j]:
+                    diff[j] = d
+    return ticks, diff
+
+
+def write_csv(path, records, outputs):
+    with open(path, 'w') as f:
+        n = len(outputs[0]) if outputs else 0
+        f.write('ticks,'+','.join('m'+str(j) for j in range(n))+'\n')
+        for r, o in zip(records, outputs):
+            f.write(str(r[0])+','+','.join(str(v) for v in o)+'\n')
+
+
+class flight_i2c(FakeI2C):
+    # a drone rocking on roll and pitch with a little noise, one new sample
+    # per frame read; every 37th read stalls the loop past its period, so
+    # the measured dt varies
+    def __init__(self):
+        super().__init__()
+        self.n = 0
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        if memaddr == 0x3B and len(buf) == 14:
+            import random
+            from math import sin, cos
+            t = self.n/500
+            self.n += 1
+            if self.n%37 == 0:
+                utime.advance_us(2500)
+            noise = lambda: int(random.gauss(0, 40))
+            self.set_frame(int(-1500*sin(3*t))+noise(), int(2000*sin(2*t))+noise(), 16000+noise(), 0,
+                           int(800*cos(2*t))+noise(), int(600*cos(3*t))+noise(), noise())
+        super().readfrom_mem_into(addr, memaddr, buf)
+
+
+def record_flight(ticks):
+    # a recording made by main_loop with flight_recorder, as on the board
+    import io
+    import random
+    from imu import MPU6050
+    from flight_controller import flight_ctr, main_loop, LOOP_FREQ
+    from flight_data import flight_data
+    from rc_input import RCInput
+    from attitude import attitude
+    from flight_recorder import flight_recorder
+    random.seed(3)
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    f = io.BytesIO()
+    utime.use_fake_clock()
+    try:
+        imu = MPU6050(flight_i2c())
+        imu.gyro.cal = (3.0, -2.0, 1.0)
+        fc = flight_ctr('fc', st_range, m_ranges, m_val_cr=1.2, pids=main_pids(), angle_kp=3.0)
+        fc.based_acc_sum = 10000
+        fc.es_acc_sum = 10300
+        fc.compile()
+        sticks = [5000.0, 5000.0, 5000.0]
+        frames = [0]
+        class stick():
+            # roll up in steps, pitch and throttle wandering; every third
+            # frame has no throttle pulse
+            def __init__(self, i):
+                self.i = i
+            def poll(self):
+                i = self.i
+                if i == 0:
+                    frames[0] += 1
+                    sticks[0] = min(9000.0, sticks[0] + 40)
+                    sticks[1] = float(random.randint(4800, 5200))
+                    sticks[2] = float(random.randint(4400, 5400))
+                elif i == 2 and frames[0]%3 == 0:
+                    return -1
+                return sticks[i]
+        rc = RCInput([stick(i) for i in range(3)], st_range)
+        rec = flight_recorder(f, imu, rc, fc, LOOP_FREQ)
+        main_loop(imu, rc, fc, [fake_motor() for i in range(4)], flight_data(), fixed_point=True,
+                  att=attitude(gyro_scale=0.01), ticks=ticks, rec=rec)
+    finally:
+        utime.use_fake_clock(False)
+    validate_result(ticks, rec.records)
+    validate_result(0, rec.dropped)
+    f.seek(0)
+    return f
+
+
+def test_record_replay():
+    # the replay reproduces the recorded outputs of every tick, twice over
+    from flight_recorder import read_recording
+    from mixer import MIXER_LAYOUTS
+    header, records = read_recording(record_flight(1000))
+    validate_result(1000, len(records))
+    validate_result([[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]], header['st_range'])
+    validate_result((3.0, -2.0, 1.0), header['gyro_cal'])
+    control = header['control']
+    validate_result((1.2, 3.0, True), (control['m_val_cr'], control['angle_kp'], control['compiled']))
+    validate_result([tuple(row) for row in MIXER_LAYOUTS['quad_x']], [tuple(row) for row in control['layout']])
+    validate_result([(0.2, 0.4, 0.002, 20.0), (0.2, 0.4, 0.002, 20.0), (0.2, 0.0, 0.0, 0.0)],
+                    [(g['kp'], g['ki'], g['kd'], g['d_cutoff']) for g in control['pids']])
+    validate_result([0, 3, 7], sorted(set(r[4] for r in records))) # 0: before the first rc tick
+    validate_result(True, len(set(r[6] for r in records)) > 2)
+    outputs = replay(header, records)
+    validate_result(1000, len(outputs))
+    validate_result((0, [0, 0, 0, 0]), compare(records, outputs))
+    validate_result(outputs, replay(header, records))
+    # a different controller gives different outputs
+    for change in ({'pids': None}, {'angle_kp': 4.0}, {'m_val_cr': 1.0}):
+        control = dict(header['control'], **change)
+        validate_result(True, compare(records, replay(header, records, control))[0] > 0)
+
+
+def test_truncated():
+    # a record cut short by a power loss is left out
+    import io
+    from flight_recorder import read_recording
+    data = record_flight(10).getvalue()
+    header, records = read_recording(io.BytesIO(data[:-5]))
+    validate_result(9, len(records))
+    try:
+        read_recording(io.BytesIO(b'XXXX'+data[4:]))
+        validate_result('ValueError', None)
+    except ValueError:
+        pass
+
+
+def bench_replay(header, records):
+    import time
+    t0 = time.perf_counter()
+    replay(header, records)
+    wall = time.perf_counter() - t0
+    flight = len(records)/header['loop_hz']
+    print('replayed {} ticks, {:.1f}s of flight in {:.2f}s, {:.1f}x real time'.format(
+        len(records), flight, wall, flight/wall))
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if len(sys.argv) > 1:
+        header, records = load(sys.argv[1])
+        outputs = replay(header, records)
+        ticks, diff = compare(records, outputs)
+        print('{} of {} ticks differ from the recording, max difference per motor: {}'.format(
+            ticks, len(records), diff))
+        if len(sys.argv) > 2:
+            write_csv(sys.argv[2], records, outputs)
+        bench_replay(header, records)
+    else:
+        from flight_recorder import read_recording
+        test_record_replay()
+        test_truncated()
+        bench_replay(*read_recording(record_flight(5000)))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# Replays synthetic motion with known ground truth through the attitude
+# estimator and measures the cost of one update.
+#
+#     cd host && python3 replay_attitude.py
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import random
+from math import sin, cos, sqrt, radians, pi
+from utime import ticks_us, ticks_diff
+from fake_i2c import validate_result
+
+RATE = 1000         # Hz, full MPU-6050 sample rate with the low pass filter on
+SECONDS = 10
+SETTLE = 1          # seconds ignored while the filter converges
+
+
+def truth(t):
+    # roll and pitch (degrees) and yaw rate (degrees/s) at time t,
+    # and their derivatives
+    roll = 20*sin(2*pi*0.5*t)
+    pitch = 10*sin(2*pi*0.3*t)
+    droll = 20*2*pi*0.5*cos(2*pi*0.5*t)
+    dpitch = 10*2*pi*0.3*cos(2*pi*0.3*t)
+    dyaw = 30
+    return roll, pitch, droll, dpitch, dyaw
+
+
+def sensors(t, noise=True):
+    # accelerometer (g) and gyro (degrees/s) of a drone following truth(t)
+    roll, pitch, droll, dpitch, dyaw = truth(t)
+    r = radians(roll)
+    p = radians(pitch)
+    acc = [-sin(p), sin(r)*cos(p), cos(r)*cos(p)]
+    # euler rates to body rates
+    gyro = [droll - dyaw*sin(p),
+            dpitch*cos(r) + dyaw*cos(p)*sin(r),
+            -dpitch*sin(r) + dyaw*cos(p)*cos(r)]
+    if noise:
+        for i in range(3):
+            acc[i] += random.gauss(0, 0.02)
+            gyro[i] += random.gauss(0, 0.5) + 0.3   # noise plus a bias
+    return acc, gyro, roll, pitch
+
+
+def replay(mode):
+    from attitude import attitude
+    att = attitude(mode=mode)
+    random.seed(1)
+    sq = [0.0, 0.0]
+    count = 0
+    for i in range(RATE*SECONDS):
+        t = i/RATE
+        acc, gyro, roll, pitch = sensors(t)
+        att.update(acc, gyro, i*1000000//RATE)
+        if t >= SETTLE:
+            sq[0] += (att.roll-roll)**2
+            sq[1] += (att.pitch-pitch)**2
+            count += 1
+    return sqrt(sq[0]/count), sqrt(sq[1]/count)
+
+
+def test_attitude():
+    from attitude import COMPLEMENTARY, MAHONY
+    for mode, name in ((COMPLEMENTARY, 'complementary'), (MAHONY, 'mahony')):
+        roll_rms, pitch_rms = replay(mode)
+        print('{:<14} rms error roll {:.2f} deg, pitch {:.2f} deg'.format(name, roll_rms, pitch_rms))
+        validate_result(True, roll_rms < 2.0 and pitch_rms < 2.0)
+
+
+def bench_attitude(n=10000):
+    from attitude import attitude, COMPLEMENTARY, MAHONY
+    acc, gyro, roll, pitch = sensors(0.3, noise=False)
+    for mode, name in ((COMPLEMENTARY, 'complementary'), (MAHONY, 'mahony')):
+        att = attitude(mode=mode)
+        att.update(acc, gyro, 0)
+        t0 = ticks_us()
+        for i in range(1, n+1):
+            att.update(acc, gyro, i*1000)
+        us = ticks_diff(ticks_us(), t0)
+        print('{:<14} {:.2f} us/update'.format(name, us/n))
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_attitude()
+    bench_attitude()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# rp2 stand-in for running PicoDrone modules under CPython
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import machine
+
+
+class PIO():
+    IN_LOW = 0
+    IN_HIGH = 1
+    OUT_LOW = 2
+    OUT_HIGH = 3
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+
+
+def asm_pio(**kw):
+    # the PIO program is never assembled on the host, the StateMachine
+    # below delivers what it would push
+    return lambda prog: prog
+
+
+class StateMachine():
+    # get() and rx_fifo() serve the pulse widths of the quad_sim pilot on
+    # channel id; with no simulation a centred stick
+    def __init__(self, id, prog=None, freq=-1, **kw):
+        self.id = id
+        self._active = 0
+
+    def active(self, x=None):
+        if x is None:
+            return self._active
+        self._active = x
+
+    def get(self, buf=None, shift=0):
+        sim = machine._sim
+        if sim:
+            return sim.rc_get(self.id) >> shift
+        return (int(1.5/24e-6) - 1) ^ 0xffffffff
+
+    def rx_fifo(self):
+        sim = machine._sim
+        if sim:
+            return sim.rc_fifo(self.id)
+        return 1
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# sample_buffer: top-k ranking against a sort, ties and a full buffer
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import random
+from fake_i2c import validate_result
+
+
+def test_sample_buffer():
+    from sample_buffer import sample_buffer
+    random.seed(5)
+    for largest in (True, False):
+        for n in (0, 3, 5, 40, 500):
+            b = sample_buffer(['i', 'v'], 500, 'v', k=5, largest=largest)
+            rows = []
+            for i in range(n):
+                j = b.slot()
+                b.columns[0][j] = i
+                b.columns[1][j] = random.randint(-20, 20) # plenty of ties
+                b.commit()
+                rows.append({'i': i, 'v': b.columns[1][j]})
+            expected = [r['i'] for r in sorted(rows, key=lambda x: x['v'], reverse=largest)[:5]]
+            validate_result(expected, b.top())
+    # full: later samples are counted, not kept
+    b = sample_buffer(['i', 'v'], 2, 'v')
+    for i in range(3):
+        j = b.slot()
+        if j >= 0:
+            b.columns[1][j] = i
+        b.commit()
+    validate_result(-1, b.slot())
+    validate_result((2, 1), (b.count, b.dropped))
+    lines = []
+    b.dump(lines.append)
+    validate_result(["    { 'i':0, 'v':0,}", "    { 'i':0, 'v':1,}"], lines)
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_sample_buffer()
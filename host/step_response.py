@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# step response of the PID rate controller on a simulated plant
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from fake_i2c import validate_result
+
+# one axis of the airframe: the motors follow the demand with a first order
+# lag, the rate follows the motor thrust against a linear drag
+MOTOR_TAU = 0.03    # s
+PLANT_GAIN = 40.0   # degrees/s^2 per motor unit
+PLANT_DRAG = 2.0    # 1/s
+PLANT_LIMIT = 25.0  # motor units the motors can add or take away
+SUBSTEPS = 10       # plant steps per controller step
+
+
+class plant():
+    def __init__(self):
+        self.thrust = 0.0
+        self.rate = 0.0
+
+    def step(self, demand, dt):
+        if demand > PLANT_LIMIT:
+            demand = PLANT_LIMIT
+        elif demand < -PLANT_LIMIT:
+            demand = -PLANT_LIMIT
+        h = dt/SUBSTEPS
+        for i in range(SUBSTEPS):
+            self.thrust += (demand - self.thrust)*h/MOTOR_TAU
+            self.rate += (PLANT_GAIN*self.thrust - PLANT_DRAG*self.rate)*h
+
+
+def step_response(pid, setpoint=100.0, dt=0.01, duration=1.5, p=None, hold=None):
+    # hold: (value, seconds) forces the plant rate before the step, as a
+    # stuck airframe would, to show integral windup
+    if p is None:
+        p = plant()
+    log = []
+    t = 0.0
+    while t < duration:
+        out = pid.update(setpoint, p.rate, dt)
+        p.step(out, dt)
+        if hold and t < hold[1]:
+            p.rate = hold[0]
+            p.thrust = 0.0
+        log.append((t, p.rate, out))
+        t += dt
+    return log
+
+
+def metrics(log, setpoint, start=0.0):
+    # delay to 10%, rise time 10-90%, overshoot in percent, 2% settling
+    # time, final error; times from the step
+    rise_10 = rise_90 = settle = None
+    peak = 0.0
+    for t, rate, out in log:
+        if t < start:
+            continue
+        if rise_10 is None and rate >= 0.1*setpoint:
+            rise_10 = t - start
+        if rise_90 is None and rate >= 0.9*setpoint:
+            rise_90 = t - start
+        if rate > peak:
+            peak = rate
+        if abs(rate - setpoint) > 0.02*setpoint:
+            settle = None
+        elif settle is None:
+            settle = t - start
+    rise = None
+    if rise_10 is not None and rise_90 is not None:
+        rise = rise_90 - rise_10
+    overshoot = max(0.0, (peak - setpoint)/setpoint*100)
+    return rise_10, rise, overshoot, settle, setpoint - log[-1][1]
+
+
+def show(name, m):
+    delay, rise, overshoot, settle, err = m
+    print('    {:<34} delay {:>6} rise {:>6} overshoot {:>5.1f}% settle {:>6} error {:>6.2f}'.format(
+          name,
+          '-' if delay is None else '{:.3f}s'.format(delay),
+          '-' if rise is None else '{:.3f}s'.format(rise),
+          overshoot,
+          '-' if settle is None else '{:.3f}s'.format(settle),
+          err))
+
+
+def rate_pid(**kw):
+    from pid import PID
+    gains = dict(kp=0.2, ki=0.4, kd=0.002, out_min=-PLANT_LIMIT, out_max=PLANT_LIMIT, i_limit=10.0, d_cutoff=20.0)
+    gains.update(kw)
+    return PID(**gains)
+
+
+def test_step_response():
+    print('step response, 100 degrees/s at 100Hz:')
+    m = metrics(step_response(rate_pid(ki=0.0)), 100.0)
+    show('P only', m)
+    validate_result(True, m[4] > 5.0) # a steady state error is left
+
+    m = metrics(step_response(rate_pid()), 100.0)
+    show('PID', m)
+    validate_result(True, m[2] < 15.0)
+    validate_result(True, m[3] is not None and m[3] < 0.5)
+    validate_result(True, abs(m[4]) < 2.0)
+
+    m = metrics(step_response(rate_pid(kff=0.02)), 100.0)
+    show('PID + feed-forward', m)
+    validate_result(True, m[2] < 15.0)
+
+
+def test_windup():
+    print('windup, rate held at 0 for 1s:')
+    naive = rate_pid(out_min=-1e6, out_max=1e6, i_limit=1e6) # only the motors limit it
+    m = metrics(step_response(naive, duration=3.0, hold=(0.0, 1.0)), 100.0, start=1.0)
+    show('no anti-windup', m)
+    m_clamped = metrics(step_response(rate_pid(), duration=3.0, hold=(0.0, 1.0)), 100.0, start=1.0)
+    show('clamped + conditional integration', m_clamped)
+    validate_result(True, m_clamped[2] <= m[2])
+    validate_result(True, m_clamped[2] < 20.0)
+
+
+def test_derivative_on_measurement():
+    # a setpoint step moves the output by kp*step only, no derivative kick
+    pid = rate_pid(ki=0.0, kd=0.1, d_cutoff=0.0, out_min=-1e6, out_max=1e6)
+    pid.update(0.0, 0.0, 0.01)
+    out = pid.update(100.0, 0.0, 0.01)
+    validate_result(round(0.2*100.0, 3), round(out, 3))
+    # a measurement step does kick it, through the low pass when set
+    raw = rate_pid(ki=0.0, kp=0.0, kd=0.1, d_cutoff=0.0)
+    filtered = rate_pid(ki=0.0, kp=0.0, kd=0.1, d_cutoff=5.0)
+    for pid in (raw, filtered):
+        pid.update(0.0, 0.0, 0.01)
+    a = raw.update(0.0, 1.0, 0.01)
+    b = filtered.update(0.0, 1.0, 0.01)
+    validate_result(True, a < b < 0)
+    print('derivative kick on a measurement step: {:.2f} raw, {:.2f} low passed'.format(a, b))
+
+
+def test_rate_control():
+    # a right side down roll (+ay) is levelled by lifting the right side,
+    # back down pitch (+ax) by lifting the back: both demands positive
+    from flight_controller import flight_ctr
+    st_range = [[0, 4888, 9928], [0, 5031, 9966], [0, 4925, 9920]]
+    m_ranges = [[110, 7800, 50, 8500], [215, 5700, 100, 8400],
+                [545, 7900, 400, 8700], [3750, 6400, 3600, 8700]]
+    fc = flight_ctr('fc', st_range, m_ranges,
+                    pids=(rate_pid(), rate_pid(), rate_pid(ki=0.0)))
+    fc.frame.set_att([10.0, -5.0, 0.0])
+    fc.frame.ticks = 0
+    fc.motor_pwn_values()
+    fc.frame.ticks = 10000
+    fc.motor_pwn_values()
+    validate_result(True, fc.demands[1] > 0)
+    validate_result(True, fc.demands[2] > 0)
+    validate_result(0.0, fc.demands[3])
+
+
+if __name__=='__main__':
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    test_step_response()
+    test_windup()
+    test_derivative_on_measurement()
+    test_rate_control()
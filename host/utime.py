@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# utime stand-in for running PicoDrone modules under CPython
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+import time
+
+# ticks wrap at 2**30 as on MicroPython, so ticks fit the firmware's
+# array('i') stores and only ticks_diff() and ticks_add() give intervals
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD >> 1
+
+# fake clock: when on, ticks only move by sleeping or advance_us(), so loop
+# timing can be checked independent of the host's speed
+_fake = False
+_fake_us = 0
+
+
+def use_fake_clock(on=True, start_us=0):
+    global _fake, _fake_us
+    _fake = on
+    _fake_us = start_us
+
+
+def advance_us(us):
+    # work that takes us microseconds on the fake clock
+    global _fake_us
+    _fake_us += int(us)
+
+
+def fake_us():
+    # the fake clock, not wrapped, e.g. for a simulation running for hours
+    return _fake_us
+
+
+def set_us(us):
+    # move the fake clock to us, e.g. a recorded timestamp
+    global _fake_us
+    _fake_us = int(us)
+
+
+def sleep(s):
+    if _fake:
+        advance_us(s*1000000)
+    else:
+        time.sleep(s)
+
+
+def sleep_ms(ms):
+    if _fake:
+        advance_us(ms*1000)
+    else:
+        time.sleep(ms/1000)
+
+
+def sleep_us(us):
+    if _fake:
+        advance_us(us)
+    else:
+        time.sleep(us/1000000)
+
+
+def ticks_ms():
+    if _fake:
+        return (_fake_us//1000) & TICKS_MAX
+    return int(time.monotonic_ns()//1000000) & TICKS_MAX
+
+
+def ticks_us():
+    if _fake:
+        return _fake_us & TICKS_MAX
+    return int(time.monotonic_ns()//1000) & TICKS_MAX
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + TICKS_HALF) & TICKS_MAX) - TICKS_HALF
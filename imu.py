@@ -33,12 +33,18 @@ THE SOFTWARE.
 # myimu = MPU9250('X')
 # magx = myimu.mag.x
 # accelxyz = myimu.accel.xyz
+# Configuration registers (range, filter, sample rate, passthrough) are shadowed:
+# setters write the device and update a cached copy, getters return the copy.
+# Call refresh() to reload the shadow registers from the device.
 # Error handling: on code used for initialisation, abort with message
 # At runtime try to continue returning last good data value. We don't want aircraft
 # crashing. However if the I2C has crashed we're probably stuffed.
 
-from utime import sleep_ms
-from machine import I2C
+from array import array
+from struct import unpack_from
+from math import floor
+from utime import sleep_ms, ticks_us
+from machine import I2C, idle
 from vector3d import Vector3d
 
 
@@ -57,7 +63,54 @@ def bytes_toint(msb, lsb):
     '''
     if not msb & 0x80:
         return msb << 8 | lsb  # +ve
-    return - (((msb ^ 255) << 8) | (lsb ^ 255) + 1)
+    return - ((((msb ^ 255) << 8) | (lsb ^ 255)) + 1)
+
+
+def decode_frame(buf, out, coef, index):
+    '''
+    Decode a 14 byte accel, temperature, gyro frame (registers 0x3B-0x48)
+    with one unpack_from and apply transposition, offset and scale in a
+    single pass: out[i] = raw[index[i]]*coef[i] - coef[i+7].
+    out receives ax, ay, az (g), temperature (C), gx, gy, gz (degrees/s).
+    The tuple returned by unpack_from is the only object created.
+    '''
+    raw = unpack_from('>7h', buf)
+    for i in range(7):
+        out[i] = raw[index[i]]*coef[i] - coef[i+7]
+
+
+def decode_frame_fixed(buf, out, coef, index):
+    '''
+    Integer only version of decode_frame(). out receives ax, ay, az
+    (centi-g), temperature (centi-C), gx, gy, gz (centi-degrees/s), rounded.
+    Each multiplier m and offset o is split in an integer part and a 15 bit
+    fraction: coef[i] = floor(m), coef[i+7] = frac(m) << 15, likewise
+    coef[i+14], coef[i+21] for o. Every intermediate fits a MicroPython
+    small int, so no float or long int is created.
+    '''
+    raw = unpack_from('>7h', buf)
+    for i in range(7):
+        val = raw[index[i]]
+        out[i] = val*coef[i] - coef[i+14] + ((val*coef[i+7] - coef[i+21] + 16384) >> 15)
+
+
+def _split_fixed(coef, i, val):
+    '''
+    Store val as integer part coef[i] and 15 bit fraction coef[i+7]
+    '''
+    whole = int(floor(val))
+    frac = int((val - whole)*32768 + 0.5)
+    if frac == 32768:
+        whole += 1
+        frac = 0
+    coef[i] = whole
+    coef[i+7] = frac
+
+
+_ACCEL_LSB = (16384, 8192, 4096, 2048)      # LSB per g for accel_range 0-3
+_GYRO_LSB = (131, 65.5, 32.8, 16.4)         # LSB per degree/s for gyro_range 0-3
+_FIFO_SIZE = 1024                           # bytes of FIFO on the device
+_FIFO_PACKET = 12                           # accel xyz + gyro xyz, 2 bytes each
 
 
 class MPU6050(object):
@@ -78,6 +131,32 @@ class MPU6050(object):
         self.buf2 = bytearray(2)                # be done in interrupt handlers
         self.buf3 = bytearray(3)
         self.buf6 = bytearray(6)
+        self.buf14 = bytearray(14)              # accel, temperature and gyro in one burst
+        self._frame = array('f', [0]*7)         # Last frame decoded by decode()
+        self._fixed_frame = array('i', [0]*7)   # Last frame decoded by decode_fixed()
+        self._frame_coef = array('f', [0]*14)   # scale and offset per frame value
+        self._fixed_coef = array('i', [0]*28)   # the same for decode_frame_fixed()
+        self._frame_index = bytearray(7)        # raw value used for each frame value
+        self._coef_cal = -1                     # Vector3d._cal_seq the coefficients were built for
+        self._coef_gcal = -1
+        self.transactions = 0                   # I2C transactions issued, for profiling
+        self._passthrough = False               # Shadow registers, see refresh()
+        self._sample_rate = 0
+        self._filter_range = 0
+        self._accel_range = 0
+        self._gyro_range = 0
+        self._user_ctrl = 0
+        self._int_enable = 0
+        self._accel_scale = 1/_ACCEL_LSB[0]     # Reciprocal of the current LSB per unit
+        self._gyro_scale = 1/_GYRO_LSB[0]
+        self._fifo_buf = None                   # Allocated by fifo_enable()
+        self.fifo_samples = None
+        self.fifo_overflows = 0
+        self._drdy_pin = None                   # Data ready interrupt, see drdy_enable()
+        self._drdy_bufs = (bytearray(14), bytearray(14))
+        self._drdy_ticks = array('i', [0, 0])
+        self._drdy_seq = 0
+        self.frame_ticks = 0                    # ticks_us() when the current frame was latched
 
         sleep_ms(200)                           # Ensure PSU and device have settled
         if isinstance(side_str, str):           # Non-pyb targets may use other than X or Y
@@ -108,12 +187,14 @@ class MPU6050(object):
         self.passthrough = True                 # Enable mag access from main I2C bus
         self.accel_range = 0                    # default to highest sensitivity
         self.gyro_range = 0                     # Likewise for gyro
+        self.refresh()                          # Load the remaining shadow registers
 
     # read from device
     def _read(self, buf, memaddr, addr):        # addr = I2C device address, memaddr = memory location within the I2C device
         '''
         Read bytes to pre-allocated buffer Caller traps OSError.
         '''
+        self.transactions += 1
         self._mpu_i2c.readfrom_mem_into(addr, memaddr, buf)
 
     # write to device
@@ -121,6 +202,7 @@ class MPU6050(object):
         '''
         Perform a memory write. Caller should trap OSError.
         '''
+        self.transactions += 1
         self.buf1[0] = data
         self._mpu_i2c.writeto_mem(addr, memaddr, self.buf1)
 
@@ -146,6 +228,30 @@ class MPU6050(object):
             raise MPUException(self._I2Cerror)
         return 'asleep'
 
+    # shadow registers
+    def refresh(self):
+        '''
+        Reload the shadow copies of the configuration registers from the
+        device. Only needed if the device may have been reconfigured without
+        going through this driver, e.g. after a reset.
+        '''
+        try:
+            self._read(self.buf1, 0x19, self.mpu_addr)
+            self._sample_rate = self.buf1[0]
+            self._read(self.buf1, 0x1A, self.mpu_addr)
+            self._filter_range = self.buf1[0] & 7
+            self._read(self.buf1, 0x1B, self.mpu_addr)
+            self._gyro_range = (self.buf1[0] >> 3) & 3
+            self._read(self.buf1, 0x1C, self.mpu_addr)
+            self._accel_range = (self.buf1[0] >> 3) & 3
+            self._read(self.buf1, 0x37, self.mpu_addr)
+            self._passthrough = self.buf1[0] & 0x02 > 0
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        self._accel_scale = 1/_ACCEL_LSB[self._accel_range]
+        self._gyro_scale = 1/_GYRO_LSB[self._gyro_range]
+        self._coef_cal = -1
+
     # chip_id
     @property
     def chip_id(self):
@@ -180,17 +286,21 @@ class MPU6050(object):
             raise MPUException(self._I2Cerror)
         return bytes_toint(self.buf2[0], self.buf2[1])/340 + 35  # I think
 
+    @property
+    def last_temperature(self):
+        '''
+        Returns the temperature in degree C captured by the most recent
+        read_all() or decode(). Does not access the device.
+        '''
+        return self._frame[3]
+
     # passthrough
     @property
     def passthrough(self):
         '''
         Returns passthrough mode True or False
         '''
-        try:
-            self._read(self.buf1, 0x37, self.mpu_addr)
-            return self.buf1[0] & 0x02 > 0
-        except OSError:
-            raise MPUException(self._I2Cerror)
+        return self._passthrough
 
     @passthrough.setter
     def passthrough(self, mode):
@@ -201,9 +311,10 @@ class MPU6050(object):
             val = 2 if mode else 0
             try:
                 self._write(val, 0x37, self.mpu_addr)  # I think this is right.
-                self._write(0x00, 0x6A, self.mpu_addr)
+                self._write(self._user_ctrl, 0x6A, self.mpu_addr)
             except OSError:
                 raise MPUException(self._I2Cerror)
+            self._passthrough = mode
         else:
             raise ValueError('pass either True or False')
 
@@ -215,11 +326,7 @@ class MPU6050(object):
         SAMPLE_RATE= Internal_Sample_Rate / (1 + rate)
         default rate is zero i.e. sample at internal rate.
         '''
-        try:
-            self._read(self.buf1, 0x19, self.mpu_addr)
-            return self.buf1[0]
-        except OSError:
-            raise MPUException(self._I2Cerror)
+        return self._sample_rate
 
     @sample_rate.setter
     def sample_rate(self, rate):
@@ -232,6 +339,7 @@ class MPU6050(object):
             self._write(rate, 0x19, self.mpu_addr)
         except OSError:
             raise MPUException(self._I2Cerror)
+        self._sample_rate = rate
 
     # Low pass filters. Using the filter_range property of the MPU9250 is
     # harmless but gyro_filter_range is preferred and offers an extra setting.
@@ -243,12 +351,7 @@ class MPU6050(object):
         Cutoff (Hz):        250 184 92  41  20  10  5
         Sample rate (KHz):  8   1   1   1   1   1   1
         '''
-        try:
-            self._read(self.buf1, 0x1A, self.mpu_addr)
-            res = self.buf1[0] & 7
-        except OSError:
-            raise MPUException(self._I2Cerror)
-        return res
+        return self._filter_range
 
     @filter_range.setter
     def filter_range(self, filt):
@@ -264,6 +367,7 @@ class MPU6050(object):
                 self._write(filt, 0x1A, self.mpu_addr)
             except OSError:
                 raise MPUException(self._I2Cerror)
+            self._filter_range = filt
         else:
             raise ValueError('Filter coefficient must be between 0 and 6')
 
@@ -275,12 +379,7 @@ class MPU6050(object):
         Value:              0   1   2   3
         for range +/-:      2   4   8   16  g
         '''
-        try:
-            self._read(self.buf1, 0x1C, self.mpu_addr)
-            ari = self.buf1[0]//8
-        except OSError:
-            raise MPUException(self._I2Cerror)
-        return ari
+        return self._accel_range
 
     @accel_range.setter
     def accel_range(self, accel_range):
@@ -295,6 +394,9 @@ class MPU6050(object):
                 self._write(ar_bytes[accel_range], 0x1C, self.mpu_addr)
             except OSError:
                 raise MPUException(self._I2Cerror)
+            self._accel_range = accel_range
+            self._accel_scale = 1/_ACCEL_LSB[accel_range]
+            self._coef_cal = -1
         else:
             raise ValueError('accel_range can only be 0, 1, 2 or 3')
 
@@ -306,13 +408,7 @@ class MPU6050(object):
         Value:              0   1   2    3
         for range +/-:      250 500 1000 2000  degrees/second
         '''
-        # set range
-        try:
-            self._read(self.buf1, 0x1B, self.mpu_addr)
-            gri = self.buf1[0]//8
-        except OSError:
-            raise MPUException(self._I2Cerror)
-        return gri
+        return self._gyro_range
 
     @gyro_range.setter
     def gyro_range(self, gyro_range):
@@ -327,6 +423,9 @@ class MPU6050(object):
                 self._write(gr_bytes[gyro_range], 0x1B, self.mpu_addr)  # Sets fchoice = b11 which enables filter
             except OSError:
                 raise MPUException(self._I2Cerror)
+            self._gyro_range = gyro_range
+            self._gyro_scale = 1/_GYRO_LSB[gyro_range]
+            self._coef_cal = -1
         else:
             raise ValueError('gyro_range can only be 0, 1, 2 or 3')
 
@@ -349,10 +448,10 @@ class MPU6050(object):
         self._accel._ivector[0] = bytes_toint(self.buf6[0], self.buf6[1])
         self._accel._ivector[1] = bytes_toint(self.buf6[2], self.buf6[3])
         self._accel._ivector[2] = bytes_toint(self.buf6[4], self.buf6[5])
-        scale = (16384, 8192, 4096, 2048)
-        self._accel._vector[0] = self._accel._ivector[0]/scale[self.accel_range]
-        self._accel._vector[1] = self._accel._ivector[1]/scale[self.accel_range]
-        self._accel._vector[2] = self._accel._ivector[2]/scale[self.accel_range]
+        scale = self._accel_scale
+        self._accel._vector[0] = self._accel._ivector[0]*scale
+        self._accel._vector[1] = self._accel._ivector[1]*scale
+        self._accel._vector[2] = self._accel._ivector[2]*scale
 
     def get_accel_irq(self):
         '''
@@ -383,10 +482,10 @@ class MPU6050(object):
         self._gyro._ivector[0] = bytes_toint(self.buf6[0], self.buf6[1])
         self._gyro._ivector[1] = bytes_toint(self.buf6[2], self.buf6[3])
         self._gyro._ivector[2] = bytes_toint(self.buf6[4], self.buf6[5])
-        scale = (131, 65.5, 32.8, 16.4)
-        self._gyro._vector[0] = self._gyro._ivector[0]/scale[self.gyro_range]
-        self._gyro._vector[1] = self._gyro._ivector[1]/scale[self.gyro_range]
-        self._gyro._vector[2] = self._gyro._ivector[2]/scale[self.gyro_range]
+        scale = self._gyro_scale
+        self._gyro._vector[0] = self._gyro._ivector[0]*scale
+        self._gyro._vector[1] = self._gyro._ivector[1]*scale
+        self._gyro._vector[2] = self._gyro._ivector[2]*scale
 
     def get_gyro_irq(self):
         '''
@@ -397,3 +496,312 @@ class MPU6050(object):
         self._gyro._ivector[0] = bytes_toint(self.buf6[0], self.buf6[1])
         self._gyro._ivector[1] = bytes_toint(self.buf6[2], self.buf6[3])
         self._gyro._ivector[2] = bytes_toint(self.buf6[4], self.buf6[5])
+
+    # Burst read
+    def read_all(self):
+        '''
+        Update accelerometer, temperature and gyroscope from one 14 byte
+        burst read of registers 0x3B-0x48, so all values come from the same
+        sample. One I2C transaction instead of one per property access.
+        '''
+        self.read_frame()
+        self._decode_all()
+
+    def read_frame(self):
+        '''
+        Burst read one frame into buf14 for decode() or decode_fixed()
+        '''
+        try:
+            self._read(self.buf14, 0x3B, self.mpu_addr)
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        self.frame_ticks = ticks_us()
+
+    def _decode_all(self):
+        '''
+        Decode the 14 byte frame in buf14 into the Vector3d objects
+        '''
+        ax, ay, az, tem, gx, gy, gz = unpack_from('>7h', self.buf14)
+        self._accel._ivector[0] = ax
+        self._accel._ivector[1] = ay
+        self._accel._ivector[2] = az
+        self._frame[3] = tem/340 + 35
+        self._gyro._ivector[0] = gx
+        self._gyro._ivector[1] = gy
+        self._gyro._ivector[2] = gz
+        scale = self._accel_scale
+        self._accel._vector[0] = self._accel._ivector[0]*scale
+        self._accel._vector[1] = self._accel._ivector[1]*scale
+        self._accel._vector[2] = self._accel._ivector[2]*scale
+        scale = self._gyro_scale
+        self._gyro._vector[0] = self._gyro._ivector[0]*scale
+        self._gyro._vector[1] = self._gyro._ivector[1]*scale
+        self._gyro._vector[2] = self._gyro._ivector[2]*scale
+
+    def _coefficients(self):
+        '''
+        Returns the decode_frame() coefficients, rebuilt together with the
+        decode_frame_fixed() ones only when a range or a Vector3d calibration
+        has changed since the last call.
+        '''
+        acc = self._accel
+        gyro = self._gyro
+        if self._coef_cal == acc._cal_seq and self._coef_gcal == gyro._cal_seq:
+            return self._frame_coef
+        coef = self._frame_coef
+        index = self._frame_index
+        for i in range(3):
+            index[i] = acc._transpose[i]
+            coef[i] = self._accel_scale*acc._scale[i]
+            coef[i+7] = acc._offset[i]
+            index[i+4] = 4 + gyro._transpose[i]
+            coef[i+4] = self._gyro_scale*gyro._scale[i]
+            coef[i+11] = gyro._offset[i]
+        index[3] = 3
+        coef[3] = 1/340
+        coef[10] = -35
+        fixed = self._fixed_coef
+        for i in range(3):
+            _split_fixed(fixed, i, 100*self._accel_scale*acc._scale[i])
+            _split_fixed(fixed, i+14, 100*acc._offset[i])
+            _split_fixed(fixed, i+4, 100*self._gyro_scale*gyro._scale[i])
+            _split_fixed(fixed, i+18, 100*gyro._offset[i])
+        _split_fixed(fixed, 3, 100/340)
+        _split_fixed(fixed, 17, -3500)
+        self._coef_cal = acc._cal_seq
+        self._coef_gcal = gyro._cal_seq
+        return coef
+
+    def read_into(self, out):
+        '''
+        Burst read one frame and decode it into the caller's 7 element
+        array('f') as ax, ay, az (g), temperature (C), gx, gy, gz (degrees/s),
+        corrected and vehicle relative like Vector3d.xyz. Unlike read_all()
+        the Vector3d objects are not updated.
+        '''
+        self.read_frame()
+        decode_frame(self.buf14, out, self._coefficients(), self._frame_index)
+
+    def read_fixed_into(self, out):
+        '''
+        As read_into(), but out receives integers: ax, ay, az (centi-g),
+        temperature (centi-C), gx, gy, gz (centi-degrees/s). No float is
+        involved, which matters on targets without an FPU.
+        '''
+        self.read_frame()
+        self._coefficients()
+        decode_frame_fixed(self.buf14, out, self._fixed_coef, self._frame_index)
+
+    def decode(self, accel_vals, gyro_vals):
+        '''
+        Decode the frame in buf14 (see read_all() and wait_frame()) and copy
+        the corrected, vehicle relative values into the caller's 3 element
+        lists. Returns the temperature in degree C.
+        '''
+        frame = self._frame
+        decode_frame(self.buf14, frame, self._coefficients(), self._frame_index)
+        accel_vals[0] = frame[0]
+        accel_vals[1] = frame[1]
+        accel_vals[2] = frame[2]
+        gyro_vals[0] = frame[4]
+        gyro_vals[1] = frame[5]
+        gyro_vals[2] = frame[6]
+        return frame[3]
+
+    def decode_fixed(self, accel_cvals, gyro_cvals):
+        '''
+        As decode(), in centi-g and centi-degrees/s integers. Returns the
+        temperature in centi-C.
+        '''
+        frame = self._fixed_frame
+        self._coefficients()
+        decode_frame_fixed(self.buf14, frame, self._fixed_coef, self._frame_index)
+        accel_cvals[0] = frame[0]
+        accel_cvals[1] = frame[1]
+        accel_cvals[2] = frame[2]
+        gyro_cvals[0] = frame[4]
+        gyro_cvals[1] = frame[5]
+        gyro_cvals[2] = frame[6]
+        return frame[3]
+
+    def snapshot(self, accel_vals, gyro_vals):
+        '''
+        Burst read one coherent frame and copy the corrected, vehicle relative
+        values into the caller's 3 element lists. Returns the temperature in
+        degree C.
+        '''
+        self.read_frame()
+        return self.decode(accel_vals, gyro_vals)
+
+    def snapshot_fixed(self, accel_cvals, gyro_cvals):
+        '''
+        As snapshot(), in centi-g and centi-degrees/s integers. Returns the
+        temperature in centi-C.
+        '''
+        self.read_frame()
+        return self.decode_fixed(accel_cvals, gyro_cvals)
+
+    # FIFO
+    def fifo_enable(self, max_samples=64):
+        '''
+        Start batched acquisition. Accelerometer and gyro samples are queued
+        in the device FIFO at the sample rate (1kHz with filter_range 1-6 and
+        sample_rate 0) and fetched by fifo_read() in block reads of up to
+        max_samples samples. Buffers are allocated here, not per read.
+        '''
+        if max_samples < 1 or max_samples > _FIFO_SIZE//_FIFO_PACKET:
+            raise ValueError('max_samples must be in range 1-' + str(_FIFO_SIZE//_FIFO_PACKET))
+        self._fifo_buf = bytearray(max_samples*_FIFO_PACKET)
+        mv = memoryview(self._fifo_buf)
+        # one view per sample count: slicing in fifo_read() would allocate
+        self._fifo_views = [mv[:n*_FIFO_PACKET] for n in range(max_samples+1)]
+        self.fifo_samples = array('f', [0]*(max_samples*6))
+        self._int_enable |= 0x10
+        try:
+            self._write(0x78, 0x23, self.mpu_addr)  # FIFO_EN: XG, YG, ZG and ACCEL
+            self._write(self._int_enable, 0x38, self.mpu_addr)  # INT_ENABLE: FIFO_OFLOW_EN
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        self.fifo_reset()
+
+    def fifo_disable(self):
+        '''
+        Stop batched acquisition.
+        '''
+        self._user_ctrl &= ~0x40
+        self._int_enable &= ~0x10
+        try:
+            self._write(0x00, 0x23, self.mpu_addr)
+            self._write(self._user_ctrl, 0x6A, self.mpu_addr)
+            self._write(self._int_enable, 0x38, self.mpu_addr)
+        except OSError:
+            raise MPUException(self._I2Cerror)
+
+    def fifo_reset(self):
+        '''
+        Discard the FIFO contents and restart queueing on a packet boundary.
+        '''
+        self._user_ctrl &= ~0x40
+        try:
+            self._write(self._user_ctrl | 0x04, 0x6A, self.mpu_addr)  # FIFO_RESET, self clearing
+            self._user_ctrl |= 0x40
+            self._write(self._user_ctrl, 0x6A, self.mpu_addr)         # FIFO_EN
+        except OSError:
+            raise MPUException(self._I2Cerror)
+
+    @property
+    def fifo_count(self):
+        '''
+        Returns the number of bytes waiting in the FIFO
+        '''
+        try:
+            self._read(self.buf2, 0x72, self.mpu_addr)
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        return self.buf2[0] << 8 | self.buf2[1]
+
+    def fifo_read(self):
+        '''
+        Drain whole samples from the FIFO with one block read. Decoded,
+        sensor relative samples are stored in fifo_samples as
+        ax, ay, az (g), gx, gy, gz (degrees/s), oldest first.
+        Returns the number of samples. A packet the device is still writing
+        is left for the next call. FIFO_OFLOW_INT in INT_STATUS means data
+        was overwritten and packets are no longer aligned: the FIFO is then
+        reset, fifo_overflows incremented and 0 returned.
+        '''
+        try:
+            self._read(self.buf1, 0x3A, self.mpu_addr)  # INT_STATUS, cleared by the read
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        if self.buf1[0] & 0x10:
+            self.fifo_overflows += 1
+            self.fifo_reset()
+            return 0
+        views = self._fifo_views
+        n = self.fifo_count//_FIFO_PACKET
+        if n >= len(views):
+            n = len(views)-1                    # the rest is left for the next call
+        if n == 0:
+            return 0
+        try:
+            self._read(views[n], 0x74, self.mpu_addr)
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        buf = self._fifo_buf
+        out = self.fifo_samples
+        ascale = self._accel_scale
+        gscale = self._gyro_scale
+        for i in range(0, n*6, 6):
+            ax, ay, az, gx, gy, gz = unpack_from('>6h', buf, 2*i)
+            out[i] = ax*ascale
+            out[i+1] = ay*ascale
+            out[i+2] = az*ascale
+            out[i+3] = gx*gscale
+            out[i+4] = gy*gscale
+            out[i+5] = gz*gscale
+        return n
+
+    # Data ready interrupt
+    @property
+    def drdy(self):
+        '''
+        True when frames are latched by the data ready interrupt
+        '''
+        return self._drdy_pin is not None
+
+    def drdy_enable(self, pin):
+        '''
+        Latch a frame on every data ready interrupt. pin is the machine.Pin
+        wired to the INT pin, which pulses high for 50us per sample (the
+        INT_PIN_CFG defaults). The frame rate is the sample rate, so set
+        filter_range and sample_rate first. Use wait_frame() to consume.
+        '''
+        self._int_enable |= 0x01
+        try:
+            self._write(self._int_enable, 0x38, self.mpu_addr)  # INT_ENABLE: DATA_RDY_EN
+        except OSError:
+            raise MPUException(self._I2Cerror)
+        self._drdy_pin = pin
+        pin.irq(handler=self._drdy_callback, trigger=pin.IRQ_RISING)
+
+    def drdy_disable(self):
+        '''
+        Stop latching frames on the data ready interrupt.
+        '''
+        if self._drdy_pin is not None:
+            self._drdy_pin.irq(handler=None)
+            self._drdy_pin = None
+        self._int_enable &= ~0x01
+        try:
+            self._write(self._int_enable, 0x38, self.mpu_addr)
+        except OSError:
+            raise MPUException(self._I2Cerror)
+
+    def _drdy_callback(self, pin):
+        '''
+        Data ready handler. Reads the frame into the buffer the consumer is
+        not using, then publishes it by bumping the sequence number.
+        Allocates nothing. Error trapping disallowed.
+        '''
+        idx = (self._drdy_seq + 1) & 1
+        self._read(self._drdy_bufs[idx], 0x3B, self.mpu_addr)
+        self._drdy_ticks[idx] = ticks_us()
+        self._drdy_seq += 1
+
+    def wait_frame(self, seq):
+        '''
+        Wait until a frame newer than sequence number seq has been latched
+        and copy it to buf14 for decode() or decode_fixed(). frame_ticks is
+        set to the time the frame was latched. Returns the new sequence number.
+        '''
+        while self._drdy_seq == seq:
+            idle()
+        while True:
+            seq = self._drdy_seq
+            idx = seq & 1
+            self.buf14[:] = self._drdy_bufs[idx]
+            self.frame_ticks = self._drdy_ticks[idx]
+            if self._drdy_seq - seq < 2:    # the buffer was not reused meanwhile
+                break
+        return seq
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# loop timer: absolute deadlines on ticks_us, with jitter and overrun statistics
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_us, ticks_add, ticks_diff, sleep_us
+
+_LOOPS = 0          # slots in _stats
+_OVERRUNS = 1
+_MAX_OVERRUN = 2    # us past the deadline when the work was done
+_MAX_JITTER = 3     # us the wake up was late
+_DT = 4             # us between the last two laps
+_MIN_DT = 5
+_MAX_DT = 6
+
+class loop_timer():
+    # period_us: the loop period. wait() sleeps until the next absolute
+    # deadline, so the work done in the loop does not add to the period and
+    # the loop does not drift with load.
+    def __init__(self, period_us):
+        self.period_us = period_us
+        self._deadline = 0
+        self._last = 0
+        self._stats = array('i', [0]*7)
+        self._mean_jitter = 0.0
+
+    def start(self):
+        now = ticks_us()
+        self._last = now
+        self._deadline = ticks_add(now, self.period_us)
+        self.reset_stats()
+
+    def reset_stats(self):
+        for i in range(len(self._stats)):
+            self._stats[i] = 0
+        self._stats[_MIN_DT] = 0x3fffffff
+        self._mean_jitter = 0.0
+
+    @property
+    def dt_us(self):
+        return self._stats[_DT]
+
+    @property
+    def dt(self):
+        # seconds, for the controllers
+        return self._stats[_DT]/1000000
+
+    @property
+    def min_dt_us(self):
+        return self._stats[_MIN_DT]
+
+    @property
+    def max_dt_us(self):
+        return self._stats[_MAX_DT]
+
+    @property
+    def loops(self):
+        return self._stats[_LOOPS]
+
+    @property
+    def overruns(self):
+        return self._stats[_OVERRUNS]
+
+    @property
+    def max_overrun_us(self):
+        return self._stats[_MAX_OVERRUN]
+
+    @property
+    def max_jitter_us(self):
+        return self._stats[_MAX_JITTER]
+
+    @property
+    def mean_jitter_us(self):
+        return self._mean_jitter
+
+    @property
+    def slack_us(self):
+        # us left until the deadline of this loop, negative once it is late
+        return ticks_diff(self._deadline, ticks_us())
+
+    def wait(self):
+        # sleeps the slack left until the deadline, then laps
+        s = self._stats
+        slack = ticks_diff(self._deadline, ticks_us())
+        if slack > 0:
+            sleep_us(slack)
+        else:
+            s[_OVERRUNS] += 1
+            if -slack > s[_MAX_OVERRUN]:
+                s[_MAX_OVERRUN] = -slack
+        return self.lap()
+
+    def lap(self):
+        # ends one loop without sleeping, e.g. when the data ready interrupt
+        # paces the loop; returns the measured dt in us
+        s = self._stats
+        now = ticks_us()
+        late = ticks_diff(now, self._deadline)
+        if late >= self.period_us:
+            # a whole period lost: start again from now instead of running
+            # the missed loops back to back
+            self._deadline = now
+            late = 0
+        elif late > 0:
+            if late > s[_MAX_JITTER]:
+                s[_MAX_JITTER] = late
+        else:
+            late = 0
+        s[_LOOPS] += 1
+        self._mean_jitter += (late - self._mean_jitter)/s[_LOOPS]
+        dt = ticks_diff(now, self._last)
+        self._last = now
+        s[_DT] = dt
+        if dt < s[_MIN_DT]:
+            s[_MIN_DT] = dt
+        if dt > s[_MAX_DT]:
+            s[_MAX_DT] = dt
+        self._deadline = ticks_add(self._deadline, self.period_us)
+        return dt
+
+    def report(self, write=print):
+        s = self._stats
+        write('    period: '+str(self.period_us)+' us, loops: '+str(s[_LOOPS])+
+              ', dt min/max: '+str(s[_MIN_DT])+'/'+str(s[_MAX_DT])+' us')
+        write('    jitter mean/max: '+str(int(self._mean_jitter))+'/'+str(s[_MAX_JITTER])+
+              ' us, overruns: '+str(s[_OVERRUNS])+', max overrun: '+str(s[_MAX_OVERRUN])+' us')
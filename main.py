@@ -28,6 +28,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 from machine import Pin
+from utime import ticks_ms, ticks_diff
 import time
 
 # MPU-6050 --------------------------------------------------------------------
@@ -37,17 +38,30 @@ from imu import MPU6050
 # R8EF ------------------------------------------------------------------------
 import state_machine
 from state_machine import R8EF_channel
+from rc_input import RCInput
 
 # ZMR SimonK ------------------------------------------------------------------
 from simonk_pwm import ZMR
 
 # Flight Controller -----------------------------------------------------------
-from flight_controller import acc_sum_base, acc_sum_escape_g, shutdown, main_loop
-from flight_controller import flight_ctr_fr, flight_ctr_fl
-from flight_controller import flight_ctr_bl, flight_ctr_br
+from flight_controller import acc_sum_base, acc_sum_escape_g, main_loop, dual_core_loop
+from flight_controller import LOOP_FREQ
+from flight_controller import flight_ctr
+from pid import PID
+from flight_mode import flight_mode
+from rc_failsafe import rc_failsafe
+
+# attitude estimator ----------------------------------------------------------
+from attitude import attitude
+
+# calibration store -----------------------------------------------------------
+from calibration import calibration_store
 
 # debug module ----------------------------------------------------------------
 from flight_data import flight_data
+from event_log import event_log
+from profiler import profiler
+from flight_recorder import flight_recorder
 bb = flight_data(b_debug=True)
 
 
@@ -55,6 +69,30 @@ bb = flight_data(b_debug=True)
 bb.write('initializing MPU-6050')
 i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=400000)
 imu = MPU6050(i2c)
+# GPIO wired to the MPU-6050 INT pin. When set, the main loop runs on every
+# data ready interrupt instead of a fixed sleep; None keeps polling.
+IMU_INT_PIN = None
+# run the IMU, the controller and the motors on core 1, the sticks, console
+# and log file on core 0
+DUAL_CORE = False
+# time every stage of the loop; the report is written when the loop stops
+PROFILE = False
+# record every tick of the main loop for host/replay.py, single core only
+RECORD = False
+REC_FILE = 'flight.rec'
+# the motors wind down from escape G to min and are held there before the
+# controller takes over
+ARM_SECONDS = 2
+# GPIO of a disarm switch to ground: the first press lands, the next one
+# stops the motors. None: the loop runs until the board is reset
+DISARM_PIN = None
+DISARM_BOUNCE_MS = 50
+# no R8EF pulse for RC_HOLD_MS: the sticks are held, then the drone levels
+# and lands; RC_DISARM_MS: the motors are stopped; the pulses back for
+# RC_RECOVER_MS during the landing: the sticks are the pilot's again
+RC_HOLD_MS = 500
+RC_DISARM_MS = 30000
+RC_RECOVER_MS = 1000
 
 ### initializing R8EF_channel
 bb.write('initializing R8EF channels')
@@ -76,6 +114,7 @@ st_range = [ # min, mid, max
             [0, 5031, 9966],
             [0, 4925, 9920],
            ]
+rc = RCInput([st0, st1, st2], st_range)
 
 
 ### initializing SimonK PWM
@@ -95,48 +134,84 @@ motor_0.duty(m_range_0[0])
 motor_1.duty(m_range_1[0])
 motor_2.duty(m_range_2[0])
 motor_3.duty(m_range_3[0])
+motors = [motor_0, motor_1, motor_2, motor_3]
 
 
-### initializing Flight Controllers
-bb.write('initializing Flight Controllers')
-flight_ctr_0 = flight_ctr_fr('fc0', st_range, m_range_0, debug=bb)
-flight_ctr_1 = flight_ctr_fl('fc1', st_range, m_range_1, debug=bb)
-flight_ctr_2 = flight_ctr_bl('fc2', st_range, m_range_2, debug=bb)
-flight_ctr_3 = flight_ctr_br('fc3', st_range, m_range_3, debug=bb)
+### initializing Flight Controller
+bb.write('initializing Flight Controller')
+# motor_0 to motor_3 are front right, front left, back left and back right
+# roll, pitch and yaw rate PIDs on the gyro, in motor units per degrees/s,
+# see host/step_response.py; pids=None keeps the proportional nudge on the
+# accelerometer tilt
+pids = (PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+        PID(0.2, 0.4, 0.002, out_min=-25, out_max=25, i_limit=10, d_cutoff=20),
+        PID(0.2, 0.0, 0.0, out_min=-25, out_max=25))
+# the controller records its steps in an event log, formatted by the loop's
+# ticks in the time they leave
+fc = flight_ctr('fc', st_range, [m_range_0, m_range_1, m_range_2, m_range_3],
+                debug=event_log('fc'), layout='quad_x', pids=pids)
 
 
 ### before taking off, initialize PicoDrone
 bb.write('before taking off, initialize PicoDrone')
-# figuring out the baseline of acc sum 
-based_acc_sum = acc_sum_base(imu, bb)
-flight_ctr_0.based_acc_sum = based_acc_sum
-flight_ctr_1.based_acc_sum = based_acc_sum
-flight_ctr_2.based_acc_sum = based_acc_sum
-flight_ctr_3.based_acc_sum = based_acc_sum
+# figuring out the baseline of acc sum, reusing the stored calibration when
+# a short stillness check confirms it
+cal = calibration_store()
+based_acc_sum = 0
+if cal.load():
+    cal.apply(imu)
+    if cal.check(imu, bb):
+        based_acc_sum = cal.based_acc_sum
+if not based_acc_sum:
+    imu.gyro.cal = (0, 0, 0)
+    based_acc_sum = acc_sum_base(imu, bb, cal)
+    cal.apply(imu)
+    cal.save()
+fc.based_acc_sum = based_acc_sum
 
 
 # figuring out the acc sum at the boundary of escape gravity
-es_acc_sum = acc_sum_escape_g(imu, 
-                              flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-                              motor_0, motor_1, motor_2, motor_3,
-                              bb)
-flight_ctr_0.es_acc_sum = es_acc_sum
-flight_ctr_1.es_acc_sum = es_acc_sum
-flight_ctr_2.es_acc_sum = es_acc_sum
-flight_ctr_3.es_acc_sum = es_acc_sum
+es_acc_sum = acc_sum_escape_g(imu, fc, motors, bb)
+fc.es_acc_sum = es_acc_sum
+# calibrated: the per tick control path runs on integer coefficients
+fc.compile()
 
 #time.sleep(2.0)
 
-shutdown(imu, 
-         flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-         motor_0, motor_1, motor_2, motor_3, 
-         m_range_0, m_range_1, m_range_2, m_range_3, 
-         bb)
-
 
 ### entering the main loop
 bb.write('entering the main loop')
-main_loop(imu, st0, st1, st2, 
-          flight_ctr_0, flight_ctr_1, flight_ctr_2, flight_ctr_3, 
-          motor_0, motor_1, motor_2, motor_3,
-          bb)
+# arming, flying, landing and disarmed, stepped by the loop on every tick
+mode = flight_mode(fc, motors, LOOP_FREQ, arm_seconds=ARM_SECONDS,
+                   write=None if DUAL_CORE else bb.write)
+if DISARM_PIN is not None:
+    disarm_pin = Pin(DISARM_PIN, Pin.IN, Pin.PULL_UP)
+    # the switch bounces for a few ms, one request per press
+    pressed = [ticks_ms()]
+    def on_disarm(pin):
+        now = ticks_ms()
+        if ticks_diff(now, pressed[0]) > DISARM_BOUNCE_MS:
+            mode.disarm()
+        pressed[0] = now
+    disarm_pin.irq(on_disarm, Pin.IRQ_FALLING)
+failsafe = rc_failsafe(rc, mode, hold_ms=RC_HOLD_MS, disarm_ms=RC_DISARM_MS,
+                       recover_ms=RC_RECOVER_MS, write=bb.write)
+if IMU_INT_PIN is not None:
+    imu.filter_range = 3    # 41Hz low pass, 1kHz internal sample rate
+    imu.sample_rate = 1     # 1kHz/(1+1) = 500Hz, the main loop rate
+    imu.drdy_enable(Pin(IMU_INT_PIN, Pin.IN))
+prof = profiler(enabled=PROFILE)
+if DUAL_CORE:
+    dual_core_loop(imu, rc, fc, motors, bb, fixed_point=True, att=attitude(gyro_scale=0.01), prof=prof,
+                   mode=mode, failsafe=failsafe)
+else:
+    rec = None
+    if RECORD:
+        rec = flight_recorder(open(REC_FILE, 'wb'), imu, rc, fc, LOOP_FREQ,
+                              mode=mode, failsafe=failsafe)
+    try:
+        main_loop(imu, rc, fc, motors, bb, fixed_point=True, att=attitude(gyro_scale=0.01),
+                  prof=prof, rec=rec, mode=mode, failsafe=failsafe)
+    finally:
+        if rec:
+            rec.close()
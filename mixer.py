@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# motor mixer: throttle, roll, pitch and yaw demands to every motor output
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+
+# one row per motor: throttle, roll, pitch, yaw
+# roll follows +ay (right side up), pitch follows +ax (back up), yaw is the
+# spin direction of the propeller
+MIXER_LAYOUTS = {
+    # fr, fl, bl, br: the wiring of motor_0 to motor_3
+    'quad_x': (
+        (1.0,  1.0, -1.0, -1.0),
+        (1.0, -1.0, -1.0,  1.0),
+        (1.0, -1.0,  1.0, -1.0),
+        (1.0,  1.0,  1.0,  1.0),
+    ),
+    # front, right, back, left
+    'quad_plus': (
+        (1.0,  0.0, -1.0, -1.0),
+        (1.0,  1.0,  0.0,  1.0),
+        (1.0,  0.0,  1.0, -1.0),
+        (1.0, -1.0,  0.0,  1.0),
+    ),
+    # clockwise from front right: 30, 90, 150, 210, 270, 330 degrees
+    'hex_x': (
+        (1.0,  0.5, -0.866, -1.0),
+        (1.0,  1.0,  0.0,    1.0),
+        (1.0,  0.5,  0.866, -1.0),
+        (1.0, -0.5,  0.866,  1.0),
+        (1.0, -1.0,  0.0,   -1.0),
+        (1.0, -0.5, -0.866,  1.0),
+    ),
+}
+
+class Mixer():
+    # layout: a key of MIXER_LAYOUTS, or the rows themselves
+    # m_ranges: min, max, init, limit per motor (simonk pwm parameters)
+    # demands are given in motor units, 5 permille of each motor's range
+    def __init__(self, layout, m_ranges, m_val_cr=1.0):
+        if isinstance(layout, str):
+            layout = MIXER_LAYOUTS[layout]
+        if len(layout)!=len(m_ranges):
+            raise ValueError('mixer: '+str(len(layout))+' rows for '+str(len(m_ranges))+' motors')
+        self._n = len(layout)
+        self._layout = layout
+        self._m_val_cr = m_val_cr
+        self._M_RANGES = m_ranges
+        self._unit = array('i', [5*int((r[1]-r[0])/1000*m_val_cr) for r in m_ranges])
+        # each row scaled by its motor unit once, so mix() is 4 products a motor
+        self._matrix = array('f', [c*self._unit[i] for i in range(self._n) for c in layout[i]])
+        self._min = array('i', [r[0] for r in m_ranges])
+        self._max = array('i', [r[1] for r in m_ranges])
+        # the hot path walks one tuple a motor: coefficients and limits come
+        # out in a single unpack instead of six array lookups
+        m = self._matrix
+        self._rows = tuple((m[i*4], m[i*4+1], m[i*4+2], m[i*4+3], self._min[i], self._max[i])
+                           for i in range(self._n))
+        self._limits = tuple((self._min[i], self._max[i]) for i in range(self._n))
+        self._out = array('i', self._min)
+        self._base = array('i', self._min)    # mix_offset(): the accumulated throttle
+
+    @property
+    def motors(self):
+        return self._n
+
+    @property
+    def m_ranges(self):
+        return self._M_RANGES
+
+    @property
+    def units(self):
+        return self._unit
+
+    # the rows as given, before the motor units
+    @property
+    def layout(self):
+        return self._layout
+
+    @property
+    def m_val_cr(self):
+        return self._m_val_cr
+
+    # the layout rows scaled by the motor units, 4 values a motor
+    @property
+    def matrix(self):
+        return self._matrix
+
+    # the pwm value of every motor, updated in place by mix()
+    @property
+    def outputs(self):
+        return self._out
+
+    # mix_offset() and add_offset(): the accumulated throttle, without the
+    # roll, pitch and yaw offsets
+    @property
+    def base(self):
+        return self._base
+
+    def reset(self):
+        for i in range(self._n):
+            self._out[i] = self._min[i]
+            self._base[i] = self._min[i]
+
+    def mix(self, throttle, roll, pitch, yaw=0.0):
+        # the demands are deltas: like the per-motor controllers this
+        # replaces, every call adds to the last output before clamping
+        out = self._out
+        i = 0
+        for t, r, p, y, lo, hi in self._rows:
+            val = out[i] + int(t*throttle + r*roll + p*pitch + y*yaw)
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            out[i] = val
+            i += 1
+        return out
+
+    def mix_offset(self, throttle, roll, pitch, yaw=0.0):
+        # throttle is a delta as in mix(), roll, pitch and yaw are absolute:
+        # they offset the accumulated throttle for this call only, so the
+        # output of a rate controller does not wind up in the motor values
+        out = self._out
+        base = self._base
+        i = 0
+        for t, r, p, y, lo, hi in self._rows:
+            val = base[i] + int(t*throttle)
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            base[i] = val
+            val += int(r*roll + p*pitch + y*yaw)
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            out[i] = val
+            i += 1
+        return out
+
+    # the compiled controller hands in integer pwm deltas per motor, see
+    # flight_ctr.compile(); they are set back to 0 once added
+    def add(self, deltas):
+        # accumulated like mix()
+        out = self._out
+        i = 0
+        for lo, hi in self._limits:
+            val = out[i] + deltas[i]
+            deltas[i] = 0
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            out[i] = val
+            i += 1
+        return out
+
+    def add_offset(self, deltas, roll, pitch, yaw=0.0):
+        # the deltas accumulate, roll, pitch and yaw offset them as in
+        # mix_offset()
+        out = self._out
+        base = self._base
+        i = 0
+        for t, r, p, y, lo, hi in self._rows:
+            val = base[i] + deltas[i]
+            deltas[i] = 0
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            base[i] = val
+            val += int(r*roll + p*pitch + y*yaw)
+            if val>hi:
+                val = hi
+            elif val<lo:
+                val = lo
+            out[i] = val
+            i += 1
+        return out
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# PID controller: anti-windup, derivative on measurement, feed-forward
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from math import pi
+
+_I = 0          # slots in _s
+_PREV = 1
+_D = 2
+_OUT = 3
+
+class PID():
+    # the output is kp*error + integral - kd*d(measurement)/dt + kff*setpoint,
+    # clamped to out_min, out_max; units are the caller's, dt is in seconds
+    # i_limit: the integral term is held within -i_limit, i_limit
+    # d_cutoff: corner frequency (Hz) of the derivative low pass, 0 for none
+    def __init__(self, kp, ki=0.0, kd=0.0, kff=0.0,
+                 out_min=-1000.0, out_max=1000.0, i_limit=None, d_cutoff=0.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.kff = kff
+        self.out_min = out_min
+        self.out_max = out_max
+        if i_limit is None:
+            i_limit = max(-out_min, out_max)
+        self.i_limit = i_limit
+        self._d_cutoff = d_cutoff
+        self._tau = 0.0
+        if d_cutoff > 0:
+            self._tau = 1/(2*pi*d_cutoff)
+        self._s = array('f', [0, 0, 0, 0])  # integral, last measurement, filtered derivative, output
+        self._started = False
+
+    @property
+    def d_cutoff(self):
+        return self._d_cutoff
+
+    def reset(self):
+        for i in range(4):
+            self._s[i] = 0
+        self._started = False
+
+    @property
+    def output(self):
+        return self._s[_OUT]
+
+    @property
+    def integral(self):
+        return self._s[_I]
+
+    def update(self, setpoint, measurement, dt):
+        s = self._s
+        if dt <= 0:
+            return s[_OUT]
+        error = setpoint - measurement
+
+        # derivative on measurement: a setpoint step does not kick the output
+        if self._started:
+            d = (measurement - s[_PREV])/dt
+        else:
+            d = 0.0
+            self._started = True
+        s[_PREV] = measurement
+        if self._tau > 0:
+            s[_D] += dt/(self._tau + dt)*(d - s[_D])
+        else:
+            s[_D] = d
+
+        integral = s[_I] + self.ki*error*dt
+        if integral > self.i_limit:
+            integral = self.i_limit
+        elif integral < -self.i_limit:
+            integral = -self.i_limit
+
+        out = self.kp*error + integral - self.kd*s[_D] + self.kff*setpoint
+        # anti-windup: while saturated, only integrate back towards the range
+        if out > self.out_max:
+            out = self.out_max
+            if error > 0:
+                integral = s[_I]
+        elif out < self.out_min:
+            out = self.out_min
+            if error < 0:
+                integral = s[_I]
+        s[_I] = integral
+        s[_OUT] = out
+        return out
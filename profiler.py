@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# loop profiler: per-stage microsecond statistics and histograms
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_us, ticks_diff
+
+# histogram buckets: below 16us, then one per doubling up to 16.4ms, the last
+# 16.4ms and above
+BUCKETS = 12
+_FIRST = 4          # log2 of the first bucket's upper bound
+_CARRY = 20         # the sums keep 2**20 us in the low word, the rest above
+
+class profiler():
+    # stages are wrapped with wrap(); a disabled profiler returns the
+    # functions themselves, so profiling costs nothing when it is off
+    def __init__(self, enabled=True, stages=16):
+        self.enabled = enabled
+        self._names = []
+        self._count = array('i', [0]*stages)
+        self._min = array('i', [0]*stages)
+        self._max = array('i', [0]*stages)
+        self._sum_lo = array('i', [0]*stages)
+        self._sum_hi = array('i', [0]*stages)
+        self._hist = array('i', [0]*(stages*BUCKETS))
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self._count)):
+            self._count[i] = 0
+            self._min[i] = 0x3fffffff
+            self._max[i] = 0
+            self._sum_lo[i] = 0
+            self._sum_hi[i] = 0
+        for i in range(len(self._hist)):
+            self._hist[i] = 0
+
+    def stage(self, name):
+        # the id of a stage, added on first use
+        if name in self._names:
+            return self._names.index(name)
+        if len(self._names) == len(self._count):
+            raise ValueError('profiler: no room for stage '+name)
+        self._names.append(name)
+        return len(self._names)-1
+
+    def wrap(self, name, func):
+        # func, taking no arguments like the scheduler tasks, timed as stage
+        # name on every call
+        if not self.enabled:
+            return func
+        stage = self.stage(name)
+
+        def timed():
+            t0 = ticks_us()
+            ret = func()
+            self.add(stage, ticks_diff(ticks_us(), t0))
+            return ret
+        return timed
+
+    def add(self, stage, us):
+        # one run of stage that took us microseconds
+        self._count[stage] += 1
+        if us < self._min[stage]:
+            self._min[stage] = us
+        if us > self._max[stage]:
+            self._max[stage] = us
+        lo = self._sum_lo[stage] + us
+        if lo >= 1 << _CARRY:
+            self._sum_hi[stage] += lo >> _CARRY
+            lo &= (1 << _CARRY) - 1
+        self._sum_lo[stage] = lo
+        b = 0
+        v = us >> _FIRST
+        while v and b < BUCKETS-1:
+            v >>= 1
+            b += 1
+        self._hist[stage*BUCKETS + b] += 1
+
+    def count(self, name):
+        return self._count[self._names.index(name)]
+
+    def mean(self, name):
+        stage = self._names.index(name)
+        if not self._count[stage]:
+            return 0
+        return ((self._sum_hi[stage] << _CARRY) + self._sum_lo[stage])/self._count[stage]
+
+    def histogram(self, name):
+        stage = self._names.index(name)
+        return self._hist[stage*BUCKETS:(stage+1)*BUCKETS]
+
+    def report(self, write=print):
+        if not self.enabled:
+            return
+        write('    stage        count    min us   mean us    max us')
+        for i in range(len(self._names)):
+            name = self._names[i]
+            n = self._count[i]
+            write('    {:<10} {:>7} {:>9} {:>9} {:>9}'.format(
+                  name, n, self._min[i] if n else 0, int(self.mean(name)), self._max[i]))
+        # the upper bound of each bucket, the last one is open
+        msg = '    us <     '
+        for b in range(BUCKETS-1):
+            msg += ' {:>6}'.format(1 << (_FIRST+b))
+        write(msg+'   more')
+        for i in range(len(self._names)):
+            msg = '    {:<10}'.format(self._names[i])
+            for b in range(BUCKETS):
+                msg += ' {:>6}'.format(self._hist[i*BUCKETS + b])
+            write(msg)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# RC signal loss failsafe: holds the sticks, then lands, then disarms
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_ms, ticks_diff
+from flight_mode import FLYING
+
+RECEIVING = 0
+LANDING = 1
+DISARMING = 2
+PHASE_NAMES = ('receiving', 'landing', 'disarming')
+
+class rc_failsafe():
+    # rc: the RCInput stage, stamping every channel sample
+    # mode: the flight_mode told to land() and disarm()
+    # hold_ms: the sticks are held at their last values that long
+    # disarm_ms: the motors are stopped that long after the last sample,
+    # whether or not the landing is done, 0 leaves it to the landing
+    # recover_ms: the signal back that long during the landing gives the
+    # sticks back to the pilot, see flight_mode.resume(); 0 lands anyway
+    # write: where the phases are reported, e.g. bb.write
+    def __init__(self, rc, mode, hold_ms=500, disarm_ms=30000, recover_ms=1000, write=None):
+        self._rc = rc
+        self._mode = mode
+        self.hold_ms = hold_ms
+        self.disarm_ms = disarm_ms
+        self.recover_ms = recover_ms
+        self._write = write
+        # phase, triggers, longest loss (ms), recoveries, signal back,
+        # ticks_ms() it came back
+        self._s = array('i', [RECEIVING, 0, 0, 0, 0, 0])
+
+    @property
+    def phase(self):
+        return self._s[0]
+
+    @property
+    def triggers(self):
+        return self._s[1]
+
+    @property
+    def max_lost_ms(self):
+        return self._s[2]
+
+    @property
+    def recoveries(self):
+        return self._s[3]
+
+    def check(self):
+        # after every rc update; a landing started here goes on until the
+        # signal has been back for recover_ms
+        s = self._s
+        lost = self._rc.lost_ms
+        if lost > s[2]:
+            s[2] = lost
+        if lost <= self.hold_ms:
+            phase = RECEIVING
+            if s[0] == LANDING and self.recover_ms and not self._mode.disarmed:
+                now = ticks_ms()
+                if not s[4]:
+                    s[4] = 1
+                    s[5] = now
+                if ticks_diff(now, s[5]) < self.recover_ms:
+                    phase = LANDING
+                else:
+                    s[3] += 1
+                    self._mode.resume()
+        else:
+            s[4] = 0
+            if self.disarm_ms and lost > self.disarm_ms:
+                phase = DISARMING
+            else:
+                phase = LANDING
+        if phase != s[0]:
+            if s[0] == RECEIVING:
+                s[1] += 1
+                self._mode.land()
+            s[0] = phase
+            if self._write:
+                self._write('    rc failsafe: '+PHASE_NAMES[phase]+', lost '+str(lost)+' ms')
+        if phase == LANDING and self._mode.state == FLYING:
+            # every check while the mode still flies, not just on the way
+            # in: a single request could come before the mode takes it
+            self._mode.land()
+        elif phase == DISARMING and not self._mode.disarmed:
+            # every check until the motors are stopped: the first request
+            # only lands when flying, a landing holds it for its debounce
+            self._mode.disarm()
+
+    def report(self, write=print):
+        write('    rc failsafe: '+str(self._s[1])+' triggers, '+str(self._s[3])+' recoveries, longest loss '+
+              str(self._s[2])+' ms')
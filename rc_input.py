@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# RC input stage: samples the R8EF channels, filters each channel once per
+# tick and exposes the filtered and normalized stick values, which the
+# controllers read by reference
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_ms, ticks_diff
+from moving_average import moving_average
+
+class RCInput():
+    # channels: R8EF_channel per stick, None when values are pushed by set()
+    # st_range: min, mid, max per stick, as measured on the transmitter
+    def __init__(self, channels, st_range, q_size=10):
+        self._channels = channels
+        self._ST_RANGE = st_range
+        self._st_q = [moving_average(q_size+1) for i in range(len(st_range))]
+        self._raw = array('f', [0]*len(st_range))    # last sample, unfiltered, see flight_recorder
+        self._vals = array('f', [0]*len(st_range))   # filtered, 0 - 10,000
+        self._ivals = array('i', [0]*len(st_range))  # the same, truncated, for the compiled controller
+        self._norm = array('f', [0]*len(st_range))   # -1.0 at min, 0 at mid, 1.0 at max
+        now = ticks_ms()
+        self._ticks = array('i', [now]*len(st_range))   # ticks_ms() of the last sample
+        self._updates = array('i', [0]*len(st_range))
+        self._max_gap = array('i', [0]*len(st_range))   # longest ms between two samples
+        self._fresh = 0 # bit i: channel i had a sample in the last update()
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def vals(self):
+        return self._vals
+
+    @property
+    def ivals(self):
+        return self._ivals
+
+    @property
+    def norm(self):
+        return self._norm
+
+    @property
+    def st_range(self):
+        return self._ST_RANGE
+
+    @property
+    def ticks(self):
+        return self._ticks
+
+    # the channels sampled by the last update() or set(), one bit each;
+    # recorded with raw by flight_recorder
+    @property
+    def fresh(self):
+        return self._fresh
+
+    # ms since the stalest channel had a sample; its value is held meanwhile
+    @property
+    def lost_ms(self):
+        now = ticks_ms()
+        lost = 0
+        for i in range(len(self._ticks)):
+            ms = ticks_diff(now, self._ticks[i])
+            if ms > lost:
+                lost = ms
+        return lost
+
+    def update(self):
+        # the newest sample of every channel that received one, without
+        # waiting for the others
+        channels = self._channels
+        now = ticks_ms()
+        fresh = 0
+        for i in range(len(channels)):
+            val = channels[i].poll()
+            if val >= 0:
+                self._filter(i, val)
+                self._stamp(i, now)
+                fresh |= 1 << i
+        self._fresh = fresh
+
+    def set(self, st_vals):
+        # push one sample per stick instead of reading the channels
+        now = ticks_ms()
+        for i in range(len(self._st_q)):
+            self._filter(i, st_vals[i])
+            self._stamp(i, now)
+        self._fresh = (1 << len(self._st_q)) - 1
+
+    def report(self, write=print):
+        write('    channel   samples    max gap ms    lost ms')
+        now = ticks_ms()
+        for i in range(len(self._ticks)):
+            write('    {:<7} {:>9} {:>13} {:>10}'.format(
+                  i, self._updates[i], self._max_gap[i], ticks_diff(now, self._ticks[i])))
+
+    def _stamp(self, i, now):
+        if self._updates[i]:
+            gap = ticks_diff(now, self._ticks[i])
+            if gap > self._max_gap[i]:
+                self._max_gap[i] = gap
+        self._ticks[i] = now
+        self._updates[i] += 1
+
+    def _filter(self, i, val):
+        self._raw[i] = val
+        avg = self._st_q[i].update_val(val)
+        self._vals[i] = avg
+        self._ivals[i] = int(avg)
+        st_min, st_mid, st_max = self._ST_RANGE[i]
+        if avg > st_mid:
+            self._norm[i] = (avg-st_mid)/(st_max-st_mid)
+        else:
+            self._norm[i] = -(st_mid-avg)/(st_mid-st_min)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# lock-free single producer, single consumer ring of fixed-size records
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+
+_HEAD = 0       # slots in _idx
+_TAIL = 1
+_DROPPED = 2
+
+class record_ring():
+    # size records of width values each, in one preallocated array. The
+    # producer only writes head and dropped, the consumer only writes tail,
+    # and each publishes its index after it is done with the record, so
+    # the two sides can run on different cores without a lock.
+    # One slot stays empty to tell a full ring from an empty one.
+    def __init__(self, size, width, typecode='i'):
+        self.size = size
+        self.width = width
+        self.buf = array(typecode, [0]*(size*width))
+        self._idx = array('i', [0, 0, 0])
+
+    def __len__(self):
+        n = self._idx[_HEAD] - self._idx[_TAIL]
+        if n < 0:
+            n += self.size
+        return n
+
+    @property
+    def dropped(self):
+        # records the producer found no room for
+        return self._idx[_DROPPED]
+
+    # producer: buf[write_slot():write_slot()+width], then publish()
+    def write_slot(self):
+        head = self._idx[_HEAD]
+        nxt = head + 1
+        if nxt == self.size:
+            nxt = 0
+        if nxt == self._idx[_TAIL]:
+            self._idx[_DROPPED] += 1
+            return -1
+        return head*self.width
+
+    def publish(self):
+        nxt = self._idx[_HEAD] + 1
+        if nxt == self.size:
+            nxt = 0
+        self._idx[_HEAD] = nxt
+
+    # consumer: buf[read_slot():read_slot()+width], then release()
+    def read_slot(self):
+        tail = self._idx[_TAIL]
+        if tail == self._idx[_HEAD]:
+            return -1
+        return tail*self.width
+
+    def release(self):
+        nxt = self._idx[_TAIL] + 1
+        if nxt == self.size:
+            nxt = 0
+        self._idx[_TAIL] = nxt
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# preallocated struct-of-arrays sample storage with a streaming top-k, for
+# the sampling loops that run with the motors spinning
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+
+class sample_buffer():
+    # fields: the names of the int columns, one array each, see columns
+    # size: samples stored; later samples are not kept, see dropped
+    # key: the field ranked while sampling, top() gives the k largest, or the
+    # k smallest with largest=False; ties go to the earlier sample as with
+    # a stable sorted()
+    def __init__(self, fields, size, key, k=5, largest=True):
+        self._fields = fields
+        self._cols = [array('i', [0]*size) for f in fields]
+        self._size = size
+        self._n = 0
+        self._dropped = 0
+        self._key = self._cols[fields.index(key)]
+        self._sign = 1 if largest else -1
+        # min-heap of sample indices on the ranking: the root is the weakest
+        # of the top k and the one a stronger sample replaces
+        self._heap = array('i', [0]*k)
+        self._k = k
+        self._h = 0
+        # dump order: the fields by name, as the dumps have always been
+        self._order = sorted(range(len(fields)), key=lambda i: fields[i])
+
+    @property
+    def columns(self):
+        return self._cols
+
+    @property
+    def count(self):
+        return self._n
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def slot(self):
+        # the index of the next sample, its columns are written by the
+        # caller before commit(); -1 when the buffer is full
+        if self._n >= self._size:
+            return -1
+        return self._n
+
+    def commit(self):
+        # keep the sample written into slot() and rank it
+        i = self._n
+        if i >= self._size:
+            self._dropped += 1
+            return
+        self._n = i+1
+        heap = self._heap
+        if self._h < self._k:
+            heap[self._h] = i
+            self._h += 1
+            self._sift_up(self._h-1)
+        elif self._weaker(heap[0], i):
+            heap[0] = i
+            self._sift_down(0)
+
+    def _weaker(self, a, b):
+        # sample a ranks below sample b
+        ka = self._sign*self._key[a]
+        kb = self._sign*self._key[b]
+        return ka < kb or (ka == kb and a > b)
+
+    def _sift_up(self, j):
+        heap = self._heap
+        while j > 0:
+            p = (j-1) >> 1
+            if not self._weaker(heap[j], heap[p]):
+                break
+            heap[j], heap[p] = heap[p], heap[j]
+            j = p
+
+    def _sift_down(self, j):
+        heap = self._heap
+        n = self._h
+        while True:
+            c = 2*j + 1
+            if c >= n:
+                break
+            if c+1 < n and self._weaker(heap[c+1], heap[c]):
+                c += 1
+            if not self._weaker(heap[c], heap[j]):
+                break
+            heap[j], heap[c] = heap[c], heap[j]
+            j = c
+
+    def top(self):
+        # the indices of the top k samples, strongest first
+        top = [self._heap[j] for j in range(self._h)]
+        for a in range(1, len(top)): # k is small, insertion sort
+            i = top[a]
+            b = a
+            while b > 0 and self._weaker(top[b-1], i):
+                top[b] = top[b-1]
+                b -= 1
+            top[b] = i
+        return top
+
+    def get(self, field, i):
+        return self._cols[self._fields.index(field)][i]
+
+    def dump(self, write, indices=None):
+        # one line per sample, every sample when indices is None; formatted
+        # here, after the sampling
+        if indices is None:
+            indices = range(self._n)
+        fields = self._fields
+        cols = self._cols
+        for i in indices:
+            msg = '{'
+            for j in self._order:
+                msg += " '"+fields[j]+"':"+str(cols[j][i])+","
+            msg += '}'
+            write('    '+msg)
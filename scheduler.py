@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# rate group scheduler: tasks at integer dividers of the loop rate
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+from utime import ticks_us, ticks_diff
+
+class scheduler():
+    # base_hz: the rate tick() is called at. Every task runs at an integer
+    # divider of it, in the order the tasks were added.
+    def __init__(self, base_hz):
+        self.base_hz = base_hz
+        self._period_us = 1000000//base_hz
+        self._names = []
+        self._funcs = []
+        self._div = array('i')
+        self._cnt = array('i')      # ticks until the next run
+        self._runs = array('i')
+        self._missed = array('i')   # runs that ended after the task's period
+        self._max_us = array('i')   # longest run
+        self.ticks = 0
+
+    def add(self, name, func, hz, phase=0):
+        # phase: ticks to delay the first run by, so slow tasks sharing a
+        # divider can be spread over different ticks
+        if hz <= 0 or hz > self.base_hz:
+            raise ValueError('scheduler: '+name+' at '+str(hz)+'Hz, base '+str(self.base_hz)+'Hz')
+        div = self.base_hz//hz
+        self._names.append(name)
+        self._funcs.append(func)
+        self._div.append(div)
+        self._cnt.append(phase%div + 1)
+        self._runs.append(0)
+        self._missed.append(0)
+        self._max_us.append(0)
+        return len(self._funcs)-1
+
+    @property
+    def period_us(self):
+        return self._period_us
+
+    @property
+    def runs(self):
+        return self._runs
+
+    @property
+    def missed(self):
+        return self._missed
+
+    def tick(self):
+        # runs the tasks due on this tick; a task misses its deadline when
+        # it ends later than one of its own periods after the tick started
+        t0 = ticks_us()
+        cnt = self._cnt
+        for i in range(len(cnt)):
+            cnt[i] -= 1
+            if cnt[i]:
+                continue
+            div = self._div[i]
+            cnt[i] = div
+            t1 = ticks_us()
+            self._funcs[i]()
+            t2 = ticks_us()
+            self._runs[i] += 1
+            us = ticks_diff(t2, t1)
+            if us > self._max_us[i]:
+                self._max_us[i] = us
+            if ticks_diff(t2, t0) > div*self._period_us:
+                self._missed[i] += 1
+        self.ticks += 1
+
+    def reset_stats(self):
+        for i in range(len(self._runs)):
+            self._runs[i] = 0
+            self._missed[i] = 0
+            self._max_us[i] = 0
+
+    def report(self, write=print):
+        write('    task          Hz      runs    missed    max us')
+        for i in range(len(self._names)):
+            write('    {:<10} {:>5} {:>9} {:>9} {:>9}'.format(
+                  self._names[i], self.base_hz//self._div[i],
+                  self._runs[i], self._missed[i], self._max_us[i]))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Auther:   Stanley Huang
+# Project:  PicoDrone 0.8
+# Date:     2026-10-18
+#
+# One converted sensor sample per tick, shared by reference by every
+# controller and flight_data. Only the loop writes it, once per tick.
+#
+'''
+The MIT License (MIT)
+Copyright (C) 2022 Stanley Huang, huangstan1215@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the "Software"), to deal 
+in the Software without restriction, including without limitation the rights 
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell 
+copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+'''
+from array import array
+
+class SensorFrame():
+    __slots__ = ('acc', 'gyro', 'att', 'tem', 'acc_sum', 'ticks', 'seq', '_facc', '_fgyro')
+
+    RECORD_SIZE = 13    # ints written by pack()
+
+    def __init__(self):
+        self.acc = array('i', [0, 0, 0])    # centi-g, vehicle relative
+        self.gyro = array('i', [0, 0, 0])   # centi-degrees/s
+        self.att = array('i', [0, 0, 0])    # roll, pitch (centi-degrees), yaw rate (centi-degrees/s)
+        self.tem = 0                        # centi-C
+        self.acc_sum = 0                    # ax**2 + ay**2 + az**2 in centi-g
+        self.ticks = 0                      # ticks_us() of the sample
+        self.seq = 0                        # bumped on every new sample
+        self._facc = array('f', [0, 0, 0])  # scratch for the float decode path
+        self._fgyro = array('f', [0, 0, 0])
+
+    def read(self, imu, fixed_point=True):
+        # burst read a new sample from the MPU6050 and convert it
+        imu.read_frame()
+        self.decode(imu, fixed_point)
+
+    def decode(self, imu, fixed_point=True):
+        # convert the frame the MPU6050 holds, see read_frame() and wait_frame()
+        if fixed_point:
+            self.tem = imu.decode_fixed(self.acc, self.gyro)
+            self._update_acc_sum()
+        else:
+            self.tem = int(imu.decode(self._facc, self._fgyro)*100)
+            self.set_acc(self._facc)
+            self.set_gyro(self._fgyro)
+        self.ticks = imu.frame_ticks
+        self.seq += 1
+
+    def set_acc(self, acc_vals):
+        # from g
+        acc = self.acc
+        for i in range(3):
+            acc[i] = int(acc_vals[i]*100)
+        self._update_acc_sum()
+
+    def set_gyro(self, gyro_vals):
+        # from degrees/s
+        gyro = self.gyro
+        for i in range(3):
+            gyro[i] = int(gyro_vals[i]*100)
+
+    def set_acc_c(self, acc_cvals):
+        acc = self.acc
+        for i in range(3):
+            acc[i] = acc_cvals[i]
+        self._update_acc_sum()
+
+    def set_gyro_c(self, gyro_cvals):
+        gyro = self.gyro
+        for i in range(3):
+            gyro[i] = gyro_cvals[i]
+
+    def set_att(self, att_vals):
+        # from attitude.values, degrees and degrees/s
+        att = self.att
+        for i in range(3):
+            att[i] = int(att_vals[i]*100)
+
+    def pack(self, buf, i):
+        # seq, ticks, acc, gyro, att, tem, acc_sum into buf[i:i+RECORD_SIZE],
+        # e.g. a record_ring slot
+        buf[i] = self.seq
+        buf[i+1] = self.ticks
+        for j in range(3):
+            buf[i+2+j] = self.acc[j]
+            buf[i+5+j] = self.gyro[j]
+            buf[i+8+j] = self.att[j]
+        buf[i+11] = self.tem
+        buf[i+12] = self.acc_sum
+
+    def unpack(self, buf, i):
+        self.seq = buf[i]
+        self.ticks = buf[i+1]
+        for j in range(3):
+            self.acc[j] = buf[i+2+j]
+            self.gyro[j] = buf[i+5+j]
+            self.att[j] = buf[i+8+j]
+        self.tem = buf[i+11]
+        self.acc_sum = buf[i+12]
+
+    def _update_acc_sum(self):
+        acc = self.acc
+        self.acc_sum = acc[0]*acc[0] + acc[1]*acc[1] + acc[2]*acc[2]
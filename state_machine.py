@@ -66,12 +66,30 @@ def mark():
 
 class R8EF_channel(rp2.StateMachine):
     # Clock is 125MHz. 3 cycles per iteration, so unit is 24.0ns
+    # scale() and abs_scale() wait in get() for the next pulse, forever when
+    # the receiver is off; the loop uses poll()
     def scale(self):
-        v = self.get()
-        return (1 + (v ^ 0xffffffff)) * 24e-6  # Scale to ms
+        return self._ms(self.get())
 
     def abs_scale(self):
-        val = self.scale()*10000 - 10000
+        return self._abs(self.scale())
+
+    def poll(self):
+        # the newest pulse in 0 - 10,000, -1 when none arrived since the
+        # last call. Only the words already in the RX FIFO are read, at most
+        # its depth, so it never waits on the radio
+        n = self.rx_fifo()
+        if n == 0:
+            return -1
+        for i in range(n):
+            v = self.get()
+        return self._abs(self._ms(v))
+
+    def _ms(self, v):
+        return (1 + (v ^ 0xffffffff)) * 24e-6  # Scale to ms
+
+    def _abs(self, ms):
+        val = ms*10000 - 10000
         if val<0:
             val = 0
         elif val>10000:
@@ -24,6 +24,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 '''
 
+from array import array
 from utime import sleep_ms
 from math import sqrt, degrees, acos, atan2
 
@@ -35,22 +36,36 @@ def default_wait():
     sleep_ms(50)
 
 
+_MAGNITUDE = 0                                  # slots in _derived
+_INCLINATION = 1
+
+
 class Vector3d(object):
     '''
     Represents a vector in a 3D space using Cartesian coordinates.
     Internally uses sensor relative coordinates.
     Returns vehicle-relative x, y and z values.
+    Storage is preallocated: reading values allocates nothing except the
+    tuples returned by xyz and last_xyz; use read_into() in hot loops.
     '''
+    __slots__ = ('_vector', '_ivector', '_cal', '_cal_seq', '_scale', '_transpose',
+                 '_offset', '_xyz', '_derived', '_stale', 'update')
+
     def __init__(self, transposition, scaling, update_function):
-        self._vector = [0, 0, 0]
-        self._ivector = [0, 0, 0]
-        self.cal = (0, 0, 0)
+        self._vector = array('f', [0, 0, 0])    # scaled, sensor relative
+        self._ivector = array('h', [0, 0, 0])   # raw, sensor relative
+        self._cal = array('f', [0, 0, 0])       # calibration offsets, sensor relative
+        self._cal_seq = 0                       # bumped whenever cal changes
+        self._offset = array('f', [0, 0, 0])    # cal transposed and scaled, vehicle relative
+        self._xyz = array('f', [0, 0, 0])       # corrected values of the last update
+        self._derived = array('f', [0, 0])      # magnitude, inclination of _xyz
+        self._stale = 3                         # bit set per _derived slot to recompute
         self.argcheck(transposition, "Transposition")
         self.argcheck(scaling, "Scaling")
         if set(transposition) != {0, 1, 2}:
             raise ValueError('Transpose indices must be unique and in range 0-2')
-        self._scale = scaling
-        self._transpose = transposition
+        self._scale = tuple(scaling)
+        self._transpose = tuple(transposition)
         self.update = update_function
 
     def argcheck(self, arg, name):
@@ -65,8 +80,8 @@ class Vector3d(object):
         calibration routine, sets cal
         '''
         self.update()
-        maxvec = self._vector[:]                # Initialise max and min lists with current values
-        minvec = self._vector[:]
+        maxvec = list(self._vector)             # Initialise max and min lists with current values
+        minvec = list(self._vector)
         while not stopfunc():
             waitfunc()
             self.update()
@@ -75,43 +90,91 @@ class Vector3d(object):
         self.cal = tuple(map(lambda a, b: (a + b)/2, maxvec, minvec))
 
     @property
-    def _calvector(self):
+    def cal(self):
         '''
-        Vector adjusted for calibration offsets
+        Calibration offsets, sensor relative
         '''
-        return list(map(lambda val, offset: val - offset, self._vector, self.cal))
+        return tuple(self._cal)
+
+    @cal.setter
+    def cal(self, cal):
+        self.argcheck(cal, "Calibration")
+        for i in range(3):
+            self._cal[i] = cal[i]
+            self._offset[i] = cal[self._transpose[i]] * self._scale[i]
+        self._cal_seq += 1
+
+    def _correct(self):
+        '''
+        Transpose, offset and scale the last update into _xyz. Derived
+        values are marked stale only if the result changed.
+        '''
+        vector = self._vector
+        xyz = self._xyz
+        for i in range(3):
+            old = xyz[i]
+            xyz[i] = vector[self._transpose[i]] * self._scale[i] - self._offset[i]
+            if xyz[i] != old:
+                self._stale = 3
+
+    def read_into(self, out):
+        '''
+        One update, then the corrected, vehicle relative x, y and z are
+        written to out[0], out[1] and out[2]. Allocates nothing.
+        '''
+        self.update()
+        self._correct()
+        xyz = self._xyz
+        out[0] = xyz[0]
+        out[1] = xyz[1]
+        out[2] = xyz[2]
 
     @property
     def x(self):                                # Corrected, vehicle relative floating point values
         self.update()
-        return self._calvector[self._transpose[0]] * self._scale[0]
+        self._correct()
+        return self._xyz[0]
 
     @property
     def y(self):
         self.update()
-        return self._calvector[self._transpose[1]] * self._scale[1]
+        self._correct()
+        return self._xyz[1]
 
     @property
     def z(self):
         self.update()
-        return self._calvector[self._transpose[2]] * self._scale[2]
+        self._correct()
+        return self._xyz[2]
 
     @property
     def xyz(self):
         self.update()
-        return (self._calvector[self._transpose[0]] * self._scale[0],
-                self._calvector[self._transpose[1]] * self._scale[1],
-                self._calvector[self._transpose[2]] * self._scale[2])
+        self._correct()
+        return (self._xyz[0], self._xyz[1], self._xyz[2])
+
+    @property
+    def last_xyz(self):                         # As xyz, but from the last update: no device access
+        self._correct()
+        return (self._xyz[0], self._xyz[1], self._xyz[2])
 
     @property
     def magnitude(self):
-        x, y, z = self.xyz  # All measurements must correspond to the same instant
-        return sqrt(x**2 + y**2 + z**2)
+        self.update()                           # All measurements must correspond to the same instant
+        self._correct()
+        if self._stale & (1 << _MAGNITUDE):
+            xyz = self._xyz
+            self._derived[_MAGNITUDE] = sqrt(xyz[0]*xyz[0] + xyz[1]*xyz[1] + xyz[2]*xyz[2])
+            self._stale &= ~(1 << _MAGNITUDE)
+        return self._derived[_MAGNITUDE]
 
     @property
     def inclination(self):
-        x, y, z = self.xyz
-        return degrees(acos(z / sqrt(x**2 + y**2 + z**2)))
+        mag = self.magnitude
+        if self._stale & (1 << _INCLINATION):
+            self._derived[_INCLINATION] = degrees(acos(self._xyz[2] / mag))
+            self._stale &= ~(1 << _INCLINATION)
+        return self._derived[_INCLINATION]
 
     @property
     def elevation(self):
@@ -119,8 +182,9 @@ class Vector3d(object):
 
     @property
     def azimuth(self):
-        x, y, z = self.xyz
-        return degrees(atan2(y, x))
+        self.update()
+        self._correct()
+        return degrees(atan2(self._xyz[1], self._xyz[0]))
 
     # Raw uncorrected integer values from sensor
     @property
@@ -145,4 +209,4 @@ class Vector3d(object):
 
     @property
     def scale(self):
-        return tuple(self._scale)
\ No newline at end of file
+        return tuple(self._scale)